@@ -0,0 +1,94 @@
+"""
+Memory benchmark of person classes.
+
+Compares bytes per person of current (slotted) PersistedPerson with its
+implementation on another commit, by default the one before __slots__ were
+introduced (9cba1b1^) - instance dictionary, metadata dict per person.
+
+    python -m benchmarks.person_memory [-n NUMBER] [-c COMMIT]
+"""
+import argparse
+import subprocess
+import tracemalloc
+import types
+
+from datetime import date, timedelta
+from typing import Any, Callable
+
+from meshtools.types import PersistedPerson
+
+BASELINE_COMMIT = "9cba1b1^"
+
+FIRSTNAMES = ["Jan", "Anna", "Piotr", "Katarzyna", "Krzysztof", "Małgorzata", "Andrzej", "Zofia"]
+SURNAMES = ["Kowalski", "Nowak", "Wiśniewski", "Wójcik", "Kowalczyk", "Kamiński", "Lewandowski"]
+
+
+def load_types(commit: str) -> types.ModuleType:
+    """meshtools.types module as of given commit"""
+    source = subprocess.run(
+        ["git", "show", f"{commit}:src/types.py"], capture_output=True, text=True, check=True
+    ).stdout
+    module = types.ModuleType(f"types@{commit}")
+    exec(compile(source, f"{commit}:src/types.py", "exec"), module.__dict__)
+    return module
+
+
+def person_args(number: int) -> list[tuple[str, dict[str, Any]]]:
+    return [
+        (
+            f"4:{i:032x}:{i}",
+            {
+                "firstname": FIRSTNAMES[i % len(FIRSTNAMES)],
+                "surname": SURNAMES[i % len(SURNAMES)],
+                "fullname": f"{FIRSTNAMES[i % len(FIRSTNAMES)]} {SURNAMES[i % len(SURNAMES)]}",
+                "birthdate": date(1950, 1, 1) + timedelta(days=i % 20000),
+            }
+        )
+        for i in range(number)
+    ]
+
+
+def bytes_per_person(create: Callable[..., Any], args: list[tuple[str, dict[str, Any]]]) -> float:
+    """Memory allocated by persons only - their arguments are created up front"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    persons = [create(ident, **kwargs) for (ident, kwargs) in args]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert len(persons) == len(args)
+    return (after - before) / len(args)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark memory used by person objects")
+    parser.add_argument("-n", "--number", dest="number", type=int, default=100000)
+    parser.add_argument(
+        "-c", "--compare",
+        dest="commit",
+        default=BASELINE_COMMIT,
+        help=f"compare with PersistedPerson of given commit (default: {BASELINE_COMMIT})"
+    )
+    args = parser.parse_args()
+
+    try:
+        baseline = load_types(args.commit)
+    except subprocess.CalledProcessError as e:
+        parser.error(f"cannot load src/types.py of {args.commit} - {e.stderr.strip()}")
+    except OSError as e:
+        parser.error(f"cannot run git - {e}")
+
+    persons = person_args(args.number)
+    before = bytes_per_person(baseline.PersistedPerson, persons)
+    after = bytes_per_person(PersistedPerson, persons)
+    frozen = bytes_per_person(
+        lambda ident, **kwargs: PersistedPerson(ident, **kwargs).freeze(), persons
+    )
+
+    print(f"PersistedPerson ({args.commit} -> current)")
+    print(f"                 {before:8.1f} B -> {after:8.1f} B  ({before / after:.1f}x)")
+    print(f"  frozen         {frozen:8.1f} B")
+
+
+if __name__ == "__main__":
+    main()
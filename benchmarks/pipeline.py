@@ -0,0 +1,327 @@
+"""
+Throughput benchmark of the mapping and import pipeline.
+
+Synthetic candidate records (Polish names with prepositions and "vel"
+surnames, dates in mixed formats) are generated from a seed, so every run
+filters the same data. Measured in records per second:
+
+- every filter of meshtools.mapping - filter(), compiled step and filter_batch
+  (columns are prepared up front)
+- FilterChain of the filters, compiled and batched
+- filterjson end to end (JSON Lines parsed, filtered and written in memory)
+- import_elections into DataEngine with InMemoryStorage
+
+Results can be saved as JSON and compared with results of another commit.
+
+    python -m benchmarks.pipeline [-n NUMBER] [-o RESULTS] [-c BASELINE]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+
+from collections.abc import Callable
+from datetime import date, timedelta
+from typing import Any
+
+from meshtools.construct.engine import DataEngine
+from meshtools.construct.memory import InMemoryStorage
+from meshtools.jsonstream import JsonStream
+from meshtools.mapping import names
+from meshtools.mapping.basic import \
+    Capitalize, \
+    CreateProperty, \
+    FloatProperty, \
+    IntProperty, \
+    SplitProperty, \
+    Trim, \
+    TrimProperty
+from meshtools.mapping.dates import DateFilter
+from meshtools.mapping.mapper import FilterChain, PropertiesFilter, SimpleFilter, to_columns
+from meshtools.mapping.names import FullnameBuilder, FullnameFilter, NamesFilter, SurnameFilter
+from meshtools.scripts.filterjson import write_json_lines
+from meshtools.scripts.neo4j import import_elections
+
+FIRSTNAMES = [
+    "Jan", "Anna", "Piotr", "Katarzyna", "Krzysztof", "Małgorzata", "Andrzej", "Agnieszka",
+    "Tomasz", "Barbara", "Paweł", "Ewa", "Józef", "Elżbieta", "Marcin", "Zofia", "Grzegorz",
+    "Joanna", "Łukasz", "Dorota", "Stanisław", "Jadwiga", "Michał", "Urszula", "Wojciech",
+]
+SURNAMES = [
+    "Nowak", "Kowalski", "Wiśniewski", "Wójcik", "Kowalczyk", "Kamiński", "Lewandowski",
+    "Zieliński", "Szymański", "Woźniak", "Dąbrowski", "Kozłowski", "Jankowski", "Mazur",
+    "Kwiatkowski", "Krawczyk", "Piotrowski", "Grabowski", "Nowakowski", "Pawłowski", "Michalski",
+    "Brzęczyszczykiewicz", "Żółkiewski", "Kot", "Sęk",
+]
+PREPOSITIONS = ["da", "de", "van der", "van", "von"]
+FOREIGN_SURNAMES = ["Berg", "Silva", "Vries", "Laan", "Moltke"]
+PARTIES = ["Prawo i Sprawiedliwość", "Platforma Obywatelska", "Polskie Stronnictwo Ludowe",
+           "Lewica", "Konfederacja", "Polska 2050"]
+ASSEMBLIES = ["Sejmik Województwa Małopolskiego", "Sejmik Województwa Mazowieckiego",
+              "Sejmik Województwa Pomorskiego"]
+COUNCILS = ["Rada Miasta Krakowa", "Rada Gminy Zabierzów", "Rada Powiatu Tarnowskiego",
+            "Rada Miasta Gdańska", "Rada Gminy Wieliczka"]
+OFFICES = ["Wójt Gminy Zabierzów", "Burmistrz Wieliczki", "Prezydent Miasta Krakowa"]
+DATE_FORMATS = ["%Y-%m-%d", "%d-%m-%Y", "%d.%m.%Y", "%d/%m/%Y", " %d - %m - %Y "]
+
+
+def feminine(surname: str) -> str:
+    return surname[:-1] + "a" if surname.endswith(("ski", "cki", "dzki")) else surname
+
+
+def generate_candidates(number: int, seed: int = 0) -> list[dict[str, Any]]:
+    """Raw candidate records, as read from electoral commission's lists"""
+    rng = random.Random(seed)
+    candidates = []
+
+    for _ in range(number):
+        firstnames = rng.sample(FIRSTNAMES, rng.choice((1, 1, 1, 2)))
+        female = firstnames[0].endswith("a")
+
+        if rng.random() < 0.03:
+            surnames = [f"{rng.choice(PREPOSITIONS)} {rng.choice(FOREIGN_SURNAMES)}"]
+        else:
+            surnames = [rng.choice(SURNAMES)]
+            if rng.random() < 0.1:
+                surnames[0] += "-" + rng.choice(SURNAMES)
+            if rng.random() < 0.03:
+                surnames.append(rng.choice(SURNAMES))
+        if female:
+            surnames = ["-".join(map(feminine, s.split("-"))) for s in surnames]
+
+        # Inconsistent case and spacing, as in source data
+        surname = " vel ".join(surnames)
+        if rng.random() < 0.5:
+            surname = surname.upper()
+        fullname = f"{' '.join(firstnames)}  {surname}" if rng.random() < 0.2 \
+            else f"{' '.join(firstnames)} {surname}"
+
+        birthdate = (date(1940, 1, 1) + timedelta(days=rng.randrange(60 * 365))).strftime(
+            rng.choice(DATE_FORMATS)
+        )
+
+        candidates.append({
+            "name": fullname,
+            "names": " ".join(firstnames).lower() if rng.random() < 0.3 else " ".join(firstnames),
+            "surname": surname,
+            "birthdate": birthdate,
+            "votes": str(rng.randrange(10, 50000)),
+            "share": f"{rng.random() * 60:.2f}",
+            "domicile": f" {rng.choice(['Kraków', 'Tarnów', 'Gdańsk', 'Wieliczka'])} ",
+            "party": rng.choice(PARTIES).lower(),
+            "@parties": rng.sample(PARTIES, rng.choice((0, 1, 1, 2))),
+            "@electoralCommittee": f"KW {rng.choice(PARTIES)}",
+            "@assembly": rng.choice(ASSEMBLIES) if rng.random() < 0.2 else None,
+            "@council": rng.choice(COUNCILS) if rng.random() < 0.7 else None,
+            "@office": rng.choice(OFFICES) if rng.random() < 0.05 else None,
+        })
+
+    return candidates
+
+
+# Benchmarked filter -> filters preparing its input
+FILTERS: list[tuple[str, Callable[[], PropertiesFilter], list[PropertiesFilter]]] = [
+    ("TrimProperty", lambda: TrimProperty("domicile"), []),
+    ("SplitProperty", lambda: SplitProperty("names", to="nameList"), []),
+    ("IntProperty", lambda: IntProperty("votes"), []),
+    ("FloatProperty", lambda: FloatProperty("share"), []),
+    ("CreateProperty", lambda: CreateProperty("label", format="{name} ({votes})"), []),
+    ("SimpleFilter", lambda: SimpleFilter("party", apply=[Trim(), Capitalize()]), []),
+    ("NamesFilter", lambda: NamesFilter("names"), []),
+    ("SurnameFilter", lambda: SurnameFilter("surname"), []),
+    ("FullnameFilter", lambda: FullnameFilter("name"), []),
+    (
+        "FullnameBuilder",
+        lambda: FullnameBuilder("fullname"),
+        [NamesFilter("names"), SurnameFilter("surname")]
+    ),
+    ("DateFilter", lambda: DateFilter("birthdate", name="birthDate"), []),
+]
+
+
+def chain() -> FilterChain:
+    """Filters converting raw candidates into importable records"""
+    return FilterChain([
+        FullnameFilter("name"),
+        DateFilter("birthdate", name="birthDate"),
+        IntProperty("votes"),
+        FloatProperty("share"),
+        TrimProperty("domicile"),
+    ])
+
+
+def records_per_second(
+    run: Callable[[Any], Any],
+    prepare: Callable[[], Any],
+    number: int,
+    repeat: int
+) -> float:
+    """Best of repeat runs, each on freshly prepared (untimed) input"""
+    best = float("inf")
+    for _ in range(repeat):
+        data = prepare()
+        # Name caches are warmed up by each run alone
+        names.clear_cache()
+        started = time.perf_counter()
+        run(data)
+        best = min(best, time.perf_counter() - started)
+    return number / best
+
+
+def bench_filters(records: list[dict[str, Any]], repeat: int) -> dict[str, float]:
+    results = {}
+    for (label, create, preparing) in FILTERS:
+        filter = create()
+        prepared = list(map(FilterChain(preparing).compile(), map(dict, records)))
+
+        def copies() -> list[dict[str, Any]]:
+            return [dict(record) for record in prepared]
+
+        def filter_records(data: list[dict[str, Any]]) -> None:
+            for record in data:
+                record.update(filter.filter(record))
+
+        step = filter.compile()
+        results[f"{label}.filter"] = records_per_second(
+            filter_records, copies, len(records), repeat
+        )
+        results[f"{label}.compile"] = records_per_second(
+            lambda data: [step(record) for record in data], copies, len(records), repeat
+        )
+        results[f"{label}.batch"] = records_per_second(
+            filter.filter_batch, lambda: to_columns(copies()), len(records), repeat
+        )
+
+    return results
+
+
+def bench_chain(records: list[dict[str, Any]], repeat: int) -> dict[str, float]:
+    def copies() -> list[dict[str, Any]]:
+        return [dict(record) for record in records]
+
+    filters = chain()
+    compiled = filters.compile()
+    return {
+        "FilterChain.filter": records_per_second(
+            lambda data: [filters.filter(record) for record in data], copies, len(records), repeat
+        ),
+        "FilterChain.compile": records_per_second(
+            lambda data: list(map(compiled, data)), copies, len(records), repeat
+        ),
+        "FilterChain.batch": records_per_second(
+            filters.filter_batch, lambda: to_columns(copies()), len(records), repeat
+        ),
+    }
+
+
+def bench_filterjson(records: list[dict[str, Any]], repeat: int) -> dict[str, float]:
+    """Same steps as filterjson --jsonl, on in-memory input and output"""
+    lines = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+    input = lines.encode("UTF8")
+
+    def run(input: bytes) -> None:
+        output = io.StringIO()
+        write_json_lines(output, map(chain().compile(), JsonStream(io.BytesIO(input), "lines")))
+
+    return {"filterjson.jsonl": records_per_second(run, lambda: input, len(records), repeat)}
+
+
+def bench_import(records: list[dict[str, Any]], repeat: int, batch_size: int) -> dict[str, float]:
+    """import_elections of filtered candidates, with and without identity cache"""
+    compiled = chain().compile()
+    candidates = [compiled(dict(record)) for record in records]
+    results = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "candidates.json")
+        with open(path, "w", encoding="UTF8") as file:
+            json.dump(candidates, file, ensure_ascii=False)
+
+        for (label, cache_size) in [("import_elections", 0), ("import_elections.cached", None)]:
+            def run(engine: DataEngine) -> None:
+                # Progress bar goes to stdout
+                with contextlib.redirect_stdout(io.StringIO()):
+                    import_elections(
+                        engine, path, elections_name="Wybory 2024", batch_size=batch_size
+                    )
+
+            results[label] = records_per_second(
+                run, lambda: DataEngine(InMemoryStorage(), cache_size), len(records), repeat
+            )
+
+    return results
+
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark mapping and import throughput")
+    parser.add_argument("-n", "--number", dest="number", type=int, default=10000)
+    parser.add_argument("-r", "--repeat", dest="repeat", type=int, default=5)
+    parser.add_argument("-s", "--seed", dest="seed", type=int, default=0)
+    parser.add_argument("-b", "--batch-size", dest="batch_size", type=int, default=100)
+    parser.add_argument(
+        "-o", "--output-file",
+        dest="output_file",
+        action="store",
+        help="save results as JSON to given file"
+    )
+    parser.add_argument(
+        "-c", "--compare",
+        dest="baseline",
+        action="store",
+        help="compare with results saved (e.g. on another commit) in given file"
+    )
+    args = parser.parse_args()
+
+    records = generate_candidates(args.number, args.seed)
+
+    results = {
+        **bench_filters(records, args.repeat),
+        **bench_chain(records, args.repeat),
+        **bench_filterjson(records, args.repeat),
+        **bench_import(records, args.repeat, args.batch_size),
+    }
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="UTF8") as file:
+            baseline = json.load(file)["results"]
+
+    for (name, value) in results.items():
+        line = f"{name:32} {value:12,.0f} rec/s"
+        if name in baseline:
+            line += f"  ({value / baseline[name]:.2f}x)"
+        print(line)
+
+    if args.output_file:
+        with open(args.output_file, "w", encoding="UTF8") as file:
+            json.dump(
+                {
+                    "commit": current_commit(),
+                    "python": platform.python_version(),
+                    "number": args.number,
+                    "repeat": args.repeat,
+                    "seed": args.seed,
+                    "results": results,
+                },
+                file,
+                indent=2
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Microbenchmark of name and date sanitizing.
+
+Compares current sanitize_name / DateFilter.sanitize_date with former
+implementations (re.sub with pattern strings) on Polish name data.
+
+    python -m benchmarks.sanitize [-n NUMBER]
+"""
+import argparse
+import re
+import timeit
+
+from meshtools.mapping.dates import DateFilter
+from meshtools.mapping.names import sanitize_name
+
+NAMES = [
+    "Jan Kowalski",
+    "Anna  Maria Nowak - Kowalska",
+    " Grzegorz\tBrzęczyszczykiewicz ",
+    "Katarzyna Wiśniewska-Dąbrowska",
+    "JÓZEF  ZIELIŃSKI vel  KOT",
+    "Małgorzata Szymańska -Wójcik",
+    "Krzysztof Woźniak",
+    "Agnieszka   Kamińska\n",
+    "Łukasz Lewandowski",
+    "Zofia van der Berg",
+]
+
+DATES = ["1991-01-23", "23-01-1991", " 23 - 01 - 1991 ", "1975-12-05", "05-12-1975 "]
+
+
+def legacy_sanitize_name(name: str) -> str:
+    return re.sub(" *- *", "-", re.sub("\\s+", " ", name)).strip()
+
+
+def legacy_sanitize_date(date_string: str) -> str:
+    return re.sub(" *- *", "-", date_string).strip()
+
+
+def per_call(function, values: list[str], number: int) -> float:
+    """Best of 5 runs, nanoseconds per call"""
+    best = min(timeit.repeat(lambda: [function(v) for v in values], number=number, repeat=5))
+    return best / number / len(values) * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark name and date sanitizing")
+    parser.add_argument("-n", "--number", dest="number", type=int, default=20000)
+    args = parser.parse_args()
+
+    for (label, current, legacy, values) in [
+        ("sanitize_name", sanitize_name, legacy_sanitize_name, NAMES),
+        ("sanitize_date", DateFilter.sanitize_date, legacy_sanitize_date, DATES),
+    ]:
+        assert [current(v) for v in values] == [legacy(v) for v in values]
+
+        before = per_call(legacy, values, args.number)
+        after = per_call(current, values, args.number)
+        print(f"{label:16} {before:8.1f} ns -> {after:8.1f} ns  ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import heapq
+
+from collections.abc import Callable, Iterable, Iterator
+from typing import Self
+
+from meshtools.mapping import names
+from .engine import Duplicate, LinkedObject, Object
+
+type BlockingKey = tuple[str, ...]
+
+
+def person_names(data: Object) -> tuple[list[str], list[str]]:
+    """(surnames, names) as parsed by FullnameFilter, parsed from name if missing"""
+    surnames = data.get("surnames") or []
+    firstnames = data.get("names") or ([data["firstname"]] if data.get("firstname") else [])
+
+    if (not surnames or not firstnames) and data.get("name"):
+        (surnames, firstnames) = map(list, names.sanitized_fullname(data["name"]))
+
+    # Single element lists may be flattened when nodes are merged
+    return (
+        [surnames] if isinstance(surnames, str) else surnames,
+        [firstnames] if isinstance(firstnames, str) else firstnames
+    )
+
+
+def person_keys(data: Object) -> list[BlockingKey]:
+    """
+    Blocking keys of person - (firstname, surname, birth year) for each of
+    surnames, birth year is empty if not known.
+    """
+    (surnames, firstnames) = person_names(data)
+    if not firstnames:
+        return []
+
+    firstname = firstnames[0].casefold()
+    year = str(data.get("birthYear") or "")
+    return [(firstname, surname.casefold(), year) for surname in surnames if surname]
+
+
+def compatible_persons(first: Object, second: Object) -> bool:
+    """
+    Persons of the same block may be the same person if birth years do not
+    differ (when both are known) and names of one are included in the other's
+    (middle name may be missing).
+    """
+    (first_year, second_year) = (first.get("birthYear"), second.get("birthYear"))
+    if first_year and second_year and str(first_year) != str(second_year):
+        return False
+
+    shorter, longer = sorted(
+        (
+            [name.casefold() for name in person_names(first)[1]],
+            [name.casefold() for name in person_names(second)[1]]
+        ),
+        key=len
+    )
+    return all(name in longer for name in shorter)
+
+
+class BlockingIndex:
+    """
+    Fuzzy duplicates finder. Objects are indexed by blocking keys and compared
+    only with objects of the same block, so duplicates are found without
+    comparing all pairs. Last element of a key splits the block into buckets
+    (e.g. birth year) - empty one is unknown and is compared with all buckets
+    of the block, others only with their own and the unknown one. Groups of
+    compatible objects are joined (union-find) only if all their members are
+    compatible - person without birth year does not glue together persons born
+    in different years.
+    """
+
+    def __init__(
+        self: Self,
+        keys: Callable[[Object], Iterable[BlockingKey]] = person_keys,
+        compatible: Callable[[Object, Object], bool] = compatible_persons
+    ) -> None:
+        self.keys = keys
+        self.compatible = compatible
+        self.comparisons = 0
+        self._objects = list[LinkedObject]()
+        self._blocks = dict[BlockingKey, dict[str, list[int]]]()
+        self._parents = list[int]()
+        self._members = dict[int, list[int]]()
+
+    def add(self: Self, object: LinkedObject) -> None:
+        index = len(self._objects)
+        self._objects.append(object)
+        self._parents.append(index)
+        self._members[index] = [index]
+
+        for key in set(self.keys(object[0][1])):
+            block = self._blocks.setdefault(key[:-1], {})
+            for other in self._candidates(block, key[-1]):
+                (group, other_group) = (self._find(index), self._find(other))
+                # Already in the same group (e.g. through other surname)
+                if group != other_group and all(
+                    self._compatible(member, other_member)
+                    for member in self._members[group]
+                    for other_member in self._members[other_group]
+                ):
+                    self._parents[group] = other_group
+                    self._members[other_group].extend(self._members.pop(group))
+
+            block.setdefault(key[-1], []).append(index)
+
+    def update(self: Self, objects: Iterable[LinkedObject]) -> Self:
+        for object in objects:
+            self.add(object)
+        return self
+
+    def duplicates(self: Self) -> Iterator[Duplicate]:
+        """Groups of more than one object, in order of their first object's name"""
+        groups = [
+            [self._objects[index] for index in sorted(members)]
+            for members in self._members.values() if len(members) > 1
+        ]
+
+        for group in sorted(groups, key=lambda group: group[0][0][1].get("name") or ""):
+            yield (group[0][0][1].get("name"), len(group), group)
+
+    @staticmethod
+    def _candidates(block: dict[str, list[int]], bucket: str) -> Iterable[int]:
+        """Objects of the block to compare with, in order they were added"""
+        if not bucket:
+            return heapq.merge(*block.values())
+        return heapq.merge(block.get(bucket, []), block.get("", []))
+
+    def _compatible(self: Self, first: int, second: int) -> bool:
+        self.comparisons += 1
+        return self.compatible(self._objects[first][0][1], self._objects[second][0][1])
+
+    def _find(self: Self, index: int) -> int:
+        while self._parents[index] != index:
+            # Path halving
+            self._parents[index] = self._parents[self._parents[index]]
+            index = self._parents[index]
+        return index
@@ -1,9 +1,13 @@
+import asyncio
 import json
 
-from collections.abc import Callable
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterable, Iterator
 from dataclasses import dataclass
 from typing import Any, Protocol, Self
 
+from .metrics import Metrics
+
 
 @dataclass(frozen=True)
 class ObjectId:
@@ -33,6 +37,8 @@ type Object = dict[str, Any]
 type PersistedObject = tuple[ObjectId, Object]
 # Object that is Linked to other objects
 type LinkedObject = tuple[PersistedObject, list[PersistedObject]]
+# Duplicated name, number of duplicates and the duplicated objects
+type Duplicate = tuple[str, int, list[LinkedObject]]
 
 
 class Storage(Protocol):
@@ -60,17 +66,43 @@ class Storage(Protocol):
     def join(self: Self, whole: ObjectId | ObjectKeys, part: ObjectId | ObjectKeys) -> None:
         pass
 
+    def create_many(self: Self, type: str, rows: list[tuple[str, Object]]) -> list[ObjectId]:
+        """Create new objects of the same type, ids are returned in rows order"""
+        return [self.create(type, name, data) for (name, data) in rows]
+
+    def merge_many(self: Self, type: str, rows: list[tuple[str, Object]]) -> list[ObjectId]:
+        """Create or update objects of the same type, ids are returned in rows order"""
+        return [self.merge(type, name, data) for (name, data) in rows]
+
+    def merge_objects_many(self: Self, groups: list[list[ObjectId]]) -> list[ObjectId | None]:
+        """
+        Merge every group of objects, merged ids are returned in groups order
+        (None for group which could not be merged)
+        """
+        return [self.merge_objects(group) for group in groups]
+
+    def join_many(self: Self, pairs: list[tuple[ObjectId, ObjectId]]) -> None:
+        """Create whole-part relations, pairs are (whole, part) tuples"""
+        for (whole, part) in pairs:
+            self.join(whole, part)
+
+    def flush(self: Self) -> None:
+        """Write buffered operations (if storage buffers any)"""
+        pass
+
     def find_duplicates(
         self: Self,
         type: str,
-        callback: Callable[[str, int, list[LinkedObject]], None] | None = None
-    ) -> list[tuple[str, int, list[LinkedObject]]] | None:
+        callback: Callable[[str, int, list[LinkedObject]], None] | None = None,
+        page_size: int = 1000
+    ) -> Iterator[Duplicate] | None:
         """
-        Find all names that are duplicated of given object type.
+        Find all names that are duplicated of given object type, in name order.
 
         This method can be called in two flavours, depending if called with callback arg.
         In such a case callback will be called for each duplication found and no result will
-        be returned. Otherwise (default) list of duplicates will be returned.
+        be returned. Otherwise (default) duplicates are yielded lazily, storage may read
+        them in pages, page_size bounds the number of names (or objects) read at once.
 
         Return (and callback args) consists of
          duplicated name,
@@ -80,24 +112,162 @@ class Storage(Protocol):
         """
         pass
 
+    def scan(self: Self, type: str) -> Iterator[LinkedObject]:
+        """All objects of given type with objects they are linked with, read lazily"""
+        return iter(())
+
+
+class IdentityCache:
+    """
+    Client side cache of object identities - ObjectId matched or upserted for
+    given (type, name) or ObjectKeys, with properties written so far (to skip
+    upserts which would not change anything).
+
+    Cache is bounded by maxsize (None for unbounded), least recently used
+    entries are evicted first.
+    """
+
+    def __init__(self: Self, maxsize: int | None = None) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict[Hashable, tuple[ObjectId, Object]]()
+        # object id -> its keys, for invalidation
+        self._keys = dict[str, set[Hashable]]()
+
+    def __len__(self: Self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self: Self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self: Self, key: Hashable, data: Object = dict()) -> ObjectId | None:
+        """Cached id, provided all data properties are already written with the same values"""
+        entry = self._entries.get(key)
+        if entry is None or any(k not in entry[1] or entry[1][k] != v for (k, v) in data.items()):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self: Self, key: Hashable, id: ObjectId, data: Object = dict()) -> None:
+        """Cache id with properties written, adding to those already known"""
+        entry = self._entries.get(key)
+        if entry and entry[0] == id:
+            data = entry[1] | data
+        else:
+            self._discard(key)
+
+        self._entries[key] = (id, data)
+        self._entries.move_to_end(key)
+        self._keys.setdefault(id.id, set()).add(key)
+
+        if self.maxsize is not None and len(self._entries) > self.maxsize:
+            self._discard(next(iter(self._entries)))
+
+    def invalidate(self: Self, ids: Iterable[ObjectId]) -> None:
+        """Forget everything known about given objects"""
+        for id in ids:
+            for key in self._keys.pop(id.id, set()):
+                del self._entries[key]
+
+    def clear(self: Self) -> None:
+        self._entries.clear()
+        self._keys.clear()
+
+    @staticmethod
+    def name_key(type: str, name: str) -> Hashable:
+        return ("name", type, name)
+
+    @staticmethod
+    def keys_key(keys: ObjectKeys) -> Hashable:
+        # Dict of keys is not hashable, Contains is a different kind of lookup
+        return (
+            "contains" if isinstance(keys, Contains) else "keys",
+            keys.type,
+            tuple(sorted(keys.keys.items()))
+        )
+
+    def _discard(self: Self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._keys[entry[0].id]
+            keys.discard(key)
+            if not keys:
+                del self._keys[entry[0].id]
+
+
+# DataEngine operations timed when metrics are given
+OPERATIONS = (
+    "match", "insert", "upsert", "merge", "join",
+    "insert_many", "upsert_many", "merge_many", "join_many", "flush",
+)
+
+
+def instrument(engine: Any, metrics: Metrics, operations: Iterable[str]) -> None:
+    """Replace engine's bound methods with their timed versions"""
+    for name in operations:
+        setattr(engine, name, metrics.timed(name, getattr(engine, name)))
+
 
 class DataEngine:
     """Backend facade"""
 
-    def __init__(self: Self, storage: Storage) -> None:
+    def __init__(
+        self: Self, storage: Storage, cache_size: int | None = 0, metrics: Metrics | None = None
+    ) -> None:
+        """
+        Unless cache_size is 0, matched and upserted identities are cached
+        (None for unbounded cache), so repeated lookups and upserts of the
+        same objects do not reach the storage.
+        With metrics calls of all operations are counted and timed.
+        """
         self.storage = storage
+        self.cache = IdentityCache(cache_size) if cache_size != 0 else None
+        self.metrics = metrics
+        if metrics:
+            instrument(self, metrics, OPERATIONS)
 
     def match(self: Self, keys: ObjectId | ObjectKeys) -> ObjectId:
-        return self.storage.match(keys)
+        if self.cache is None or isinstance(keys, ObjectId):
+            return self.storage.match(keys)
+
+        key = IdentityCache.keys_key(keys)
+        id = self.cache.get(key)
+        if id:
+            return id
+
+        id = self.storage.match(keys)
+        # Missing object may be created later on, so only matches are cached
+        if id:
+            self.cache.put(key, id)
+        return id
 
     def insert(self: Self, type: str, name: str, data: Object = dict()) -> ObjectId:
         return self.storage.create(type, name, data)
 
     def upsert(self: Self, type: str, name: str, data: Object = dict()) -> ObjectId:
-        return self.storage.merge(type, name, data)
+        if self.cache is None:
+            return self.storage.merge(type, name, data)
+
+        key = IdentityCache.name_key(type, name)
+        # Skip if there is nothing new to write
+        id = self.cache.get(key, data)
+        if id:
+            return id
+
+        id = self.storage.merge(type, name, data)
+        self.cache.put(key, id, data | {"name": name})
+        return id
 
     def merge(self: Self, nodelist: list[ObjectId]) -> ObjectId:
-        return self.storage.merge_nodes(nodelist)
+        if self.cache is not None:
+            self.cache.invalidate(nodelist)
+        return self.storage.merge_objects(nodelist)
 
     def join(self: Self, whole: ObjectId | ObjectKeys, part: ObjectId | ObjectKeys) -> None:
         """Create whole-part (parent-child) relation"""
@@ -106,9 +276,129 @@ class DataEngine:
 #    def join(self: Self, whole: ObjectId | ObjectKeys, type: str, name: str, data: Any = dict()) -> ObjectId:
 #        self.storage.join(whole, part)
 
+    def insert_many(self: Self, type: str, rows: list[tuple[str, Object]]) -> list[ObjectId]:
+        return self.storage.create_many(type, rows)
+
+    def upsert_many(self: Self, type: str, rows: list[tuple[str, Object]]) -> list[ObjectId]:
+        ids = self.storage.merge_many(type, rows)
+        if self.cache is not None:
+            for ((name, data), id) in zip(rows, ids):
+                self.cache.put(IdentityCache.name_key(type, name), id, data | {"name": name})
+        return ids
+
+    def merge_many(self: Self, groups: list[list[ObjectId]]) -> list[ObjectId | None]:
+        if self.cache is not None:
+            for group in groups:
+                self.cache.invalidate(group)
+        return self.storage.merge_objects_many(groups)
+
+    def join_many(self: Self, pairs: list[tuple[ObjectId, ObjectId]]) -> None:
+        """Create whole-part relations for all (whole, part) pairs"""
+        self.storage.join_many(pairs)
+
+    def flush(self: Self) -> None:
+        """Make sure all buffered operations are written to the storage"""
+        self.storage.flush()
+
     def find_duplicates(
         self: Self,
         type: str,
-        callback: Callable[[str, int, list[LinkedObject]], None] | None = None
-    ) -> list[tuple[str, int, list[LinkedObject]]] | None:
-        return self.storage.find_duplicates(type, callback)
+        callback: Callable[[str, int, list[LinkedObject]], None] | None = None,
+        page_size: int = 1000
+    ) -> Iterator[Duplicate] | None:
+        return self.storage.find_duplicates(type, callback, page_size)
+
+    def scan(self: Self, type: str) -> Iterator[LinkedObject]:
+        return self.storage.scan(type)
+
+
+class AsyncStorage(Protocol):
+    """Asynchronous backend, object storage (import operations only)"""
+
+    async def match(self: Self, keys: ObjectId | ObjectKeys) -> ObjectId | None:
+        return None
+
+    async def create(self: Self, type: str, name: str, data: Object) -> ObjectId:
+        pass
+
+    async def merge(self: Self, type: str, name: str, data: Object) -> ObjectId:
+        pass
+
+    async def merge_objects(self: Self, nodelist: list[ObjectId]) -> ObjectId:
+        pass
+
+    async def join(self: Self, whole: ObjectId | ObjectKeys, part: ObjectId | ObjectKeys) -> None:
+        pass
+
+
+class AsyncDataEngine:
+    """
+    Asynchronous backend facade, operations may be awaited concurrently.
+
+    Concurrent upserts of the same (type, name) share single storage call,
+    so they cannot race into duplicated objects.
+    """
+
+    def __init__(
+        self: Self,
+        storage: AsyncStorage,
+        cache_size: int | None = 0,
+        metrics: Metrics | None = None
+    ) -> None:
+        self.storage = storage
+        self.cache = IdentityCache(cache_size) if cache_size != 0 else None
+        self.metrics = metrics
+        self._upserts = dict[Hashable, asyncio.Future[None]]()
+        if metrics:
+            instrument(self, metrics, ("match", "insert", "upsert", "merge", "join"))
+
+    async def match(self: Self, keys: ObjectId | ObjectKeys) -> ObjectId:
+        if self.cache is None or isinstance(keys, ObjectId):
+            return await self.storage.match(keys)
+
+        key = IdentityCache.keys_key(keys)
+        id = self.cache.get(key)
+        if id:
+            return id
+
+        id = await self.storage.match(keys)
+        if id:
+            self.cache.put(key, id)
+        return id
+
+    async def insert(self: Self, type: str, name: str, data: Object = dict()) -> ObjectId:
+        return await self.storage.create(type, name, data)
+
+    async def upsert(self: Self, type: str, name: str, data: Object = dict()) -> ObjectId:
+        key = IdentityCache.name_key(type, name)
+
+        # Wait for upsert of the same object in progress, it might be
+        # all that has to be done (then it is found in the cache)
+        while key in self._upserts:
+            await asyncio.wait([self._upserts[key]])
+
+        if self.cache is not None:
+            id = self.cache.get(key, data)
+            if id:
+                return id
+
+        in_progress = asyncio.get_running_loop().create_future()
+        self._upserts[key] = in_progress
+        try:
+            id = await self.storage.merge(type, name, data)
+            if self.cache is not None:
+                self.cache.put(key, id, data | {"name": name})
+            return id
+        finally:
+            del self._upserts[key]
+            # Only to wake up waiting upserts
+            in_progress.cancel()
+
+    async def merge(self: Self, nodelist: list[ObjectId]) -> ObjectId:
+        if self.cache is not None:
+            self.cache.invalidate(nodelist)
+        return await self.storage.merge_objects(nodelist)
+
+    async def join(self: Self, whole: ObjectId | ObjectKeys, part: ObjectId | ObjectKeys) -> None:
+        """Create whole-part (parent-child) relation"""
+        await self.storage.join(whole, part)
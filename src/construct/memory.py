@@ -0,0 +1,173 @@
+import itertools
+
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any, Self
+
+from .engine import Contains, Duplicate, LinkedObject, Object, ObjectId, ObjectKeys, Storage
+
+
+class InMemoryStorage(Storage):
+    """
+    Storage keeping everything in memory - for dry runs, benchmarks and tests.
+
+    Objects are indexed by (type, name) and by (type, key, value) for every
+    element of list valued properties (what Contains keys look for),
+    relations are kept as adjacency sets in both directions.
+    """
+
+    def __init__(self: Self, link_types: Iterable[str] = ("Party", "ParlimentaryGroup")) -> None:
+        """Objects of link_types joined with duplicates are reported as their links"""
+        self.link_types = set(link_types)
+        # id -> (type, data)
+        self.objects = dict[str, tuple[str, Object]]()
+        self._ids = itertools.count()
+        self._types = dict[str, set[str]]()
+        self._names = dict[tuple[str, str], list[str]]()
+        self._values = dict[tuple[str, str, Any], set[str]]()
+        # part -> wholes, whole -> parts
+        self._wholes = dict[str, set[str]]()
+        self._parts = dict[str, set[str]]()
+
+    @property
+    def relation_count(self: Self) -> int:
+        return sum(len(wholes) for wholes in self._wholes.values())
+
+    def match(self: Self, keys: ObjectId | ObjectKeys) -> ObjectId | None:
+        if isinstance(keys, ObjectId):
+            return keys if keys.id in self.objects else None
+
+        if isinstance(keys, Contains):
+            name, value = keys.get()
+            ids = self._values.get((keys.type, name, value), ())
+        elif "name" in keys.keys:
+            ids = [
+                id for id in self._names.get((keys.type, keys.keys["name"]), [])
+                if self._matches(id, keys.keys)
+            ]
+        else:
+            ids = [id for id in self._types.get(keys.type, ()) if self._matches(id, keys.keys)]
+
+        # Like Merger - only unique object is a match
+        return ObjectId(keys.type, next(iter(ids))) if len(ids) == 1 else None
+
+    def create(self: Self, type: str, name: str, data: Object) -> ObjectId:
+        id = str(next(self._ids))
+        self.objects[id] = (type, {})
+        self._types.setdefault(type, set()).add(id)
+        self._names.setdefault((type, name), []).append(id)
+        # Make sure name is taken from name arg
+        self._update(id, data | {"name": name})
+        return ObjectId(type, id)
+
+    def merge(self: Self, type: str, name: str, data: Object) -> ObjectId:
+        ids = self._names.get((type, name))
+        if not ids:
+            return self.create(type, name, data)
+
+        # MERGE updates all matching nodes
+        for id in ids:
+            self._update(id, data | {"name": name})
+        return ObjectId(type, ids[0])
+
+    def merge_objects(self: Self, nodelist: list[ObjectId]) -> ObjectId:
+        """Merge into the first object, as apoc.refactor.mergeNodes does in Merger"""
+        target, *others = [id.id for id in nodelist]
+        type, data = self.objects[target]
+        merged = dict(data)
+
+        for id in others:
+            for (key, value) in self.objects[id][1].items():
+                if key in ("@sources", "domicile", "profession"):
+                    merged[key] = combine(merged.get(key), value)
+                else:
+                    merged.setdefault(key, value)
+
+            for whole in self._wholes.pop(id, set()):
+                self._parts[whole].discard(id)
+                self._join(whole, target)
+            for part in self._parts.pop(id, set()):
+                self._wholes[part].discard(id)
+                self._join(target, part)
+
+            self._remove(id)
+
+        self._update(target, merged)
+        return ObjectId(nodelist[0].type, target)
+
+    def join(self: Self, whole: ObjectId | ObjectKeys, part: ObjectId | ObjectKeys) -> None:
+        # Like Merger, works only on ids
+        self._join(whole.id, part.id)
+
+    def find_duplicates(
+        self: Self,
+        type: str,
+        callback: Callable[[str, int, list[LinkedObject]], None] | None = None,
+        page_size: int = 1000
+    ) -> Iterator[Duplicate] | None:
+        duplicates = self._duplicates(type)
+        if not callback:
+            return duplicates
+
+        for duplicate in duplicates:
+            callback(*duplicate)
+        return None
+
+    def scan(self: Self, type: str) -> Iterator[LinkedObject]:
+        for id in sorted(self._types.get(type, ()), key=int):
+            yield self._linked(ObjectId(type, id))
+
+    def _duplicates(self: Self, type: str) -> Iterator[Duplicate]:
+        for ((name_type, name), ids) in sorted(self._names.items(), key=lambda item: item[0][1]):
+            if name_type != type or len(ids) < 2:
+                continue
+
+            yield (name, len(ids), [self._linked(ObjectId(type, id)) for id in ids])
+
+    def _linked(self: Self, id: ObjectId) -> LinkedObject:
+        return (
+            (id, self.objects[id.id][1]),
+            [
+                self.objects[whole][1] for whole in self._wholes.get(id.id, ())
+                if self.objects[whole][0] in self.link_types
+            ]
+        )
+
+    def _matches(self: Self, id: str, keys: dict[str, Any]) -> bool:
+        data = self.objects[id][1]
+        return all(data.get(key) == value for (key, value) in keys.items())
+
+    def _update(self: Self, id: str, data: Object) -> None:
+        type, current = self.objects[id]
+        for (key, value) in data.items():
+            self._unindex(type, id, key, current.get(key))
+            current[key] = value
+            if isinstance(value, list):
+                for element in value:
+                    self._values.setdefault((type, key, element), set()).add(id)
+
+    def _unindex(self: Self, type: str, id: str, key: str, value: Any) -> None:
+        if isinstance(value, list):
+            for element in value:
+                self._values.get((type, key, element), set()).discard(id)
+
+    def _remove(self: Self, id: str) -> None:
+        type, data = self.objects.pop(id)
+        self._types[type].discard(id)
+        self._names[(type, data["name"])].remove(id)
+        for (key, value) in data.items():
+            self._unindex(type, id, key, value)
+
+    def _join(self: Self, whole: str, part: str) -> None:
+        self._wholes.setdefault(part, set()).add(whole)
+        self._parts.setdefault(whole, set()).add(part)
+
+
+def combine(current: Any, value: Any) -> Any:
+    """Combine property values, single value is not turned into list"""
+    values = []
+    for v in (current, value):
+        for element in (v if isinstance(v, list) else [v]):
+            if element is not None and element not in values:
+                values.append(element)
+
+    return values[0] if len(values) == 1 else values
@@ -0,0 +1,176 @@
+import bisect
+import functools
+import inspect
+import json
+import time
+
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any, Self
+
+# Upper bounds of latency histogram buckets, in milliseconds
+BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """Latency histogram with fixed logarithmic buckets (last one is unbounded)"""
+
+    def __init__(self: Self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self: Self, ms: float) -> None:
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        self.buckets[bisect.bisect_left(BUCKETS, ms)] += 1
+
+    def update(self: Self, other: "Histogram") -> None:
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.buckets = [a + b for (a, b) in zip(self.buckets, other.buckets)]
+
+    @property
+    def mean(self: Self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self: Self, percent: float) -> float:
+        """Upper bound of the bucket percentile falls into (max for the last one)"""
+        rank = self.count * percent / 100
+        seen = 0
+        for (index, count) in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return min(BUCKETS[index], self.max) if index < len(BUCKETS) else self.max
+        return 0.0
+
+    def to_dict(self: Self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_ms": self.total,
+            "mean_ms": self.mean,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max,
+            "buckets": {
+                f"le_{bound}": count for (bound, count) in zip(BUCKETS + ("inf",), self.buckets)
+            },
+        }
+
+
+class Metrics:
+    """
+    Operation counts and latencies measured by the client, and server
+    timings (result available after / consumed after) of Neo4j statements.
+    """
+
+    def __init__(self: Self) -> None:
+        self.operations = dict[str, Histogram]()
+        self.server = dict[str, tuple[Histogram, Histogram]]()
+        self._started = time.perf_counter()
+
+    def record(self: Self, name: str, seconds: float) -> None:
+        histogram = self.operations.get(name)
+        if histogram is None:
+            histogram = self.operations[name] = Histogram()
+        histogram.add(seconds * 1000)
+
+    def record_server(self: Self, name: str, available_after: int, consumed_after: int) -> None:
+        """Record server timings (milliseconds, as reported in result summary)"""
+        histograms = self.server.get(name)
+        if histograms is None:
+            histograms = self.server[name] = (Histogram(), Histogram())
+        histograms[0].add(available_after or 0)
+        histograms[1].add(consumed_after or 0)
+
+    def update(self: Self, other: "Metrics") -> None:
+        """Add measurements of other metrics (e.g. collected in another thread)"""
+        for (name, histogram) in other.operations.items():
+            self.operations.setdefault(name, Histogram()).update(histogram)
+        for (name, (available, consumed)) in other.server.items():
+            histograms = self.server.setdefault(name, (Histogram(), Histogram()))
+            histograms[0].update(available)
+            histograms[1].update(consumed)
+
+    def timed(self: Self, name: str, function: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap function (or coroutine function) so its calls are recorded as name"""
+        record = self.record
+
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def timed_coroutine(*args: Any, **kwargs: Any) -> Any:
+                started = time.perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    record(name, time.perf_counter() - started)
+
+            return timed_coroutine
+
+        @functools.wraps(function)
+        def timed_function(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - started)
+
+        return timed_function
+
+    def iterate(self: Self, name: str, values: Iterable[Any]) -> Iterator[Any]:
+        """Record time spent getting every value (e.g. reading and parsing input)"""
+        iterator = iter(values)
+        while True:
+            started = time.perf_counter()
+            try:
+                value = next(iterator)
+            except StopIteration:
+                return
+            self.record(name, time.perf_counter() - started)
+            yield value
+
+    def to_dict(self: Self) -> dict[str, Any]:
+        return {
+            "elapsed_s": time.perf_counter() - self._started,
+            "operations": {
+                name: histogram.to_dict() for (name, histogram) in sorted(self.operations.items())
+            },
+            "server": {
+                name: {"available_after": available.to_dict(), "consumed_after": consumed.to_dict()}
+                for (name, (available, consumed)) in sorted(self.server.items())
+            },
+        }
+
+    def save(self: Self, path: str) -> None:
+        with open(path, "w", encoding="UTF8") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def summary(self: Self) -> str:
+        lines = [
+            f"{'operation':24} {'count':>8} {'total s':>9} {'mean ms':>9} "
+            f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"
+        ]
+        for (name, h) in sorted(self.operations.items()):
+            lines.append(
+                f"{name:24} {h.count:8d} {h.total / 1000:9.2f} {h.mean:9.2f} "
+                f"{h.percentile(50):9.2f} {h.percentile(95):9.2f} {h.percentile(99):9.2f} "
+                f"{h.max:9.2f}"
+            )
+
+        if self.server:
+            lines.append("")
+            lines.append(
+                f"{'server statement':24} {'count':>8} {'avail ms':>9} {'p95 ms':>9} "
+                f"{'cons ms':>9} {'p95 ms':>9}"
+            )
+            for (name, (available, consumed)) in sorted(self.server.items()):
+                lines.append(
+                    f"{name:24} {available.count:8d} {available.mean:9.2f} "
+                    f"{available.percentile(95):9.2f} {consumed.mean:9.2f} "
+                    f"{consumed.percentile(95):9.2f}"
+                )
+
+        return "\n".join(lines)
@@ -0,0 +1,62 @@
+from .dedup import BlockingIndex, compatible_persons, person_keys
+from .engine import DataEngine
+from .memory import InMemoryStorage
+
+
+def test_person_keys():
+    assert person_keys({"names": ["Jan"], "surnames": ["Kowalski", "Nowak"]}) == [
+        ("jan", "kowalski", ""), ("jan", "nowak", "")
+    ]
+    # Parsed from name when not filtered before import
+    assert person_keys({"name": "Jan Maria Kowalski vel Nowak", "birthYear": 1970}) == [
+        ("jan", "kowalski", "1970"), ("jan", "nowak", "1970")
+    ]
+    assert person_keys({}) == []
+
+
+def test_compatible_persons():
+    jan = {"names": ["Jan"], "surnames": ["Kowalski"], "birthYear": 1970}
+    assert compatible_persons(jan, {"names": ["Jan", "Maria"], "birthYear": 1970})
+    assert compatible_persons(jan, {"names": ["Jan"]})
+    assert not compatible_persons(jan, {"names": ["Jan"], "birthYear": 1980})
+    assert not compatible_persons(
+        {"names": ["Jan", "Piotr"]}, {"names": ["Jan", "Maria"]}
+    )
+
+
+def test_fuzzy_duplicates():
+    engine = DataEngine(InMemoryStorage())
+    party = engine.upsert("Party", "PSL", {})
+    first = engine.insert("Person", "Jan Kowalski", {"birthYear": 1970})
+    second = engine.insert("Person", "Jan Kowalski vel Nowak", {})
+    third = engine.insert("Person", "Jan Maria Nowak", {"birthYear": 1970})
+    engine.insert("Person", "Jan Kowalski", {"birthYear": 1990})
+    engine.insert("Person", "Anna Kowalska", {"birthYear": 1970})
+    engine.join(party, third)
+
+    index = BlockingIndex().update(engine.scan("Person"))
+    duplicates = list(index.duplicates())
+
+    assert [(name, count) for (name, count, _) in duplicates] == [("Jan Kowalski", 3)]
+    objects = duplicates[0][2]
+    assert [id for ((id, _), _) in objects] == [first, second, third]
+    assert objects[2][1] == [{"name": "PSL"}]
+    # Only persons of the same block were compared
+    assert index.comparisons < 5 * 4 / 2
+
+
+def test_blocks_split_by_birth_year():
+    engine = DataEngine(InMemoryStorage())
+    for year in range(1950, 2000):
+        engine.insert("Person", "Jan Kowalski", {"birthYear": year})
+        engine.insert("Person", "Jan Maria Kowalski", {"birthYear": str(year)})
+    unknown = engine.insert("Person", "Jan Kowalski", {})
+
+    index = BlockingIndex().update(engine.scan("Person"))
+    duplicates = list(index.duplicates())
+
+    # Person without birth year joins the first group only
+    assert [count for (_, count, _) in duplicates] == [3] + [2] * 49
+    assert duplicates[0][2][2][0][0] == unknown
+    # Each person compared with the one of the same year, the unknown one with all
+    assert index.comparisons == 50 + 100
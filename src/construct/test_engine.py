@@ -0,0 +1,186 @@
+import asyncio
+
+from .engine import AsyncDataEngine, Contains, DataEngine, IdentityCache, ObjectId
+from .memory import InMemoryStorage
+
+
+class CountingStorage(InMemoryStorage):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def match(self, keys):
+        self.calls += 1
+        return super().match(keys)
+
+    def merge(self, type, name, data):
+        self.calls += 1
+        return super().merge(type, name, data)
+
+
+def test_cached_upsert():
+    storage = CountingStorage()
+    engine = DataEngine(storage, cache_size=None)
+
+    assembly = engine.upsert("Assembly", "Sejmik", {})
+    assert engine.upsert("Assembly", "Sejmik", {}) == assembly
+    assert engine.upsert("Assembly", "Sejmik", {"name": "Sejmik"}) == assembly
+    assert storage.calls == 1
+
+    # New data is written through
+    engine.upsert("Assembly", "Sejmik", {"term": 7})
+    engine.upsert("Assembly", "Sejmik", {"term": 7})
+    assert storage.calls == 2
+    assert storage.objects[assembly.id][1]["term"] == 7
+    assert engine.cache.hits == 3
+    assert engine.cache.misses == 2
+
+
+def test_cached_match():
+    storage = CountingStorage()
+    engine = DataEngine(storage, cache_size=None)
+
+    assert engine.match(Contains("Party", "names", "PSL")) is None
+    party = engine.upsert("Party", "PSL", {"names": ["PSL"]})
+    assert engine.match(Contains("Party", "names", "PSL")) == party
+    assert engine.match(Contains("Party", "names", "PSL")) == party
+    assert storage.calls == 3
+
+
+def test_cache_invalidated_on_merge():
+    engine = DataEngine(CountingStorage(), cache_size=None)
+
+    first = engine.upsert("Party", "PSL", {})
+    second = engine.insert("Party", "PSL", {})
+    engine.merge([first, second])
+    assert len(engine.cache) == 0
+
+
+def test_cache_eviction():
+    cache = IdentityCache(maxsize=2)
+    for name in ["a", "b", "c"]:
+        cache.put(IdentityCache.name_key("Party", name), ObjectId("Party", name))
+
+    assert cache.get(IdentityCache.name_key("Party", "a")) is None
+    assert cache.get(IdentityCache.name_key("Party", "c"))
+    assert len(cache) == 2
+    assert cache.hit_rate == 0.5
+
+
+class SlowAsyncStorage:
+    """InMemoryStorage behind awaits, so concurrent calls interleave"""
+
+    def __init__(self, fail=0):
+        self.storage = CountingStorage()
+        # Number of merges to fail
+        self.fail = fail
+        self.merging = 0
+        self.max_merging = 0
+
+    async def match(self, keys):
+        await asyncio.sleep(0)
+        return self.storage.match(keys)
+
+    async def create(self, type, name, data):
+        await asyncio.sleep(0)
+        return self.storage.create(type, name, data)
+
+    async def merge(self, type, name, data):
+        self.merging += 1
+        self.max_merging = max(self.max_merging, self.merging)
+        try:
+            await asyncio.sleep(0)
+            if self.fail:
+                self.fail -= 1
+                raise RuntimeError("merge failed")
+            return self.storage.merge(type, name, data)
+        finally:
+            self.merging -= 1
+
+    async def merge_objects(self, nodelist):
+        return self.storage.merge_objects(nodelist)
+
+    async def join(self, whole, part):
+        await asyncio.sleep(0)
+        self.storage.join(whole, part)
+
+
+def test_async_upsert_single_flight():
+    storage = SlowAsyncStorage()
+    engine = AsyncDataEngine(storage, cache_size=None)
+
+    async def upsert_many():
+        return await asyncio.gather(*[engine.upsert("Office", "Urząd", {}) for _ in range(10)])
+
+    ids = asyncio.run(upsert_many())
+    assert len(set(ids)) == 1
+    assert storage.storage.calls == 1
+    assert len(storage.storage.objects) == 1
+
+
+def test_async_upsert_without_cache():
+    storage = SlowAsyncStorage()
+    engine = AsyncDataEngine(storage)
+
+    async def upsert_many():
+        return await asyncio.gather(*[engine.upsert("Office", "Urząd", {}) for _ in range(5)])
+
+    ids = asyncio.run(upsert_many())
+    # Nothing is cached, so every upsert is written, but one at a time
+    assert len(set(ids)) == 1
+    assert storage.storage.calls == 5
+    assert storage.max_merging == 1
+    assert engine._upserts == {}
+
+
+def test_async_upsert_new_data():
+    storage = SlowAsyncStorage()
+    engine = AsyncDataEngine(storage, cache_size=None)
+
+    async def upsert_many():
+        return await asyncio.gather(
+            engine.upsert("Office", "Urząd", {}),
+            engine.upsert("Office", "Urząd", {"term": 7}),
+            engine.upsert("Office", "Urząd", {}),
+            engine.upsert("Office", "Wójt", {}),
+        )
+
+    ids = asyncio.run(upsert_many())
+    assert ids[0] == ids[1] == ids[2] != ids[3]
+    # Upsert waiting for the first one writes what is new only
+    assert storage.storage.calls == 3
+    assert storage.storage.objects[ids[0].id][1]["term"] == 7
+    # Different objects are upserted concurrently
+    assert storage.max_merging == 2
+
+
+def test_async_upsert_failure():
+    storage = SlowAsyncStorage(fail=1)
+    engine = AsyncDataEngine(storage, cache_size=None)
+
+    async def upsert_many():
+        return await asyncio.gather(
+            *[engine.upsert("Office", "Urząd", {}) for _ in range(3)], return_exceptions=True
+        )
+
+    (failed, *ids) = asyncio.run(upsert_many())
+    # Failed upsert does not block those waiting for it
+    assert isinstance(failed, RuntimeError)
+    assert ids[0] == ids[1]
+    assert storage.storage.calls == 1
+    assert engine._upserts == {}
+
+
+def test_async_cached_match():
+    storage = SlowAsyncStorage()
+    engine = AsyncDataEngine(storage, cache_size=None)
+
+    async def run():
+        party = await engine.upsert("Party", "PSL", {"names": ["PSL"]})
+        matches = [await engine.match(Contains("Party", "names", "PSL")) for _ in range(3)]
+        return (party, matches)
+
+    (party, matches) = asyncio.run(run())
+    assert matches == [party] * 3
+    # Merge and the first match only
+    assert storage.storage.calls == 2
@@ -0,0 +1,65 @@
+import pytest
+
+from .engine import Contains, DataEngine, ObjectId, ObjectKeys
+from .memory import InMemoryStorage
+
+
+@pytest.fixture
+def engine():
+    return DataEngine(InMemoryStorage())
+
+
+def test_insert_and_upsert(engine):
+    first = engine.insert("Person", "Jan Kowalski", {"birthYear": 1970})
+    second = engine.insert("Person", "Jan Kowalski", {})
+    assert first != second
+
+    party = engine.upsert("Party", "PSL", {"names": ["PSL"]})
+    assert engine.upsert("Party", "PSL", {"short": "PSL"}) == party
+    assert engine.storage.objects[party.id][1] == {"names": ["PSL"], "name": "PSL", "short": "PSL"}
+
+
+def test_match(engine):
+    party = engine.upsert("Party", "Polskie Stronnictwo Ludowe", {"names": ["PSL", "ZSL"]})
+    engine.insert("Person", "Jan Kowalski", {"birthYear": 1970})
+    engine.insert("Person", "Jan Kowalski", {"birthYear": 1980})
+
+    assert engine.match(party) == party
+    assert engine.match(ObjectId("Party", "missing")) is None
+    assert engine.match(Contains("Party", "names", "ZSL")) == party
+    assert engine.match(Contains("Party", "names", "PO")) is None
+    # Not unique
+    assert engine.match(ObjectKeys("Person", {"name": "Jan Kowalski"})) is None
+    assert engine.match(ObjectKeys("Person", {"name": "Jan Kowalski", "birthYear": 1980}))
+
+
+def test_find_and_merge_duplicates(engine):
+    party = engine.upsert("Party", "PSL", {})
+    assembly = engine.upsert("Assembly", "Sejmik", {})
+    first = engine.insert("Person", "Jan Kowalski", {"domicile": "Kraków"})
+    second = engine.insert("Person", "Jan Kowalski", {"domicile": "Tarnów"})
+    engine.insert("Person", "Anna Nowak", {})
+    engine.join(party, second)
+    engine.join(assembly, second)
+
+    duplicates = list(engine.find_duplicates("Person"))
+    assert [(name, count) for (name, count, _) in duplicates] == [("Jan Kowalski", 2)]
+    links = {id.id: links for ((id, _), links) in duplicates[0][2]}
+    assert links[first.id] == []
+    assert links[second.id] == [{"name": "PSL"}]
+
+    merged = engine.merge([first, second])
+    assert merged == first
+    assert engine.match(second) is None
+    assert engine.storage.objects[first.id][1]["domicile"] == ["Kraków", "Tarnów"]
+    assert list(engine.find_duplicates("Person")) == []
+    assert engine.find_duplicates("Person", lambda *args: None) is None
+    assert engine.storage.relation_count == 2
+
+
+def test_merge_many(engine):
+    first = [engine.insert("Person", "Jan Kowalski", {}) for _ in range(3)]
+    second = [engine.insert("Person", "Anna Nowak", {}) for _ in range(2)]
+
+    assert engine.merge_many([first, second]) == [first[0], second[0]]
+    assert len(engine.storage.objects) == 2
@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+from .engine import DataEngine
+from .memory import InMemoryStorage
+from .metrics import Histogram, Metrics
+
+
+def test_histogram():
+    histogram = Histogram()
+    for ms in [0.05] * 90 + [3] * 9 + [20000]:
+        histogram.add(ms)
+
+    assert histogram.count == 100
+    assert histogram.percentile(50) == 0.1
+    assert histogram.percentile(95) == 5
+    assert histogram.percentile(100) == 20000
+    assert histogram.max == 20000
+
+    other = Histogram()
+    other.add(1)
+    histogram.update(other)
+    assert histogram.count == 101
+    assert Histogram().percentile(50) == 0.0
+
+
+def test_timed_and_iterate():
+    metrics = Metrics()
+
+    async def double(value):
+        return value * 2
+
+    assert metrics.timed("add", lambda a, b: a + b)(1, 2) == 3
+    assert asyncio.run(metrics.timed("double", double)(2)) == 4
+    assert list(metrics.iterate("read", range(3))) == [0, 1, 2]
+
+    assert {name: h.count for (name, h) in metrics.operations.items()} == {
+        "add": 1, "double": 1, "read": 3
+    }
+
+    total = Metrics()
+    total.update(metrics)
+    total.update(metrics)
+    total.record_server("MATCH", 1, 2)
+    assert total.operations["read"].count == 6
+    assert total.server["MATCH"][1].total == 2
+
+
+def test_engine_metrics(tmp_path):
+    metrics = Metrics()
+    engine = DataEngine(InMemoryStorage(), metrics=metrics)
+
+    party = engine.upsert("Party", "PSL", {})
+    engine.upsert("Party", "PSL", {})
+    engine.join(party, engine.insert("Person", "Jan Kowalski", {}))
+    assert engine.match(party) == party
+
+    assert {name: h.count for (name, h) in metrics.operations.items()} == {
+        "upsert": 2, "insert": 1, "join": 1, "match": 1
+    }
+    assert "upsert" in metrics.summary()
+
+    metrics.save(tmp_path / "metrics.json")
+    with open(tmp_path / "metrics.json") as file:
+        assert json.load(file)["operations"]["upsert"]["count"] == 2
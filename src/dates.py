@@ -1,4 +1,8 @@
+import itertools
+
+from collections.abc import Iterable
 from datetime import date, datetime
+from typing import Self
 
 __PLFORMAT = "%d-%m-%Y"
 
@@ -26,3 +30,82 @@ def frompesel(pesel: str) -> date:
     month = int(pesel[2:4])
     day = int(pesel[4:6])
     return date(1900+year, month, day) if month < 13 else date(2000+year, month-20, day)
+
+
+# Formats parsed by DateParser unless told otherwise
+DEFAULT_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%d.%m.%Y", "%d/%m/%Y")
+
+# Fixed width shapes (10 characters), format -> (year first, separator)
+_FIXED_WIDTH = {
+    f"{first}{sep}%m{sep}{last}": (first == "%Y", sep)
+    for sep in "-./"
+    for (first, last) in (("%Y", "%d"), ("%d", "%Y"))
+}
+
+
+class DateParser:
+    """
+    Parse dates in any of configured formats (tried in order).
+
+    Leading formats of fixed width shapes (YYYY-MM-DD, DD-MM-YYYY, dotted
+    and slashed variants) are recognized by separator positions and parsed
+    by slicing the string. Fixed width formats following any other format
+    are not, so formats are still tried in configured order. Strings not
+    parsed that way fall back to strptime of all formats. With iso_fallback
+    the generic ISO parser is tried before strptime (as DateFilter always did).
+    """
+
+    def __init__(
+        self: Self, formats: Iterable[str] = DEFAULT_FORMATS, iso_fallback: bool = True
+    ) -> None:
+        self.formats = tuple(formats)
+        self.iso_fallback = iso_fallback
+        self._fixed_width = [
+            _FIXED_WIDTH[f] for f in itertools.takewhile(_FIXED_WIDTH.__contains__, self.formats)
+        ]
+
+    def parse(self: Self, date_string: str) -> date | None:
+        if len(date_string) == 10:
+            for (year_first, sep) in self._fixed_width:
+                # Reorder into YYYY-MM-DD and let (fast) ISO parser validate it
+                if year_first:
+                    if date_string[4] != sep or date_string[7] != sep:
+                        continue
+                    iso_string = date_string if sep == "-" \
+                        else f"{date_string[0:4]}-{date_string[5:7]}-{date_string[8:10]}"
+                else:
+                    if date_string[2] != sep or date_string[5] != sep:
+                        continue
+                    iso_string = f"{date_string[6:10]}-{date_string[3:5]}-{date_string[0:2]}"
+
+                try:
+                    return date.fromisoformat(iso_string)
+                except ValueError:
+                    # Separators matched but it is not a date, let all formats try
+                    break
+
+        return self.parse_generic(date_string)
+
+    def parse_generic(self: Self, date_string: str) -> date | None:
+        if self.iso_fallback:
+            try:
+                return fromisoformat(date_string)
+            except ValueError:
+                pass
+
+        for format in self.formats:
+            try:
+                return datetime.strptime(date_string, format).date()
+            except ValueError:
+                pass
+
+        return None
+
+
+def parse_date(date_string: str, formats: Iterable[str] = DEFAULT_FORMATS) -> date | None:
+    """Parse date in one of given formats, None if it cannot be parsed"""
+    return (_default_parser if formats is DEFAULT_FORMATS else DateParser(formats)) \
+        .parse(date_string)
+
+
+_default_parser = DateParser()
@@ -0,0 +1,191 @@
+import codecs
+import json
+
+from collections.abc import Iterator
+from typing import Any, BinaryIO, Self, TextIO
+
+_WHITESPACE = " \t\n\r"
+# Characters of JSON numbers
+_NUMBER = "0123456789+-.eE"
+
+
+class JsonStream:
+    """
+    Read JSON values one at a time from top-level array or from JSON Lines
+    (whitespace separated values) without loading the whole input.
+
+    position is the number of bytes consumed up to the end of the last value
+    returned, so the stream can be reopened at that offset later on.
+    """
+
+    def __init__(
+        self: Self,
+        file: BinaryIO | TextIO,
+        format: str = "auto",
+        offset: int = 0,
+        chunk_size: int = 65536,
+        encoding: str = "utf-8"
+    ) -> None:
+        """
+        Format is one of "auto", "array" or "lines". With auto format input
+        starting with [ is read as an array, anything else as JSON Lines.
+        Non-zero offset must point right after a value returned earlier.
+        """
+        assert format in ("auto", "array", "lines"), f"unsupported format {format}"
+
+        self.file = file
+        self.format = format
+        self.position = offset
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+
+        if offset:
+            file.seek(offset)
+
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder(encoding)()
+        self._buffer = ""
+        self._index = 0
+        self._eof = False
+        self._started = False
+        self._first = False
+        self._closed = False
+
+    @property
+    def is_array(self: Self) -> bool:
+        # Format is detected when first needed
+        if not self._started:
+            self._start()
+        return self.format == "array"
+
+    def __iter__(self: Self) -> Iterator[Any]:
+        if not self._started:
+            self._start()
+
+        while True:
+            if self.is_array:
+                if not self._array_separator():
+                    return
+            elif not self._skip_whitespace():
+                return
+
+            yield self._value()
+
+    def _start(self: Self) -> None:
+        self._started = True
+        self._fill()
+
+        if self.position:
+            # Resumed right after a value - array has , or ] next
+            has_data = self._skip_whitespace()
+            if self.format == "auto":
+                self.format = "array" if has_data and self._buffer[self._index] in ",]" \
+                    else "lines"
+            return
+
+        # Skip BOM if any
+        if self._buffer.startswith("\ufeff"):
+            self._consume(1)
+
+        has_data = self._skip_whitespace()
+        if self.format == "auto":
+            self.format = "array" if has_data and self._buffer[self._index] == "[" else "lines"
+
+        if self.is_array:
+            if not has_data or self._buffer[self._index] != "[":
+                self._error("expected [")
+            self._consume(1)
+            # No separator is expected before first value
+            self._first = True
+
+    def _array_separator(self: Self) -> bool:
+        """Skip , between values, return False when array is closed"""
+        if self._closed:
+            return False
+
+        if not self._skip_whitespace():
+            self._error("unterminated array")
+
+        match self._buffer[self._index]:
+            case "]":
+                self._consume(1)
+                # Anything after closing bracket is ignored
+                self._closed = True
+                return False
+            case _ if self._first:
+                self._first = False
+                return True
+            case ",":
+                self._consume(1)
+                if not self._skip_whitespace():
+                    self._error("unterminated array")
+                return True
+            case _:
+                self._error("expected , or ]")
+
+    def _value(self: Self) -> Any:
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._index)
+                # Number reaching the end of buffer may continue in next chunk,
+                # e.g. 1 of 1.5 or 1e of 1e10 (decoded up to the . or e)
+                if self._eof or not isinstance(value, (int, float)) \
+                        or self._number_end(end) < len(self._buffer):
+                    self._consume(end - self._index)
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+
+            self._fill()
+
+    def _number_end(self: Self, start: int) -> int:
+        """Index of first character after start which cannot be part of a number"""
+        end = len(self._buffer)
+        while start < end and self._buffer[start] in _NUMBER:
+            start += 1
+        return start
+
+    def _skip_whitespace(self: Self) -> bool:
+        """Skip white spaces, return False if there is nothing more to read"""
+        while True:
+            start = self._index
+            end = len(self._buffer)
+            while start < end and self._buffer[start] in _WHITESPACE:
+                start += 1
+            self._consume(start - self._index)
+
+            if start < end:
+                return True
+            if self._eof:
+                return False
+
+            self._fill()
+
+    def _consume(self: Self, count: int) -> None:
+        if count:
+            consumed = self._buffer[self._index:self._index + count]
+            self.position += len(consumed) if consumed.isascii() \
+                else len(consumed.encode(self.encoding))
+            self._index += count
+
+    def _fill(self: Self) -> None:
+        """Read next chunk of data into buffer"""
+        if self._eof:
+            return
+
+        # Drop what is already consumed
+        self._buffer = self._buffer[self._index:]
+        self._index = 0
+
+        chunk = self.file.read(self.chunk_size)
+        if isinstance(chunk, bytes):
+            self._buffer += self._text.decode(chunk, final=not chunk)
+        else:
+            self._buffer += chunk
+
+        if not chunk:
+            self._eof = True
+
+    def _error(self: Self, message: str) -> None:
+        raise json.JSONDecodeError(message, self._buffer, self._index)
@@ -1,7 +1,33 @@
 
 import re
+from collections.abc import Callable
 from typing import Any, Self
-from .mapper import Properties, PropertiesFilter, ValueMapper
+from .mapper import Columns, FilterStep, Properties, PropertiesFilter, ValueMapper
+
+# NumPy is optional, used to convert whole columns at once
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def convert_column(column: list[Any], convert: Callable[[Any], Any], dtype: str) -> list[Any]:
+    """Convert non-empty values of column with convert or NumPy (as dtype) if available"""
+    if numpy is None:
+        return [convert(value) if value else value for value in column]
+
+    indexes = [index for (index, value) in enumerate(column) if value]
+    values = [column[index] for index in indexes]
+    try:
+        converted = numpy.array(values).astype(dtype).tolist() if values else []
+    except (ValueError, TypeError, OverflowError):
+        # E.g. float values in int column, let Python decide
+        converted = list(map(convert, values))
+
+    column = list(column)
+    for (index, value) in zip(indexes, converted):
+        column[index] = value
+    return column
 
 
 class CopyProperty(PropertiesFilter):
@@ -30,6 +56,15 @@ class CreateProperty(PropertiesFilter):
             self._name: self._format.format(**data)
         }
 
+    def compile(self: Self) -> FilterStep:
+        name = self._name
+        format = self._format.format
+
+        def step(data: Properties) -> None:
+            data[name] = format(**data)
+
+        return step
+
 
 class SplitProperty(PropertiesFilter):
     """Convert property to an array"""
@@ -44,6 +79,26 @@ class SplitProperty(PropertiesFilter):
             self._to: property.split()
         } if property else {}
 
+    def compile(self: Self) -> FilterStep:
+        name = self._name
+        to = self._to
+
+        def step(data: Properties) -> None:
+            property = data.get(name)
+            if property:
+                data[to] = property.split()
+
+        return step
+
+    def filter_batch(self: Self, columns: Columns) -> Columns:
+        column = columns.get(self._name)
+        if column is not None:
+            target = columns.get(self._to) or [None] * len(column)
+            columns[self._to] = [
+                value.split() if value else current for (value, current) in zip(column, target)
+            ]
+        return columns
+
 
 class TrimProperty(PropertiesFilter):
     """Remove white spaces from both ends of string property"""
@@ -57,6 +112,22 @@ class TrimProperty(PropertiesFilter):
             self._name: property.strip()
         } if property else {}
 
+    def compile(self: Self) -> FilterStep:
+        name = self._name
+
+        def step(data: Properties) -> None:
+            property = data.get(name)
+            if property:
+                data[name] = property.strip()
+
+        return step
+
+    def filter_batch(self: Self, columns: Columns) -> Columns:
+        column = columns.get(self._name)
+        if column is not None:
+            columns[self._name] = [value.strip() if value else value for value in column]
+        return columns
+
 
 class IntProperty(PropertiesFilter):
     """Convert property to int"""
@@ -70,6 +141,22 @@ class IntProperty(PropertiesFilter):
             self._name: int(property)
         } if property else {}
 
+    def compile(self: Self) -> FilterStep:
+        name = self._name
+
+        def step(data: Properties) -> None:
+            property = data.get(name)
+            if property:
+                data[name] = int(property)
+
+        return step
+
+    def filter_batch(self: Self, columns: Columns) -> Columns:
+        column = columns.get(self._name)
+        if column is not None:
+            columns[self._name] = convert_column(column, int, "int64")
+        return columns
+
 
 class FloatProperty(PropertiesFilter):
     """Convert property to float"""
@@ -83,6 +170,22 @@ class FloatProperty(PropertiesFilter):
             self._name: float(property)
         } if property else {}
 
+    def compile(self: Self) -> FilterStep:
+        name = self._name
+
+        def step(data: Properties) -> None:
+            property = data.get(name)
+            if property:
+                data[name] = float(property)
+
+        return step
+
+    def filter_batch(self: Self, columns: Columns) -> Columns:
+        column = columns.get(self._name)
+        if column is not None:
+            columns[self._name] = convert_column(column, float, "float64")
+        return columns
+
 
 class Replace(ValueMapper):
     def __init__(self: Self, pattern: str, repl: str = "") -> None:
@@ -90,7 +193,7 @@ class Replace(ValueMapper):
         self._repl = repl
 
     def map(self: Self, value: Any) -> Any:
-        return re.sub(self._pattern, self._repl, str(value))
+        return self._pattern.sub(self._repl, str(value))
 
 
 class Trim(ValueMapper):
@@ -2,8 +2,11 @@ import re
 from datetime import date
 from typing import Any, Self
 
-from .mapper import Properties, PropertiesFilter
-from ..dates import fromisoformat, fromplformat
+from .mapper import Columns, FilterStep, Properties, PropertiesFilter
+from ..dates import DEFAULT_FORMATS, DateParser, fromisoformat, fromplformat
+
+# Spaces around dash
+dash = re.compile(" *- *")
 
 
 class DateFilter(PropertiesFilter):
@@ -12,7 +15,8 @@ class DateFilter(PropertiesFilter):
     def sanitize_date(date_string: str) -> str:
         # - remove spaces around dash (-)
         # - strip leading and trailing spaces
-        return re.sub(" *- *", "-", date_string).strip()
+        return dash.sub("-", date_string).strip() if " " in date_string \
+            else date_string.strip()
 
     @staticmethod
     def try_fromisoformat(date_string: str) -> date | None:
@@ -31,17 +35,51 @@ class DateFilter(PropertiesFilter):
     def __init__(self, property: str, **kwargs: list[Any]) -> None:
         self._name = property
         self._out_name = kwargs["name"]
+        # date formats to try, in order
+        self._parser = DateParser(kwargs.get("formats", DEFAULT_FORMATS))
 
     def filter(self: Self, data: Properties) -> Properties:
         field = data.pop(self._name, None)
         if field:
-            date_string = DateFilter.sanitize_date(field)
-            date_attr = DateFilter.try_fromisoformat(date_string)
-            if not date_attr:
-                date_attr = DateFilter.try_fromplformat(date_string)
-
+            date_attr = self._parser.parse(DateFilter.sanitize_date(field))
             return {
                 self._out_name: date_attr.isoformat() if date_attr else field
             }
 
         return {}
+
+    def compile(self: Self) -> FilterStep:
+        name = self._name
+        out_name = self._out_name
+        parse = self._parser.parse
+        sanitize = DateFilter.sanitize_date
+
+        def step(data: Properties) -> None:
+            field = data.pop(name, None)
+            if field:
+                date_attr = parse(sanitize(field))
+                data[out_name] = date_attr.isoformat() if date_attr else field
+
+        return step
+
+    def filter_batch(self: Self, columns: Columns) -> Columns:
+        column = columns.pop(self._name, None)
+        if column is None:
+            return columns
+
+        parse = self._parser.parse
+        sanitize = DateFilter.sanitize_date
+        # Dates repeat a lot, each distinct one is parsed once per batch
+        parsed = dict[str, str]()
+
+        target = columns.get(self._out_name) or [None] * len(column)
+        for (index, field) in enumerate(column):
+            if field:
+                value = parsed.get(field)
+                if value is None:
+                    date_attr = parse(sanitize(field))
+                    value = parsed[field] = date_attr.isoformat() if date_attr else field
+                target[index] = value
+
+        columns[self._out_name] = target
+        return columns
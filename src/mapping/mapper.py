@@ -1,10 +1,41 @@
 
+from collections.abc import Callable
 from functools import reduce
 from typing import Any, Protocol, Self
 
 
 # Properties is just an alias for dictionary
 type Properties = dict[str, Any]
+# Compiled filter, updates properties in place
+type FilterStep = Callable[[Properties], Any]
+# Batch of records - property name to equally long list of values,
+# None stands for missing property. Batches do not tell missing property
+# from property of None value - to_records() drops both, unlike filter().
+type Columns = dict[str, list[Any]]
+
+
+def batch_length(columns: Columns) -> int:
+    return len(next(iter(columns.values()), []))
+
+
+def to_columns(records: list[Properties]) -> Columns:
+    columns = dict[str, list[Any]]()
+    for (index, record) in enumerate(records):
+        for (key, value) in record.items():
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = [None] * len(records)
+            column[index] = value
+    return columns
+
+
+def to_records(columns: Columns) -> list[Properties]:
+    """Records of batch, properties of None values are left out"""
+    keys = list(columns)
+    return [
+        {key: value for (key, value) in zip(keys, values) if value is not None}
+        for values in zip(*columns.values())
+    ]
 
 
 class PropertiesFilter(Protocol):
@@ -13,6 +44,39 @@ class PropertiesFilter(Protocol):
     def filter(self: Self, data: Properties) -> Properties:
         pass
 
+    def compile(self: Self) -> FilterStep:
+        """
+        Return function doing the same as data.update(self.filter(data)).
+        Filters should override it to update data without intermediate dict.
+        """
+        filter = self.filter
+
+        def step(data: Properties) -> None:
+            data.update(filter(data))
+
+        return step
+
+    def filter_batch(self: Self, columns: Columns) -> Columns:
+        """
+        Filter batch of records in place and return it. Filters should
+        override it to work on whole columns, default goes record by record.
+        """
+        step = self.compile()
+        records = to_records(columns)
+        for record in records:
+            step(record)
+
+        # Columns of None values only are kept (in place), as filters working on columns do
+        filtered = to_columns(records)
+        kept = {
+            key: filtered.pop(key) if key in filtered else [None] * len(records)
+            for (key, column) in columns.items()
+            if key in filtered or all(value is None for value in column)
+        }
+        columns.clear()
+        columns.update(kept | filtered)
+        return columns
+
 
 class ValueMapper(Protocol):
     """Convert value to another value"""
@@ -36,6 +100,36 @@ class SimpleFilter(PropertiesFilter):
             self._rename_to: reduce(lambda v, m: m.map(v), self._mappers, property)
         } if property else {}
 
+    def compile(self: Self) -> FilterStep:
+        name = self._name
+        rename_to = self._rename_to
+        maps = [mapper.map for mapper in self._mappers]
+
+        def step(data: Properties) -> None:
+            value = data.get(name)
+            if value:
+                for map in maps:
+                    value = map(value)
+                data[rename_to] = value
+
+        return step
+
+    def filter_batch(self: Self, columns: Columns) -> Columns:
+        column = columns.get(self._name)
+        if column is None:
+            return columns
+
+        values = [v for v in column if v]
+        for mapper in self._mappers:
+            values = list(map(mapper.map, values))
+
+        target = columns.get(self._rename_to) or [None] * len(column)
+        mapped = iter(values)
+        columns[self._rename_to] = [
+            next(mapped) if value else current for (value, current) in zip(column, target)
+        ]
+        return columns
+
 
 class FilterChain(PropertiesFilter):
     """Simple filter act on single property, this chain allows for filtering more properties."""
@@ -48,3 +142,22 @@ class FilterChain(PropertiesFilter):
         for filter in self._filters:
             properties.update(filter.filter(properties))
         return properties
+
+    def compile(self: Self) -> Callable[[Properties], Properties]:
+        """
+        Equivalent of filter() - every filter is compiled into a step updating
+        data in place, so there are no intermediate dicts.
+        """
+        steps = tuple(filter.compile() for filter in self._filters)
+
+        def chain(data: Properties) -> Properties:
+            for step in steps:
+                step(data)
+            return data
+
+        return chain
+
+    def filter_batch(self: Self, columns: Columns) -> Columns:
+        for filter in self._filters:
+            filter.filter_batch(columns)
+        return columns
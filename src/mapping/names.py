@@ -1,13 +1,69 @@
+import functools
 import re
+from collections.abc import Callable
 from typing import Any, Match, Self, Tuple
-from .mapper import Properties, PropertiesFilter
+from .mapper import Columns, FilterStep, Properties, PropertiesFilter
+
+# Name parsing cache - names repeat a lot in candidate lists.
+# Cached functions work on raw (not sanitized) input and return tuples,
+# so cached results cannot be modified by callers.
+_cache_size = 4096
+_cached_functions = dict[str, "CachedFunction"]()
+
+
+class CachedFunction:
+    """
+    LRU cache of function which can be resized in place - callers holding
+    the function (e.g. imported by name) use the resized cache too.
+    """
+
+    def __init__(self: Self, function: Callable[..., Any], maxsize: int | None) -> None:
+        functools.update_wrapper(self, function)
+        self._function = function
+        self._cached = functools.lru_cache(maxsize=maxsize)(function)
+
+    def __call__(self: Self, *args: Any, **kwargs: Any) -> Any:
+        return self._cached(*args, **kwargs)
+
+    def resize(self: Self, maxsize: int | None) -> None:
+        self._cached = functools.lru_cache(maxsize=maxsize)(self._function)
+
+    def cache_info(self: Self) -> functools._CacheInfo:
+        return self._cached.cache_info()
+
+    def cache_clear(self: Self) -> None:
+        self._cached.cache_clear()
+
+
+def cached(function: Callable[..., Any]) -> CachedFunction:
+    _cached_functions[function.__name__] = CachedFunction(function, _cache_size)
+    return _cached_functions[function.__name__]
+
+
+def set_cache_size(maxsize: int | None) -> None:
+    """Set size of name parsing caches, 0 turns caching off, None makes them unbounded"""
+    global _cache_size
+    _cache_size = maxsize
+    for function in _cached_functions.values():
+        function.resize(maxsize)
+
+
+def cache_info() -> dict[str, functools._CacheInfo]:
+    """Hits, misses and sizes of name parsing caches"""
+    return {name: function.cache_info() for (name, function) in _cached_functions.items()}
+
+
+def clear_cache() -> None:
+    for function in _cached_functions.values():
+        function.cache_clear()
 
 
 def sanitize_name(name: str) -> str:
     # - replace all repeated white spaces with single space
+    #   and strip leading and trailing spaces (single split/join pass)
     # - remove spaces around dash (-) - name joiner
-    # - strip leading and trailing spaces
-    return re.sub(" *- *", "-", re.sub("\\s+", " ", name)).strip()
+    name = " ".join(name.split())
+    return "-".join([s.strip(" ") for s in name.split("-")]) if "-" in name else name
 
 
 def capitalize_name(name: str) -> str:
@@ -15,9 +71,17 @@ def capitalize_name(name: str) -> str:
 
 
 def capitalize_names(names: str) -> list[str]:
-    return [capitalize_name(name) for name in [s for s in names.split()]]
+    return [capitalized_name(name) for name in names.split()]
 
 
+@cached
+def capitalized_name(name: str) -> str:
+    return capitalize_name(name)
+
+
+# Separator of alternative surnames
+vel_separator = re.compile(" vel ", re.IGNORECASE)
+
 # Mind the order!
 prepositions = ["da", "de", "di", "van der", "van de", "van", "von"]
 
@@ -40,6 +104,89 @@ def match_surname_at_end(name: str) -> Match[str] | None:
     return surname_at_end.search(name)
 
 
+def parse_surname(name: str) -> str:
+    parts = []
+
+    # We use surname matching regex to get preposition,
+    # which will be lowered as opposed to other parts,
+    # which will be capitalized
+    match = match_surname_at_start(name)
+    if match and match.group("preposition"):
+        preposition = match.group("preposition").casefold()
+        name = name[len(preposition)+1:]
+        parts.append(preposition)
+
+    parts.extend(capitalize_names(name))
+
+    return " ".join(parts)
+
+
+def parse_fullname(fullname: str, surname_at_end: bool = True) -> Tuple[list[str], list[str]]:
+    parts = vel_separator.split(fullname)
+
+    surnames = []
+    names = []
+
+    if surname_at_end:
+        (s, n) = parse_fullname_1(parts[0], surname_at_end)
+        surnames.append(s)
+        names.extend(n)
+        for surname in parts[1:]:
+            surnames.append(parse_surname(surname))
+    else:
+        (s, n) = parse_fullname_1(parts[-1], surname_at_end)
+        surnames.append(s)
+        names.extend(n)
+        for surname in parts[0:-1]:
+            surnames.append(parse_surname(surname))
+
+    return (surnames, names)
+
+
+def parse_fullname_1(fullname: str, surname_at_end: bool = True) -> Tuple[str, list[str]]:
+    names = []
+
+    if surname_at_end:
+        # name [name...] [preposition] surname
+        match = match_surname_at_end(fullname)
+        if not match:
+            return ([], [])
+
+        names = match.string[0:match.start()]
+    else:
+        # [preposition] surname name [name...]
+        match = match_surname_at_start(fullname)
+        if not match:
+            return ([], [])
+
+        names = match.string[match.end():]
+
+    surname = capitalize_name(match.group("surname"))
+    preposition = match.group("preposition")
+    if preposition:
+        surname = preposition.casefold() + " " + surname
+
+    return (surname, capitalize_names(names))
+
+
+@cached
+def sanitized_names(name: str) -> tuple[str, ...]:
+    return tuple(capitalize_names(sanitize_name(name)))
+
+
+@cached
+def sanitized_surnames(name: str) -> tuple[str, ...]:
+    return tuple(map(parse_surname, vel_separator.split(sanitize_name(name))))
+
+
+@cached
+def sanitized_fullname(
+    fullname: str, surname_at_end: bool = True
+) -> Tuple[tuple[str, ...], tuple[str, ...]]:
+    (surnames, names) = parse_fullname(sanitize_name(fullname), surname_at_end)
+    return (tuple(surnames), tuple(names))
+
+
 class NamesFilter(PropertiesFilter):
     """Filter string names into firstname and array of names"""
 
@@ -57,12 +204,43 @@ class NamesFilter(PropertiesFilter):
         if not name:
             return {}
 
-        names = self.parse_names(sanitize_name(name))
+        names = list(sanitized_names(name))
         return {
             self._names: names,
             self._firstname: names[0],
         }
 
+    def compile(self: Self) -> FilterStep:
+        name_key = self._name
+        names_key = self._names
+        firstname_key = self._firstname
+
+        def step(data: Properties) -> None:
+            name = data.pop(name_key, None)
+            if name:
+                names = list(sanitized_names(name))
+                data[names_key] = names
+                data[firstname_key] = names[0]
+
+        return step
+
+    def filter_batch(self: Self, columns: Columns) -> Columns:
+        column = columns.pop(self._name, None)
+        if column is None:
+            return columns
+
+        names_column = columns.get(self._names) or [None] * len(column)
+        firstname_column = columns.get(self._firstname) or [None] * len(column)
+        for (index, name) in enumerate(column):
+            if name:
+                names = list(sanitized_names(name))
+                names_column[index] = names
+                firstname_column[index] = names[0]
+
+        columns[self._names] = names_column
+        columns[self._firstname] = firstname_column
+        return columns
+
     def parse_names(self: Self, names: str) -> list[str]:
         return capitalize_names(names)
 
@@ -84,30 +262,48 @@ class SurnameFilter(PropertiesFilter):
         if not name:
             return {}
 
-        surnames = self.parse_surnames(sanitize_name(name))
+        surnames = list(sanitized_surnames(name))
         return {
             self._surname: surnames[0],
             self._surnames: surnames,
         }
 
-    def parse_surname(self: Self, name: str) -> str:
-        parts = []
-
-        # We use surname matching regex to get preposition,
-        # which will be lowered as opposed to other parts,
-        # which will be capitalized
-        match = match_surname_at_start(name)
-        if match and match.group("preposition"):
-            preposition = match.group("preposition").casefold()
-            name = name[len(preposition)+1:]
-            parts.append(preposition)
-
-        parts.extend(capitalize_names(name))
+    def compile(self: Self) -> FilterStep:
+        name_key = self._name
+        surname_key = self._surname
+        surnames_key = self._surnames
+
+        def step(data: Properties) -> None:
+            name = data.pop(name_key, None)
+            if name:
+                surnames = list(sanitized_surnames(name))
+                data[surname_key] = surnames[0]
+                data[surnames_key] = surnames
+
+        return step
+
+    def filter_batch(self: Self, columns: Columns) -> Columns:
+        column = columns.pop(self._name, None)
+        if column is None:
+            return columns
+
+        surname_column = columns.get(self._surname) or [None] * len(column)
+        surnames_column = columns.get(self._surnames) or [None] * len(column)
+        for (index, name) in enumerate(column):
+            if name:
+                surnames = list(sanitized_surnames(name))
+                surname_column[index] = surnames[0]
+                surnames_column[index] = surnames
+
+        columns[self._surname] = surname_column
+        columns[self._surnames] = surnames_column
+        return columns
 
-        return " ".join(parts)
+    def parse_surname(self: Self, name: str) -> str:
+        return parse_surname(name)
 
     def parse_surnames(self: Self, name: str) -> list[str]:
-        return list(map(self.parse_surname, re.split(" vel ", name, flags=re.IGNORECASE)))
+        return list(map(parse_surname, vel_separator.split(name)))
 
 
 class FullnameFilter(PropertiesFilter):
@@ -134,15 +330,12 @@ class FullnameFilter(PropertiesFilter):
         # - parsed main surname
         self._surname = kwargs.get("surname", "surname")
 
-        self._names_mapper = NamesFilter(None, firstname=self._firstname, names=self._names)
-        self._surname_mapper = SurnameFilter(None, surname=self._surname, surnames=self._surnames)
-
     def filter(self: Self, data: Properties) -> Properties:
         fullname = data.pop(self._name, None)
         if not fullname:
             return {}
 
-        (surnames, names) = self.parse_fullname(sanitize_name(fullname))
+        (surnames, names) = map(list, sanitized_fullname(fullname, self._surname_at_end))
 
         properties = {}
 
@@ -160,52 +353,58 @@ class FullnameFilter(PropertiesFilter):
 
         return properties
 
-    def parse_fullname_1(self: Self, fullname: str) -> Tuple[str, list[str]]:
-        names = []
+    def compile(self: Self) -> FilterStep:
+        name_key = self._name
+        names_key = self._names
+        firstname_key = self._firstname
+        surname_key = self._surname
+        surnames_key = self._surnames
+        surname_at_end = self._surname_at_end
+
+        def step(data: Properties) -> None:
+            fullname = data.pop(name_key, None)
+            if fullname:
+                (surnames, names) = map(list, sanitized_fullname(fullname, surname_at_end))
+                if len(names):
+                    data[names_key] = names
+                    data[firstname_key] = names[0]
+                if len(surnames):
+                    data[surname_key] = surnames[0]
+                    data[surnames_key] = surnames
+
+        return step
+
+    def filter_batch(self: Self, columns: Columns) -> Columns:
+        column = columns.pop(self._name, None)
+        if column is None:
+            return columns
+
+        names_column = columns.get(self._names) or [None] * len(column)
+        firstname_column = columns.get(self._firstname) or [None] * len(column)
+        surname_column = columns.get(self._surname) or [None] * len(column)
+        surnames_column = columns.get(self._surnames) or [None] * len(column)
+        for (index, fullname) in enumerate(column):
+            if fullname:
+                (surnames, names) = sanitized_fullname(fullname, self._surname_at_end)
+                if len(names):
+                    names_column[index] = list(names)
+                    firstname_column[index] = names[0]
+                if len(surnames):
+                    surname_column[index] = surnames[0]
+                    surnames_column[index] = list(surnames)
+
+        columns[self._names] = names_column
+        columns[self._firstname] = firstname_column
+        columns[self._surname] = surname_column
+        columns[self._surnames] = surnames_column
+        return columns
 
-        if self._surname_at_end:
-            # name [name...] [preposition] surname
-            match = match_surname_at_end(fullname)
-            if not match:
-                return ([], [])
-
-            names = match.string[0:match.start()]
-        else:
-            # [preposition] surname name [name...]
-            match = match_surname_at_start(fullname)
-            if not match:
-                return ([], [])
-
-            names = match.string[match.end():]
-
-        surname = capitalize_name(match.group("surname"))
-        preposition = match.group("preposition")
-        if preposition:
-            surname = preposition.casefold() + " " + surname
-
-        return (surname, self._names_mapper.parse_names(names))
+    def parse_fullname_1(self: Self, fullname: str) -> Tuple[str, list[str]]:
+        return parse_fullname_1(fullname, self._surname_at_end)
 
     # pylint: disable=C0301
     def parse_fullname(self: Self, fullname: str) -> Tuple[list[str], list[str]]:
-        parts = re.split(" vel ", fullname, flags=re.IGNORECASE)
-
-        surnames = []
-        names = []
-
-        if self._surname_at_end:
-            (s, n) = self.parse_fullname_1(parts[0])
-            surnames.append(s)
-            names.extend(n)
-            for surname in parts[1:]:
-                surnames.append(self._surname_mapper.parse_surname(surname))
-        else:
-            (s, n) = self.parse_fullname_1(parts[-1])
-            surnames.append(s)
-            names.extend(n)
-            for surname in parts[0:-1]:
-                surnames.append(self._surname_mapper.parse_surname(surname))
-
-        return (surnames, names)
+        return parse_fullname(fullname, self._surname_at_end)
 
     def parse_surname(self: Self, name: str) -> Properties:
         parts = []
@@ -227,7 +426,7 @@ class FullnameFilter(PropertiesFilter):
         }
 
     def parse_surnames(self: Self, name: str) -> Properties:
-        parts = re.split(" vel ", name, flags=re.IGNORECASE)
+        parts = vel_separator.split(name)
         surnames = []
         for surname in parts:
             surnames.append(self.parse_surname(surname)["surname"])
@@ -256,3 +455,29 @@ class FullnameBuilder(PropertiesFilter):
         return {
             self._name: " ".join(names) + " " + " vel ".join(surnames)
         } if names and len(names) and surnames and len(surnames) else {}
+
+    def compile(self: Self) -> FilterStep:
+        name_key = self._name
+        names_key = self._names
+        surnames_key = self._surnames
+
+        def step(data: Properties) -> None:
+            names = data.get(names_key)
+            surnames = data.get(surnames_key)
+            if names and surnames:
+                data[name_key] = " ".join(names) + " " + " vel ".join(surnames)
+
+        return step
+
+    def filter_batch(self: Self, columns: Columns) -> Columns:
+        names_column = columns.get(self._names)
+        surnames_column = columns.get(self._surnames)
+        if names_column is None or surnames_column is None:
+            return columns
+
+        target = columns.get(self._name) or [None] * len(names_column)
+        columns[self._name] = [
+            " ".join(names) + " " + " vel ".join(surnames) if names and surnames else current
+            for (names, surnames, current) in zip(names_column, surnames_column, target)
+        ]
+        return columns
@@ -1,7 +1,11 @@
+import pytest
 
+from . import basic
 from .mapper import \
     FilterChain, \
-    SimpleFilter
+    SimpleFilter, \
+    to_columns, \
+    to_records
 
 from .basic import \
     CreateProperty, \
@@ -79,3 +83,67 @@ def test_chain():
     print(properties)
     assert properties["fullname"] == "Jan Duda-Grach"
     assert properties["age"] == 38
+
+
+def test_compiled_chain():
+    chain = FilterChain([
+        SimpleFilter("name", rename_to="fullname", apply=[
+            Trim(),
+            Replace("\\s+", " "),
+            Replace(" *- *", "-"),
+        ]),
+        SimpleFilter("nick"),
+        IntProperty("age"),
+        FloatProperty("area"),
+        TrimProperty("city"),
+        SplitProperty("tags", to="taglist"),
+        CreateProperty("label", format="{fullname} ({age})"),
+    ])
+    compiled = chain.compile()
+
+    for data in [
+        {"name": " Jan \t Duda -Grach \n", "nick": "JD", "age": "38", "area": "1.5",
+         "city": " Kraków ", "tags": "a b"},
+        {"name": "Anna", "age": "", "area": None, "city": "", "tags": ""},
+    ]:
+        assert compiled(dict(data)) == chain.filter(dict(data))
+
+
+@pytest.mark.parametrize("with_numpy", [True, False])
+def test_filter_batch(monkeypatch, with_numpy):
+    if not with_numpy:
+        monkeypatch.setattr(basic, "numpy", None)
+
+    chain = FilterChain([
+        SimpleFilter("name", rename_to="fullname", apply=[Trim(), Replace("\\s+", " ")]),
+        IntProperty("age"),
+        FloatProperty("area"),
+        TrimProperty("city"),
+        SplitProperty("tags", to="taglist"),
+        CreateProperty("label", format="{fullname} ({age})"),
+    ])
+    records = [
+        {"name": " Jan \t Duda ", "age": "38", "area": "1.5", "city": " Kraków ", "tags": "a b"},
+        {"name": "Anna", "age": "", "city": "", "tags": ""},
+        {"name": "Ewa", "age": 41, "area": "2"},
+    ]
+
+    batch = to_records(chain.filter_batch(to_columns([dict(r) for r in records])))
+    assert batch == [chain.compile()(dict(r)) for r in records]
+    assert batch[2]["age"] == 41 and isinstance(batch[0]["area"], float)
+
+
+def test_default_filter_batch_matches_filter():
+    # CreateProperty has no column-wise implementation
+    filter = CreateProperty("label", format="{name}!")
+    records = [{"name": "Jan", "age": 38, "note": None}, {"name": "Anna", "age": None}]
+
+    columns = filter.filter_batch(to_columns([dict(r) for r in records]))
+    # Column of None values only is not dropped
+    assert list(columns) == ["name", "age", "note", "label"]
+    # Same as filter(), except properties of None values which batches leave out
+    assert to_records(columns) == [
+        {key: value for (key, value) in (r | filter.filter(dict(r))).items() if value is not None}
+        for r in records
+    ]
+    assert to_records(columns)[1] == {"name": "Anna", "label": "Anna!"}
@@ -1,8 +1,13 @@
+import copy
+import re
 from unittest import TestCase
 import pytest
 
+from datetime import date
+
 from .dates import DateFilter
-from .mapper import FilterChain
+from .mapper import FilterChain, to_columns, to_records
+from ..dates import DateParser, parse_date
 
 
 @pytest.fixture
@@ -43,3 +48,81 @@ def test_date_filter(samples):
 
     for sample in samples:
         TestCase().assertDictEqual(sample["out"], filter.filter(sample["in"]))
+
+
+def test_compiled_date_filter(samples):
+    filter = FilterChain([
+        DateFilter("dateField", name="date"),
+        DateFilter("Data", name="date")
+    ])
+    compiled = filter.compile()
+
+    for sample in samples + [{"in": {"Data": "not a date"}}]:
+        TestCase().assertDictEqual(
+            filter.filter(copy.deepcopy(sample["in"])),
+            compiled(copy.deepcopy(sample["in"]))
+        )
+
+
+def test_date_filter_batch(samples):
+    filter = FilterChain([
+        DateFilter("dateField", name="date"),
+        DateFilter("Data", name="date")
+    ])
+    records = [sample["in"] for sample in samples] + [{"Data": "not a date"}] * 2
+
+    TestCase().assertListEqual(
+        [filter.compile()(record) for record in copy.deepcopy(records)],
+        to_records(filter.filter_batch(to_columns(copy.deepcopy(records))))
+    )
+
+
+def test_parse_date():
+    assert parse_date("1991-01-23") == date(1991, 1, 23)
+    assert parse_date("23-01-1991") == date(1991, 1, 23)
+    assert parse_date("23.01.1991") == date(1991, 1, 23)
+    assert parse_date("23/01/1991") == date(1991, 1, 23)
+    # Shapes not handled by slicing
+    assert parse_date("3-1-1991") == date(1991, 1, 3)
+    assert parse_date("1991-01-23T12:00") == date(1991, 1, 23)
+    # Invalid dates
+    assert parse_date("31-02-1991") is None
+    assert parse_date("23-O1-1991") is None
+
+
+def test_date_formats():
+    parser = DateParser(["%d.%m.%Y"], iso_fallback=False)
+    assert parser.parse("23.01.1991") == date(1991, 1, 23)
+    assert parser.parse("1991-01-23") is None
+
+    # Formats are tried in configured order, fixed width ones are not preferred
+    parser = DateParser(["%m/%d/%Y", "%d/%m/%Y"], iso_fallback=False)
+    assert parser.parse("01/02/1991") == date(1991, 1, 2)
+    assert parser.parse("23/01/1991") == date(1991, 1, 23)
+    parser = DateParser(["%d/%m/%Y", "%m/%d/%Y"], iso_fallback=False)
+    assert parser.parse("01/02/1991") == date(1991, 2, 1)
+    assert parser.parse("01/23/1991") == date(1991, 1, 23)
+
+    filter = DateFilter("Data", name="date", formats=["%Y/%m/%d"])
+    assert filter.filter({"Data": "1991/01/23"}) == {"date": "1991-01-23"}
+    assert filter.filter({"Data": "23-01-1991"}) == {"date": "23-01-1991"}
+
+
+def legacy_sanitize_date(date_string):
+    return re.sub(" *- *", "-", date_string).strip()
+
+
+@pytest.mark.parametrize("date_string", [
+    "",
+    " ",
+    "23-01-1991",
+    " 23 - 01 - 1991 ",
+    "\t23 - 01 - 1991\n",
+    "23\t- 01 -\t1991",
+    "23 -  - 1991",
+    "-1991-",
+    " - 1991 - ",
+    "1991\u00a0",
+])
+def test_sanitize_date_as_legacy(date_string):
+    assert DateFilter.sanitize_date(date_string) == legacy_sanitize_date(date_string)
@@ -1,8 +1,21 @@
+import copy
+import re
 from unittest import TestCase
 import pytest
 
-from .mapper import FilterChain
-from .names import FullnameBuilder, FullnameFilter, match_surname_at_end, match_surname_at_start
+from .mapper import FilterChain, to_columns, to_records
+from .names import \
+    FullnameBuilder, \
+    FullnameFilter, \
+    cache_info, \
+    clear_cache, \
+    match_surname_at_end, \
+    match_surname_at_start, \
+    sanitize_name, \
+    sanitized_names, \
+    sanitized_surnames, \
+    set_cache_size, \
+    vel_separator
 
 
 @pytest.fixture
@@ -64,6 +77,73 @@ def test_fullname_filter(samples):
         TestCase().assertDictEqual(sample["out"], filter.filter(sample["in"]))
 
 
+def test_compiled_fullname_filter(samples):
+    filter = FilterChain([
+        FullnameFilter("name", surname_at_end=True),
+        FullnameBuilder("fullname")
+    ])
+    compiled = filter.compile()
+
+    for sample in samples:
+        TestCase().assertDictEqual(
+            filter.filter(copy.deepcopy(sample["in"])),
+            compiled(copy.deepcopy(sample["in"]))
+        )
+
+
+def test_fullname_filter_batch(samples):
+    filter = FilterChain([
+        FullnameFilter("name", surname_at_end=True),
+        FullnameBuilder("fullname")
+    ])
+    records = [sample["in"] for sample in samples] * 2
+
+    batch = to_records(filter.filter_batch(to_columns(copy.deepcopy(records))))
+    TestCase().assertListEqual(
+        [filter.compile()(record) for record in copy.deepcopy(records)],
+        batch
+    )
+    # Rows of the same name do not share lists
+    assert batch[0]["names"] is not batch[len(samples)]["names"]
+
+
+def test_name_cache():
+    filter = FullnameFilter("name")
+    clear_cache()
+
+    first = filter.filter({"name": "jan  KOWALSKI"})
+    first["names"].append("Modified")
+    second = filter.filter({"name": "jan  KOWALSKI"})
+
+    assert second["names"] == ["Jan"]
+    assert cache_info()["sanitized_fullname"].hits == 1
+    assert cache_info()["sanitized_fullname"].misses == 1
+
+    try:
+        set_cache_size(0)
+        filter.filter({"name": "jan  KOWALSKI"})
+        assert cache_info()["sanitized_fullname"].hits == 0
+        assert cache_info()["sanitized_fullname"].currsize == 0
+    finally:
+        set_cache_size(4096)
+
+
+def test_imported_cache_resized():
+    # Function imported before resize uses the resized cache
+    try:
+        set_cache_size(0)
+        sanitized_names("jan  maria")
+        assert sanitized_names("jan  maria") == ("Jan", "Maria")
+        assert sanitized_names.cache_info().currsize == 0
+        assert cache_info()["sanitized_names"].misses == 2
+    finally:
+        set_cache_size(4096)
+
+    sanitized_names("jan  maria")
+    assert sanitized_names("jan  maria") == ("Jan", "Maria")
+    assert sanitized_names.cache_info().hits == 1
+
+
 def test_match_surname_at_start():
     match = match_surname_at_start("Sur-Name FirstName SecondName")
     assert match
@@ -80,3 +160,42 @@ def test_match_surname_at_end():
     assert match.group("preposition") == "van de"
     assert match.group("fullsurname") == "van de Sur-Name"
     assert match.string[0:match.start()].split() == ["FirstName", "SecondName"]
+
+
+def legacy_sanitize_name(name):
+    return re.sub(" *- *", "-", re.sub("\\s+", " ", name)).strip()
+
+
+@pytest.mark.parametrize("name", [
+    "",
+    " ",
+    "jan kowalski",
+    " jan\t\n kowalski\r\n",
+    "jan\u00a0\u2003kowalski",
+    "jan \t kowalska - \t nowak",
+    "-jan kowalski-",
+    " - jan - ",
+    "\t-\t",
+    "a - - b",
+    "kowalska--nowak",
+    "jan vel  kot",
+    "JAN\tVEL\nKOT",
+])
+def test_sanitize_name_as_legacy(name):
+    assert sanitize_name(name) == legacy_sanitize_name(name)
+
+
+@pytest.mark.parametrize("name", [
+    "jan kowalski vel kot",
+    "jan  kowalski VEL\tkot - nowak",
+    "jan kowalski Vel kot vel mysz",
+    "jan velasquez",
+    "jan kowalski vel",
+])
+def test_vel_separator_as_legacy(name):
+    name = sanitize_name(name)
+    assert vel_separator.split(name) == re.split(" vel ", name, flags=re.IGNORECASE)
+
+
+def test_sanitized_surnames():
+    assert sanitized_surnames("kowalski\tVEL  kot -nowak") == ("Kowalski", "Kot-Nowak")
@@ -1,13 +1,21 @@
 import argparse
+import collections
+import concurrent.futures
+import itertools
 import json
+import os
+import pickle
 import sys
+import time
 import tomllib
 
-from typing import Any
+from collections.abc import Iterable, Iterator
+from typing import Any, TextIO
 
+from meshtools.jsonstream import JsonStream
 from meshtools.mapping.basic import CreateProperty, IntProperty
 from meshtools.mapping.dates import DateFilter
-from meshtools.mapping.mapper import PropertiesFilter, FilterChain
+from meshtools.mapping.mapper import FilterStep, PropertiesFilter, FilterChain
 from meshtools.mapping.names import \
     FullnameBuilder, \
     FullnameFilter, \
@@ -48,6 +56,34 @@ def filterjson() -> None:
         action="store_true",
         help="should input be retained"
     )
+    parser.add_argument(
+        "-l", "--jsonl",
+        dest="jsonl",
+        action="store_true",
+        help="read and write JSON Lines (one record per line)"
+    )
+    parser.add_argument(
+        "-w", "--workers",
+        dest="workers",
+        action="store",
+        type=int,
+        default=1,
+        help="number of processes to filter records with (0 for number of CPUs), defaults to 1"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        dest="chunk_size",
+        action="store",
+        type=int,
+        default=500,
+        help="number of records sent to worker process at once, defaults to 500"
+    )
+    parser.add_argument(
+        "-u", "--unordered",
+        dest="unordered",
+        action="store_true",
+        help="with workers write records as they are ready, not in input order"
+    )
 
     args = parser.parse_args()
 
@@ -64,34 +100,135 @@ def filterjson() -> None:
         filters_from_cmdline(args.filters)
     )
 
-    input_file = sys.stdin
+    workers = args.workers if args.workers > 0 else os.cpu_count()
+    if workers > 1:
+        try:
+            pickle.dumps(filter)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            parser.error(f"filters cannot be sent to worker processes: {e}")
+
+    input_file = sys.stdin.buffer
     output_file = sys.stdout
 
     try:
-        input_file = open(args.input_file, encoding="utf-8") \
-            if args.input_file else sys.stdin
-
-        # Load input
-        data = json.loads(input_file.read())
+        input_file = open(args.input_file, mode="rb") \
+            if args.input_file else sys.stdin.buffer
 
-        output = filter.filter(data) if isinstance(data, dict) \
-            else [filter.filter(e) for e in data]
+        # Records are read, filtered and written one by one
+        records = JsonStream(input_file, "lines" if args.jsonl else "auto")
+        output = map(filter.compile(), records) if workers <= 1 \
+            else filter_parallel(filter, records, workers, args.chunk_size, not args.unordered)
 
         try:
             output_file = open(args.output_file, encoding="utf-8", mode="w") \
                 if args.output_file else sys.stdout
 
-            output_file.write(json.dumps(output, indent=2, ensure_ascii=False))
-            output_file.write("\n")
+            if args.jsonl:
+                write_json_lines(output_file, output)
+            elif records.is_array:
+                write_json_array(output_file, output)
+            else:
+                write_json_values(output_file, output)
         finally:
             if output_file is not sys.stdout:
                 output_file.close()
 
     finally:
-        if input_file is not sys.stdin:
+        if input_file is not sys.stdin.buffer:
             input_file.close()
 
 
+def filter_parallel(
+    filter: PropertiesFilter,
+    records: Iterable[Any],
+    workers: int,
+    chunk_size: int = 500,
+    ordered: bool = True
+) -> Iterator[Any]:
+    """
+    Filter records in a pool of processes, records are sent in chunks.
+    At most two chunks per worker are in flight, so memory stays bounded
+    no matter how long the input is.
+    """
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(filter,)
+    ) as executor:
+        chunks = itertools.batched(records, chunk_size)
+        pending = collections.deque()
+
+        for chunk in itertools.islice(chunks, 2 * workers):
+            pending.append(executor.submit(_filter_chunk, chunk))
+
+        while pending:
+            if ordered:
+                done = pending.popleft()
+            else:
+                done = next(concurrent.futures.as_completed(pending))
+                pending.remove(done)
+
+            for chunk in itertools.islice(chunks, 1):
+                pending.append(executor.submit(_filter_chunk, chunk))
+
+            yield from done.result()
+
+
+_worker_filter: FilterStep = None
+
+
+def _init_worker(filter: PropertiesFilter) -> None:
+    # Compiled filters cannot be pickled, so compile in worker
+    global _worker_filter
+    _worker_filter = filter.compile()
+
+
+def _filter_chunk(chunk: tuple[Any, ...]) -> list[Any]:
+    return list(map(_worker_filter, chunk))
+
+
+# Output is flushed at most once per interval, not after every record
+FLUSH_INTERVAL = 1.0
+
+
+def flushing(output_file: TextIO, records: Iterable[Any]) -> Iterator[Any]:
+    """
+    Pass records through, flush output_file after the first one (so output
+    appears right away) and then when interval passed since last flush
+    """
+    last = None
+    for record in records:
+        yield record
+        now = time.monotonic()
+        if last is None or now - last >= FLUSH_INTERVAL:
+            output_file.flush()
+            last = now
+    output_file.flush()
+
+
+def write_json_lines(output_file: TextIO, records: Iterable[Any]) -> None:
+    for record in flushing(output_file, records):
+        output_file.write(json.dumps(record, ensure_ascii=False))
+        output_file.write("\n")
+
+
+def write_json_array(output_file: TextIO, records: Iterable[Any]) -> None:
+    """Write records as if whole array was dumped with indent=2"""
+    separator = "[\n  "
+    for record in flushing(output_file, records):
+        output_file.write(separator)
+        output_file.write(json.dumps(record, indent=2, ensure_ascii=False).replace("\n", "\n  "))
+        separator = ",\n  "
+
+    output_file.write("[]\n" if separator.startswith("[") else "\n]\n")
+
+
+def write_json_values(output_file: TextIO, records: Iterable[Any]) -> None:
+    for record in flushing(output_file, records):
+        output_file.write(json.dumps(record, indent=2, ensure_ascii=False))
+        output_file.write("\n")
+
+
 def filters_from_config(config: dict[str, Any]) -> list[PropertiesFilter]:
     mappers = []
 
@@ -0,0 +1,109 @@
+import io
+import json
+import sys
+
+import pytest
+
+from meshtools.mapping.basic import CreateProperty
+from meshtools.mapping.mapper import FilterChain, PropertiesFilter
+from . import filter_parallel, filterjson, flushing, write_json_array, write_json_lines
+
+RECORDS = [{"name": f"Jan {i}", "age": i} for i in range(50)]
+
+
+def expected():
+    step = FilterChain([CreateProperty("label", format="{name} ({age})")]).compile()
+    return [step(dict(record)) for record in RECORDS]
+
+
+def test_filter_parallel_ordered():
+    filter = FilterChain([CreateProperty("label", format="{name} ({age})")])
+    output = filter_parallel(filter, [dict(r) for r in RECORDS], workers=2, chunk_size=7)
+    assert list(output) == expected()
+
+
+def test_filter_parallel_unordered():
+    filter = FilterChain([CreateProperty("label", format="{name} ({age})")])
+    output = list(filter_parallel(
+        filter, [dict(r) for r in RECORDS], workers=2, chunk_size=7, ordered=False
+    ))
+    assert sorted(output, key=lambda r: r["age"]) == expected()
+
+
+class LambdaFilter(PropertiesFilter):
+    """Filter which cannot be pickled"""
+
+    def __init__(self, function):
+        self._function = function
+
+    def filter(self, data):
+        return self._function(data)
+
+
+def test_unpicklable_filter(tmp_path, monkeypatch, capsys):
+    input = tmp_path / "input.json"
+    input.write_text("[]", encoding="UTF8")
+    monkeypatch.setattr(
+        sys.modules[filterjson.__module__], "filters_from_cmdline",
+        lambda filters: [LambdaFilter(lambda data: {})]
+    )
+    monkeypatch.setattr(sys, "argv", ["filterjson", "-i", str(input), "-w", "2"])
+
+    with pytest.raises(SystemExit) as exit:
+        filterjson()
+    assert exit.value.code == 2
+    assert "filters cannot be sent to worker processes" in capsys.readouterr().err
+
+
+def test_write_json_array():
+    output = io.StringIO()
+    write_json_array(output, [])
+    assert output.getvalue() == "[]\n"
+
+    output = io.StringIO()
+    write_json_array(output, [{"name": "Jan"}])
+    assert output.getvalue() == json.dumps([{"name": "Jan"}], indent=2) + "\n"
+
+    output = io.StringIO()
+    write_json_array(output, RECORDS[:3])
+    assert output.getvalue() == json.dumps(RECORDS[:3], indent=2) + "\n"
+
+
+def test_write_json_lines():
+    output = io.StringIO()
+    write_json_lines(output, [{"name": "Łukasz"}, [1, 2]])
+    assert output.getvalue() == '{"name": "Łukasz"}\n[1, 2]\n'
+
+
+class CountingOutput(io.StringIO):
+    flushes = 0
+
+    def flush(self):
+        self.flushes += 1
+
+
+def test_flushing(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(sys.modules[flushing.__module__].time, "monotonic", lambda: now[0])
+    output = CountingOutput()
+
+    for (index, _) in enumerate(flushing(output, range(10))):
+        now[0] = index * 0.5
+    # The first record, every second one after it and once at the end
+    assert output.flushes == 6
+
+
+def test_first_record_flushed(monkeypatch):
+    monkeypatch.setattr(sys.modules[flushing.__module__].time, "monotonic", lambda: 0.0)
+    output = CountingOutput()
+
+    flushes = []
+
+    def record(index):
+        # Called when the next record is needed
+        flushes.append(output.flushes)
+        return {"index": index}
+
+    write_json_lines(output, (record(index) for index in range(3)))
+    # Nothing before the first record, it is flushed before the second one is read
+    assert flushes == [0, 1, 1]
@@ -1,22 +1,41 @@
 import argparse
+import asyncio
+import itertools
 import json
 import os
+import shlex
 import shutil
-
-from neo4j import GraphDatabase
-from typing import Any, Self
-
-from meshtools.construct.engine import Contains, LinkedObject, ObjectId, ObjectKeys, DataEngine
+import sys
+import time
+
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from neo4j import AsyncGraphDatabase, GraphDatabase
+from typing import Any, Self, TextIO
+
+from meshtools.construct.engine import \
+    AsyncDataEngine, Contains, DataEngine, LinkedObject, ObjectId, ObjectKeys
+from meshtools.construct.dedup import BlockingIndex
+from meshtools.construct.memory import InMemoryStorage
+from meshtools.construct.metrics import Metrics
+from meshtools.jsonstream import JsonStream
+from .async_merger import AsyncMerger
+from .checkpoint import Checkpoint
+from .export import admin_command, FileExportStorage
 from .merger import Merger
+from .schema import ensure_schema, SchemaItem
+from .script import first_line, load_sections, Section
 
 
 def cypher_run() -> None:
     parser = argparse.ArgumentParser(description="Run cypher script")
     parser.add_argument(
         "-f", "--file",
-        dest="file",
+        dest="files",
         action="store",
-        help="Cypher script file"
+        nargs="+",
+        help="Cypher script file(s), run in given order"
     )
     parser.add_argument(
         "-a", "--uri",
@@ -44,23 +63,94 @@ def cypher_run() -> None:
         action="store",
         help="database to connect to"
     )
+    parser.add_argument(
+        "-b", "--batch",
+        dest="batch_size",
+        action="store",
+        type=int,
+        default=0,
+        help="run given number of statements per transaction, defaults to 0 (autocommit)"
+    )
+    parser.add_argument(
+        "--parallel",
+        dest="parallel",
+        action="store",
+        type=int,
+        default=1,
+        help="""
+            run files and their sections (separated with // --- lines) as independent
+            on given number of sessions, defaults to 1
+        """
+    )
+    parser.add_argument(
+        "--metrics-file",
+        dest="metrics_file",
+        action="store",
+        help="write operation counts and timings to given JSON file"
+    )
 
     args = parser.parse_args()
 
-    def is_valid(stmt: str) -> bool:
-        for line in [line.strip().lower() for line in stmt.splitlines()]:
-            if line and not line.startswith("//") \
-                    and ("create" in line or "match" in line or "merge" in line):
-                return True
-        return False
+    sections = [
+        section
+        for path in args.files
+        for section in load_sections(path, split=args.parallel > 1)
+    ]
 
     with GraphDatabase.driver(args.uri, auth=(args.username, args.password)) as driver:
-        with driver.session(database=args.database) as session:
-            with open(args.file, encoding="UTF8") as file:
-                print("File:", args.file)
-                for stmt in file.read().split(";"):
-                    if is_valid(stmt):
-                        print(session.run(stmt).consume().counters)
+
+        def run_section(section: Section) -> Section:
+            with driver.session(database=args.database) as session:
+                return section.run(session, args.batch_size)
+
+        if args.parallel > 1:
+            with ThreadPoolExecutor(args.parallel) as executor:
+                for section in executor.map(run_section, sections):
+                    print_section(section)
+        else:
+            for section in sections:
+                print_section(run_section(section))
+                # Following scripts may depend on the failed one
+                if section.error:
+                    break
+
+    print_total(sections, args.metrics_file)
+
+    failed = [section.name for section in sections if section.error]
+    if failed:
+        parser.exit(1, f"Failed: {', '.join(failed)}\n")
+
+
+def print_section(section: Section) -> None:
+    print("File:", section.name)
+    for (stmt, elapsed, counters) in section.timings:
+        print(f"  {elapsed * 1000:9.1f} ms  {first_line(stmt)[:60]}")
+        if counters and counters.contains_updates:
+            print(" " * 15, counters)
+    if section.error:
+        print("  Error:", section.error)
+
+
+def print_total(sections: list[Section], metrics_file: str | None) -> None:
+    total = Counter[str]()
+    metrics = Metrics()
+    for section in sections:
+        total.update(section.counters)
+        metrics.update(section.metrics)
+
+    print("Total:")
+    for (key, value) in sorted(total.items()):
+        if value:
+            print(f"  {key}: {value}")
+
+    report_metrics(metrics, metrics_file)
+
+
+def report_metrics(metrics: Metrics, path: str | None) -> None:
+    print()
+    print(metrics.summary())
+    if path:
+        metrics.save(path)
 
 
 def import_data() -> None:
@@ -132,27 +222,205 @@ def import_data() -> None:
         action="store",
         help="database to connect to"
     )
+    parser.add_argument(
+        "-b", "--batch-size",
+        dest="batch_size",
+        action="store",
+        type=int,
+        default=0,
+        help="write in UNWIND batches of given size, defaults to 0 (no batching)"
+    )
+    parser.add_argument(
+        "--flush-interval",
+        dest="flush_interval",
+        action="store",
+        type=float,
+        help="max number of seconds buffered batch may wait before it is written"
+    )
+
+    parser.add_argument(
+        "--cache-size",
+        dest="cache_size",
+        action="store",
+        type=int,
+        default=10000,
+        help="number of matched/upserted objects to remember (0 to disable), defaults to 10000"
+    )
+    parser.add_argument(
+        "--concurrency",
+        dest="concurrency",
+        action="store",
+        type=int,
+        default=1,
+        help="""
+            number of concurrent transactions in elections imports into the database,
+            defaults to 1; every operation is written in its own transaction (no
+            --batch-size, --flush-interval, --checkpoint or --resume) and server
+            timings are not measured
+        """
+    )
+    parser.add_argument(
+        "--skip-schema",
+        dest="skip_schema",
+        action="store_true",
+        help="do not create missing indexes and constraints before import"
+    )
+    parser.add_argument(
+        "--checkpoint",
+        dest="checkpoint",
+        action="store_true",
+        help="save progress of elections import (<path>.checkpoint), so it can be resumed"
+    )
+    parser.add_argument(
+        "--resume",
+        dest="resume",
+        action="store_true",
+        help="continue elections import run with --checkpoint from its checkpoint"
+    )
+    parser.add_argument(
+        "--metrics-file",
+        dest="metrics_file",
+        action="store",
+        help="write operation counts and timings to given JSON file"
+    )
+    parser.add_argument(
+        "-n", "--dry-run",
+        dest="dry_run",
+        action="store_true",
+        help="import into memory instead of the database"
+    )
+    parser.add_argument(
+        "--export-dir",
+        dest="export_dir",
+        action="store",
+        help="""
+            write CSV files for neo4j-admin database import (initial load of empty
+            database) into given directory instead of importing into the database
+        """
+    )
 
     args = parser.parse_args()
+    check_import_args(parser, args)
+
+    metrics = Metrics()
+
+    if args.export_dir:
+        storage = FileExportStorage()
+        run_import(DataEngine(storage, args.cache_size, metrics), args)
+        (node_files, relationship_files) = storage.export(args.export_dir)
+        print(f"Exported {len(storage.objects)} objects, {storage.relation_count} relations")
+        print("Import into empty database with:")
+        print(" ", shlex.join(
+            admin_command(node_files, relationship_files, args.database or "neo4j")
+        ))
+        report_metrics(metrics, args.metrics_file)
+        return
+
+    if args.dry_run:
+        storage = InMemoryStorage()
+        run_import(DataEngine(storage, args.cache_size, metrics), args)
+        print(f"Dry run: {len(storage.objects)} objects, {storage.relation_count} relations")
+        report_metrics(metrics, args.metrics_file)
+        return
+
+    if not args.skip_schema:
+        with GraphDatabase.driver(args.uri, auth=(args.username, args.password)) as driver:
+            with driver.session(database=args.database) as session:
+                print_schema_report(ensure_schema(session))
+
+    if concurrent(args):
+        asyncio.run(run_import_async(args, metrics))
+        report_metrics(metrics, args.metrics_file)
+        return
 
     with GraphDatabase.driver(args.uri, auth=(args.username, args.password)) as driver:
         with driver.session(database=args.database) as session:
-
-            engine = DataEngine(Merger(session))
-
-            match args.what:
-                case "term":
-                    import_chamber_term(
-                        engine,
-                        args.path,
-                        chamber_name=args.chamber_name
-                    )
-                case "parlimentary-elections":
-                    import_elections(engine, args.path, elections_name=args.elections_name)
-                case "local-elections":
-                    import_elections(engine, args.path, elections_name=args.elections_name)
-                case "eu-elections":
-                    import_elections(engine, args.path, elections_name=args.elections_name)
+            run_import(
+                DataEngine(
+                    Merger(session, args.batch_size, args.flush_interval, metrics),
+                    args.cache_size,
+                    metrics
+                ),
+                args
+            )
+
+    report_metrics(metrics, args.metrics_file)
+
+
+def check_import_args(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """Reject options which do not work together, before anything is written"""
+    if (args.checkpoint or args.resume) and (
+        args.dry_run or args.export_dir or args.concurrency > 1 or args.what == "term"
+    ):
+        parser.error(
+            "--checkpoint and --resume work only with sequential elections imports into database"
+        )
+
+    # Asynchronous import writes every operation in its own transaction
+    if concurrent(args) and (args.batch_size or args.flush_interval is not None):
+        parser.error("--batch-size and --flush-interval do not work with --concurrency")
+
+    if args.resume:
+        try:
+            Checkpoint(args.path).load()
+        except ValueError as e:
+            parser.error(f"cannot resume: {e}")
+
+
+def concurrent(args: argparse.Namespace) -> bool:
+    """Whether elections are imported into the database with AsyncDataEngine"""
+    return args.concurrency > 1 and args.what != "term" and not (args.dry_run or args.export_dir)
+
+
+def run_import(engine: DataEngine, args: argparse.Namespace) -> None:
+    match args.what:
+        case "term":
+            import_chamber_term(
+                engine,
+                args.path,
+                chamber_name=args.chamber_name
+            )
+        case "parlimentary-elections" | "local-elections" | "eu-elections":
+            import_elections(
+                engine,
+                args.path,
+                elections_name=args.elections_name,
+                batch_size=args.batch_size,
+                checkpoint=Checkpoint(args.path) if args.checkpoint or args.resume else None,
+                resume=args.resume
+            )
+
+    engine.flush()
+
+    if engine.cache is not None:
+        print(
+            f"Identity cache: {engine.cache.hits} hits, {engine.cache.misses} misses",
+            f"({engine.cache.hit_rate:.0%})"
+        )
+
+
+async def run_import_async(args: argparse.Namespace, metrics: Metrics | None = None) -> None:
+    if args.metrics_file:
+        print("Concurrent import: server timings are not measured")
+
+    async with AsyncGraphDatabase.driver(args.uri, auth=(args.username, args.password)) as driver:
+        engine = AsyncDataEngine(
+            AsyncMerger(driver, args.database, args.concurrency),
+            args.cache_size,
+            metrics
+        )
+        await import_elections_async(
+            engine,
+            args.path,
+            elections_name=args.elections_name,
+            concurrency=args.concurrency
+        )
+
+    if engine.cache is not None:
+        print(
+            f"Identity cache: {engine.cache.hits} hits, {engine.cache.misses} misses",
+            f"({engine.cache.hit_rate:.0%})"
+        )
 
 
 def import_chamber_term(engine: DataEngine, directory: str, **kwargs: str) -> None:
@@ -168,8 +436,8 @@ def import_chamber_term(engine: DataEngine, directory: str, **kwargs: str) -> No
             engine.join(engine.upsert("Chamber", chamber_name, {}), term_id)
 
     # Load parliment groups
-    with open(os.path.join(directory, "clubs.json"), "r", encoding="UTF8") as file:
-        for group in json.loads(file.read()):
+    with open(os.path.join(directory, "clubs.json"), "rb") as file:
+        for group in JsonStream(file):
             group_name = group.get("name")
             if group_name != "niez.":
                 group_id = engine.insert("ParlimentaryGroup", group_name, group)
@@ -177,8 +445,8 @@ def import_chamber_term(engine: DataEngine, directory: str, **kwargs: str) -> No
                 engine.join(term_id, group_id)
 
     # Load people file
-    with open(os.path.join(directory, "mp.json"), "r", encoding="UTF8") as file:
-        for person in json.loads(file.read()):
+    with open(os.path.join(directory, "mp.json"), "rb") as file:
+        for person in JsonStream(file):
             group_name = person.pop("parlimentaryGroup", "niez.")
             person_id = engine.upsert("Person", person.get("name"), person)
             print("  ->", person_id)
@@ -189,71 +457,272 @@ def import_chamber_term(engine: DataEngine, directory: str, **kwargs: str) -> No
                 engine.join(group_id, person_id)
 
 
-def import_elections(engine: DataEngine, path: str, **kwargs: str) -> None:
+def import_elections(engine: DataEngine, path: str, **kwargs: Any) -> None:
 
     elections_name = kwargs.get("elections_name")
+    # Persons are inserted in chunks of batch_size
+    batch_size = max(kwargs.get("batch_size") or 1, 1)
+    # With checkpoint persons and committees are written with keys of the
+    # import (hash of the file and position of the record), so that those
+    # committed after the checkpoint was saved are matched when resumed,
+    # not inserted again
+    checkpoint: Checkpoint | None = kwargs.get("checkpoint")
+    resume = bool(checkpoint and kwargs.get("resume"))
+
+    (offset, state) = checkpoint.load() if resume else (0, {})
+    keys = {"@import": checkpoint.digest} if checkpoint else {}
 
     # Load candidates  (temp)
-    with open(path, "r", encoding="UTF8") as file:
+    with open(path, "rb") as file:
 
         # merge elections record
         elections_id = engine.upsert("Elections", elections_name)
-        committee_lookup = dict[str, ObjectId]()
+        # Committees inserted before resumed checkpoint are not inserted again
+        committee_lookup = {
+            name: ObjectId("ElectoralCommittee", id)
+            for (name, id) in state.get("committees", {}).items()
+        }
 
-        def merge_electoral_committee(elections_id: str, electoral_committee):
+        def merge_electoral_committee(electoral_committee: str) -> ObjectId:
             electoral_committee_id = committee_lookup.get(electoral_committee)
             if not electoral_committee_id:
                 # electoral_committee_id = engine.join(elections_id, "ElectoralCommittee", electoral_committee)
-                electoral_committee_id = engine.insert("ElectoralCommittee", electoral_committee)
-                engine.join(elections_id, electoral_committee_id)
+                electoral_committee_id = insert_electoral_committee(
+                    engine, elections_id, electoral_committee, keys, resume
+                )
                 committee_lookup[electoral_committee] = electoral_committee_id
 
             return electoral_committee_id
 
-        # print("\033[?25l", end="")
-        # print("\033[?25h", end="")
-        progress = ProgressBar(len(json.load(file)), prefix=f"{elections_name} ({file.name[-30:]:.>32})")
-
-        file.seek(0)
-        for person in json.load(file):
-            progress.move()
+        def save_checkpoint(position: int) -> None:
+            # Everything before position has to be committed first
+            engine.flush()
+            checkpoint.save(
+                position,
+                {"committees": {name: id.id for (name, id) in committee_lookup.items()}}
+            )
 
-            parties = person.pop("@parties", [])
-            electoral_committee = person.pop("@electoralCommittee", None)
-            assembly = person.pop("@assembly", None)
-            council = person.pop("@council", None)
-            office = person.pop("@office", None)
+        # Records after resumed checkpoint may have been committed already
+        replaying = resume
 
-            person_id = engine.insert("Person", person.get("name"), person)
-
-            for party in parties:
-                party_id = engine.match(Contains("Party", "names", party))
-                if not party_id:
-                    party_id = engine.upsert("Party", party, {"names": [party]})
+        # print("\033[?25l", end="")
+        # print("\033[?25h", end="")
+        # Progress is measured in bytes read
+        progress = ProgressBar(
+            os.fstat(file.fileno()).st_size,
+            prefix=f"{elections_name} ({file.name[-30:]:.>32})",
+            initial=offset
+        )
+
+        candidates = JsonStream(file, offset=offset)
+        # Time spent reading and parsing input
+        records = engine.metrics.iterate("read", candidates) if engine.metrics else candidates
+        # Position of the record is known right after it is read
+        if checkpoint:
+            records = (record | keys | {"@offset": candidates.position} for record in records)
+
+        for persons in itertools.batched(records, batch_size):
+
+            links = [
+                (
+                    person.pop("@parties", []),
+                    person.pop("@electoralCommittee", None),
+                    person.pop("@assembly", None),
+                    person.pop("@council", None),
+                    person.pop("@office", None),
+                )
+                for person in persons
+            ]
+
+            (person_ids, replaying) = insert_persons(engine, persons, keys, replaying)
+
+            for (person_id, person_links) in zip(person_ids, links):
+                import_candidate_links(engine, person_id, *person_links, merge_electoral_committee)
+
+            # Saved when due only, resumed import matches what was committed since
+            if checkpoint and checkpoint.due():
+                save_checkpoint(candidates.position)
+
+            progress.move(candidates.position - progress.step)
+
+        engine.flush()
+        if checkpoint:
+            save_checkpoint(candidates.position)
+
+        # Whatever follows last candidate
+        if progress.step < progress.total:
+            progress.move(progress.total - progress.step)
+
+
+def insert_electoral_committee(
+    engine: DataEngine, elections_id: ObjectId, name: str, keys: dict[str, Any], resume: bool
+) -> ObjectId:
+    """Insert committee of elections, unless resumed import committed it already"""
+    id = engine.match(ObjectKeys("ElectoralCommittee", keys | {"name": name})) if resume else None
+    if not id:
+        id = engine.insert("ElectoralCommittee", name, keys)
+        engine.join(elections_id, id)
+    return id
+
+
+def insert_persons(
+    engine: DataEngine, persons: tuple[dict[str, Any], ...], keys: dict[str, Any], replaying: bool
+) -> tuple[list[ObjectId], bool]:
+    """
+    Insert persons, when replaying resumed import those committed already
+    are matched by keys and @offset instead. Return ids of persons and
+    whether next persons may be committed already.
+    """
+    ids = []
+    for person in persons if replaying else ():
+        id = engine.match(ObjectKeys("Person", keys | {"@offset": person["@offset"]}))
+        if not id:
+            break
+        ids.append(id)
+
+    # Chunks are committed in order, nothing after the first missing person is
+    matched = len(ids)
+    ids += engine.insert_many(
+        "Person", [(person.get("name"), person) for person in persons[matched:]]
+    )
+    return (ids, replaying and matched == len(persons))
+
+
+def import_candidate_links(
+    engine: DataEngine,
+    person_id: ObjectId,
+    parties: list[str],
+    electoral_committee: str | None,
+    assembly: str | None,
+    council: str | None,
+    office: str | None,
+    merge_electoral_committee: Callable[[str], ObjectId]
+) -> None:
+    for party in parties:
+        party_id = engine.match(Contains("Party", "names", party))
+        if not party_id:
+            party_id = engine.upsert("Party", party, {"names": [party]})
+
+        engine.join(party_id, person_id)
+
+    if electoral_committee:
+        electoral_committee_id = merge_electoral_committee(electoral_committee)
+        engine.join(electoral_committee_id, person_id)
+        # TODO: link committee with party or aliance
+        # ec_type, ec_name = parse_electoral_committee(electoral_committee)
+        # if ec_type == "KKW":
+        #
+        # elif ec_type == "KW":
+
+    if assembly:
+        assembly_id = engine.upsert("Assembly", assembly, {})
+        engine.join(assembly_id, person_id)
+        # if elected:
+
+    if council:
+        council_id = engine.upsert("Council", council, {})
+        engine.join(council_id, person_id)
+
+    if office:
+        office_id = engine.upsert("Office", office, {})
+        engine.join(office_id, person_id)
+
+
+async def import_elections_async(engine: AsyncDataEngine, path: str, **kwargs: Any) -> None:
 
-                engine.join(party_id, person_id)
+    elections_name = kwargs.get("elections_name")
+    # Candidates being imported at the same time
+    concurrency = max(kwargs.get("concurrency") or 1, 1)
 
-            if electoral_committee:
-                electoral_committee_id = merge_electoral_committee(elections_id, electoral_committee)
-                engine.join(electoral_committee_id, person_id)
-                # TODO: link committee with party or aliance
-                # ec_type, ec_name = parse_electoral_committee(electoral_committee)
-                # if ec_type == "KKW":
-                #
-                # elif ec_type == "KW":
+    with open(path, "rb") as file:
 
-            if assembly:
-                assembly_id = engine.upsert("Assembly", assembly, {})
-                engine.join(assembly_id, person_id)
-                # if elected:
+        elections_id = await engine.upsert("Elections", elections_name)
+        # Committee is inserted once, other candidates await the same task
+        committee_lookup = dict[str, asyncio.Task[ObjectId]]()
 
-            if council:
-                council_id = engine.upsert("Council", council, {})
-                engine.join(council_id, person_id)
+        async def insert_electoral_committee(electoral_committee: str) -> ObjectId:
+            electoral_committee_id = await engine.insert("ElectoralCommittee", electoral_committee)
+            await engine.join(elections_id, electoral_committee_id)
+            return electoral_committee_id
 
-            if office:
-                office_id = engine.upsert("Office", office, {})
-                engine.join(office_id, person_id)
+        def merge_electoral_committee(electoral_committee: str) -> Awaitable[ObjectId]:
+            if electoral_committee not in committee_lookup:
+                committee_lookup[electoral_committee] = asyncio.ensure_future(
+                    insert_electoral_committee(electoral_committee)
+                )
+            return committee_lookup[electoral_committee]
+
+        slots = asyncio.Semaphore(concurrency)
+
+        async def import_candidate(person: dict[str, Any]) -> None:
+            try:
+                links = (
+                    person.pop("@parties", []),
+                    person.pop("@electoralCommittee", None),
+                    person.pop("@assembly", None),
+                    person.pop("@council", None),
+                    person.pop("@office", None),
+                )
+                person_id = await engine.insert("Person", person.get("name"), person)
+                await import_candidate_links_async(
+                    engine, person_id, *links, merge_electoral_committee
+                )
+            finally:
+                slots.release()
+
+        # Progress is measured in bytes read
+        progress = ProgressBar(
+            os.fstat(file.fileno()).st_size,
+            prefix=f"{elections_name} ({file.name[-30:]:.>32})"
+        )
+
+        candidates = JsonStream(file)
+        records = engine.metrics.iterate("read", candidates) if engine.metrics else candidates
+        async with asyncio.TaskGroup() as tasks:
+            for person in records:
+                await slots.acquire()
+                tasks.create_task(import_candidate(person))
+                progress.move(candidates.position - progress.step)
+
+        # Whatever follows last candidate
+        if progress.step < progress.total:
+            progress.move(progress.total - progress.step)
+
+
+async def import_candidate_links_async(
+    engine: AsyncDataEngine,
+    person_id: ObjectId,
+    parties: list[str],
+    electoral_committee: str | None,
+    assembly: str | None,
+    council: str | None,
+    office: str | None,
+    merge_electoral_committee: Callable[[str], Awaitable[ObjectId]]
+) -> None:
+
+    async def join_party(party: str) -> None:
+        party_id = await engine.match(Contains("Party", "names", party))
+        if not party_id:
+            party_id = await engine.upsert("Party", party, {"names": [party]})
+        await engine.join(party_id, person_id)
+
+    async def join_committee(electoral_committee: str) -> None:
+        await engine.join(await merge_electoral_committee(electoral_committee), person_id)
+
+    async def join_upserted(type: str, name: str) -> None:
+        await engine.join(await engine.upsert(type, name, {}), person_id)
+
+    links = [join_party(party) for party in parties]
+    if electoral_committee:
+        links.append(join_committee(electoral_committee))
+    if assembly:
+        links.append(join_upserted("Assembly", assembly))
+    if council:
+        links.append(join_upserted("Council", council))
+    if office:
+        links.append(join_upserted("Office", office))
+
+    await asyncio.gather(*links)
 
 
 def parse_electoral_committee(name: str) -> tuple[str | None, str | None]:
@@ -269,29 +738,87 @@ def parse_electoral_committee(name: str) -> tuple[str | None, str | None]:
 
 
 class ProgressBar:
-    def __init__(self: Self, total: int, prefix="Progress", suffix="Complete", fill="#") -> None:
-        self.step = 0
+    """
+    Progress bar with rate and ETA. It is redrawn only when visible percentage
+    changes or every interval seconds (for rate and ETA), and not drawn at all
+    when output is not a terminal, so drawing does not slow down the work.
+    """
+
+    def __init__(
+        self: Self,
+        total: int,
+        prefix="Progress",
+        suffix="Complete",
+        fill="#",
+        unit="B",
+        initial: int = 0,
+        interval: float = 0.5,
+        file: TextIO | None = None
+    ) -> None:
+        """Steps before initial one (e.g. of resumed import) do not count in rate"""
+        self.step = initial
         self.total = total
         self.prefix = prefix
         self.suffix = suffix
         self.fill = fill
-        # To support console resize do it in draw() method
-        self.bar_length = shutil.get_terminal_size((80, 20))[0] - len(f"{prefix} [] 100% {suffix}")
+        self.unit = unit
+        self.interval = interval
+        self.file = file or sys.stdout
+        self.enabled = self.file.isatty()
+        self._initial = initial
+        self._started = time.monotonic()
+        self._drawn_at = 0.0
+        self._percent = -1
+        self._done = False
         self.draw()
 
     def draw(self: Self) -> None:
-        percent = 100 * self.step // self.total
-        filled_length = int(self.bar_length * self.step // self.total)
-        bar = self.fill * filled_length + " " * (self.bar_length - filled_length)
-        print(f"\r{self.prefix} [{bar}] {percent:3d}% {self.suffix}", end="\r")
-        if self.step == self.total:
-            print()
+        if not self.enabled or self._done:
+            return
+
+        percent = 100 * self.step // self.total if self.total else 100
+        now = time.monotonic()
+        if percent == self._percent and now - self._drawn_at < self.interval:
+            return
+
+        self._percent = percent
+        self._drawn_at = now
+        self._done = self.step >= self.total
+
+        elapsed = now - self._started
+        rate = (self.step - self._initial) / elapsed if elapsed > 0 else 0.0
+        eta = format_duration((self.total - self.step) / rate) if rate > 0 else "--:--"
+        stats = f"{format_size(rate)}{self.unit}/s ETA {eta:>8}" if not self._done \
+            else f"{format_size(rate)}{self.unit}/s in {format_duration(elapsed)}"
+
+        # Terminal may be resized meanwhile
+        width = shutil.get_terminal_size((80, 20))[0] - 1
+        bar_length = max(width - len(f"{self.prefix} [] 100% {self.suffix} {stats}"), 10)
+        filled_length = bar_length * percent // 100
+        bar = self.fill * filled_length + " " * (bar_length - filled_length)
+        line = f"{self.prefix} [{bar}] {percent:3d}% {self.suffix} {stats}"
+        self.file.write(f"\r{line:<{width}}" + ("\n" if self._done else "\r"))
+        self.file.flush()
 
     def move(self: Self, steps: int = 1) -> None:
         self.step += steps
         self.draw()
 
 
+def format_size(value: float) -> str:
+    for prefix in ("", "k", "M", "G"):
+        if value < 1000:
+            break
+        value /= 1000
+    return f"{value:6.1f} {prefix}"
+
+
+def format_duration(seconds: float) -> str:
+    (minutes, seconds) = divmod(int(seconds), 60)
+    (hours, minutes) = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
 def manage_data() -> None:
     parser = argparse.ArgumentParser(description="""
         Manage Mesh database
@@ -300,7 +827,7 @@ def manage_data() -> None:
     # Import type
     parser.add_argument(
         dest="command",
-        choices=["report-duplicates", "resolve-duplicates"],
+        choices=["ensure-schema", "report-duplicates", "resolve-duplicates"],
         action="store",
         help="what to do"
     )
@@ -318,6 +845,13 @@ def manage_data() -> None:
         default=False,
         help="Directory or file containing data to import"
     )
+    parser.add_argument(
+        "--fuzzy",
+        dest="fuzzy",
+        action="store_true",
+        default=False,
+        help="report persons with matching firstname, surname and birth year, not only same names"
+    )
     parser.add_argument(
         "-a", "--uri",
         dest="uri",
@@ -344,22 +878,53 @@ def manage_data() -> None:
         action="store",
         help="database to connect to"
     )
+    parser.add_argument(
+        "-b", "--batch-size",
+        dest="batch_size",
+        action="store",
+        type=int,
+        default=100,
+        help="number of duplicate groups merged per transaction, defaults to 100"
+    )
+    parser.add_argument(
+        "--metrics-file",
+        dest="metrics_file",
+        action="store",
+        help="write operation counts and timings to given JSON file"
+    )
 
     args = parser.parse_args()
 
+    metrics = Metrics()
+
     with GraphDatabase.driver(args.uri, auth=(args.username, args.password)) as driver:
         with driver.session(database=args.database) as session:
 
-            engine = DataEngine(Merger(session))
+            engine = DataEngine(Merger(session, args.batch_size, metrics=metrics), metrics=metrics)
 
             match args.command:
+                case "ensure-schema":
+                    print_schema_report(ensure_schema(session))
                 case "report-duplicates":
-                    report_duplicates(engine, args.with_sources)
+                    report_duplicates(engine, args.with_sources, args.fuzzy)
                 case "resolve-duplicates":
                     resolve_duplicates(engine, args.path)
 
+    report_metrics(metrics, args.metrics_file)
+
+
+def print_schema_report(missing: list[tuple[SchemaItem, str]]) -> None:
+    if not missing:
+        print("Schema: all indexes and constraints are online")
+        return
+
+    print("Schema: missing indexes and constraints")
+    for (item, reason) in missing:
+        print(" ", item.name, "-", reason)
+        print("   ", item.statement())
+
 
-def report_duplicates(engine: DataEngine, with_sources: bool) -> None:
+def report_duplicates(engine: DataEngine, with_sources: bool, fuzzy: bool = False) -> None:
     def print_duplicates(name: str, count: int, objects: list[LinkedObject]) -> None:
         print("---", name, count)
         print()
@@ -384,7 +949,7 @@ def report_duplicates(engine: DataEngine, with_sources: bool) -> None:
                 print(" ", ", ".join([link.get("name") for link in links]))
             print()
 
-            for source in node.get("@sources"):
+            for source in node.get("@sources") or []:
                 record = json.loads(source)
                 print("  -", record.get("source"))
                 if with_sources:
@@ -392,14 +957,21 @@ def report_duplicates(engine: DataEngine, with_sources: bool) -> None:
 
             print()
 
-    engine.find_duplicates("Person", print_duplicates)
+    if not fuzzy:
+        engine.find_duplicates("Person", print_duplicates)
+        return
+
+    for duplicate in BlockingIndex().update(engine.scan("Person")).duplicates():
+        print_duplicates(*duplicate)
 
 
 def resolve_duplicates(engine: DataEngine, path: str, **kwargs: str) -> None:
-    def merge_nodes(nodes: list[str]) -> None:
+    groups = list[list[ObjectId]]()
+
+    def add_group(nodes: list[str]) -> None:
         if nodes and len(nodes) > 1:
-            engine.merge([ObjectId("Person", id) for id in nodes])
-            nodes.clear()
+            groups.append([ObjectId("Person", id) for id in nodes])
+        nodes.clear()
 
     with open(path, "r", encoding="UTF8") as file:
         nodes = []
@@ -410,14 +982,29 @@ def resolve_duplicates(engine: DataEngine, path: str, **kwargs: str) -> None:
 
             match line[0:2]:
                 case "--":
-                    merge_nodes(nodes)
+                    add_group(nodes)
                 case "& ":
-                    merge_nodes(nodes)
+                    add_group(nodes)
                     nodes.append(line[2:].strip())
                 case "^ ":
                     nodes.append(line[2:].strip())
 
-        merge_nodes(nodes)
+        add_group(nodes)
+
+    started = time.perf_counter()
+    merged = engine.merge_many(groups)
+    elapsed = time.perf_counter() - started
+
+    failed = merged.count(None)
+    print(
+        f"Merged {len(groups) - failed} groups in {elapsed:.1f}s",
+        f"({(len(groups) - failed) / elapsed if elapsed else 0:.1f} groups/s)"
+    )
+    if failed:
+        print(f"Failed to merge {failed} groups:")
+        for (group, merged_id) in zip(groups, merged):
+            if merged_id is None:
+                print(" ", ", ".join(id.id for id in group))
 
 
 #match (p:Person {name: "Jarosław Aleksander Kaczyński"})
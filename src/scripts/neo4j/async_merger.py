@@ -0,0 +1,100 @@
+import asyncio
+
+from neo4j import AsyncDriver, AsyncManagedTransaction
+from neo4j.exceptions import ResultNotSingleError
+from typing import Any, Self
+from meshtools.construct.engine import AsyncStorage, ObjectId, ObjectKeys
+from .merger import \
+    MATCH_BY_ID, \
+    MERGE_OBJECTS, \
+    STATEMENTS, \
+    match_by_keys_params, \
+    match_by_keys_statement
+
+
+class AsyncMerger(AsyncStorage):
+    """
+    Merger on asynchronous driver. Every operation runs in its own session,
+    at most concurrency transactions are in flight at the same time.
+    """
+
+    def __init__(
+        self: Self, driver: AsyncDriver, database: str | None = None, concurrency: int = 8
+    ) -> None:
+        self.driver = driver
+        self.database = database
+        self._in_flight = asyncio.Semaphore(concurrency)
+
+    async def match(self: Self, keys: ObjectId | ObjectKeys) -> ObjectId | None:
+        try:
+            return ObjectId(keys.type, await self._read(match_by_id, keys.id)) \
+                if isinstance(keys, ObjectId) \
+                else ObjectId(keys.type, await self._read(match_by_keys, keys))
+        except ResultNotSingleError:
+            return None
+
+    async def create(self: Self, type: str, name: str, data: Any) -> ObjectId:
+        return ObjectId(type, await self._write(create_node, type, name, data))
+
+    async def merge(self: Self, type: str, name: str, data: Any) -> ObjectId:
+        return ObjectId(type, await self._write(merge_node, type, name, data))
+
+    async def merge_objects(self: Self, nodelist: list[ObjectId]) -> ObjectId:
+        return ObjectId(
+            nodelist[0].type,
+            await self._write(merge_nodes, [id.id for id in nodelist])
+        )
+
+    async def join(self: Self, whole: ObjectId | ObjectKeys, part: ObjectId | ObjectKeys) -> None:
+        await self._write(join_nodes, whole, part)
+
+    async def _read(self: Self, function: Any, *args: Any) -> Any:
+        async with self._in_flight:
+            async with self.driver.session(database=self.database) as session:
+                return await session.execute_read(function, *args)
+
+    async def _write(self: Self, function: Any, *args: Any) -> Any:
+        async with self._in_flight:
+            async with self.driver.session(database=self.database) as session:
+                return await session.execute_write(function, *args)
+
+
+async def match_by_id(tx: AsyncManagedTransaction, id: str) -> str:
+    result = await tx.run(MATCH_BY_ID, id=id)
+    # single(True) will raise exception if not exactly one result
+    return (await result.single(True)).value()
+
+
+async def match_by_keys(tx: AsyncManagedTransaction, keys: ObjectKeys) -> str:
+    result = await tx.run(match_by_keys_statement(keys), **match_by_keys_params(keys))
+    return (await result.single(True)).value()
+
+
+async def create_node(tx: AsyncManagedTransaction, type: str, name: str, data: Any) -> str:
+    # Make sure name is taken from name arg
+    result = await tx.run(
+        STATEMENTS.get("create", type).single, name=name, properties=data | {"name": name}
+    )
+    return (await result.single()).value()
+
+
+async def merge_node(tx: AsyncManagedTransaction, type: str, name: str, data: Any) -> str:
+    result = await tx.run(
+        STATEMENTS.get("merge", type).single, name=name, properties=data | {"name": name}
+    )
+    return (await result.single()).value()
+
+
+async def merge_nodes(tx: AsyncManagedTransaction, ids: list[str]) -> str:
+    result = await tx.run(MERGE_OBJECTS.single, ids=ids)
+    return (await result.single()).value()
+
+
+async def join_nodes(
+    tx: AsyncManagedTransaction, whole: ObjectId | ObjectKeys, part: ObjectId | ObjectKeys
+) -> None:
+    # TODO works only on ids!
+    result = await tx.run(
+        STATEMENTS.get("join", part.type, whole.type).single, whole_id=whole.id, part_id=part.id
+    )
+    await result.consume()
@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+import time
+
+from typing import Any, Self
+
+
+class Checkpoint:
+    """
+    Offset of the last committed record of imported file (with importer's
+    state needed to continue), kept in <path>.checkpoint sidecar file along
+    with hash of the file, so it is not resumed after the file is changed.
+    """
+
+    def __init__(self: Self, path: str, interval: float = 10.0) -> None:
+        """Checkpoint is due interval seconds after it was saved last"""
+        self.path = path
+        self.file = f"{path}.checkpoint"
+        self.interval = interval
+        self._digest = None
+        self._saved_at = time.monotonic()
+
+    @property
+    def digest(self: Self) -> str:
+        if self._digest is None:
+            sha256 = hashlib.sha256()
+            with open(self.path, "rb") as file:
+                while chunk := file.read(1 << 20):
+                    sha256.update(chunk)
+            self._digest = sha256.hexdigest()
+        return self._digest
+
+    def due(self: Self) -> bool:
+        return time.monotonic() - self._saved_at >= self.interval
+
+    def load(self: Self) -> tuple[int, dict[str, Any]]:
+        """
+        Return (offset, state) saved last, (0, {}) if there is no checkpoint.
+        Raise ValueError if the file changed or checkpoint cannot be read.
+        """
+        try:
+            with open(self.file, encoding="UTF8") as file:
+                checkpoint = json.load(file)
+        except FileNotFoundError:
+            return (0, {})
+
+        if checkpoint.get("sha256") != self.digest:
+            raise ValueError(f"{self.path} changed since {self.file} was saved")
+
+        return (checkpoint["offset"], checkpoint.get("state", {}))
+
+    def save(self: Self, offset: int, state: dict[str, Any] = dict()) -> None:
+        """
+        Save checkpoint atomically - it is written to temporary file which
+        replaces the former one. Everything before offset must be committed.
+        """
+        temp = f"{self.file}.tmp"
+        with open(temp, "w", encoding="UTF8") as file:
+            json.dump(
+                {"path": self.path, "sha256": self.digest, "offset": offset, "state": state},
+                file,
+                ensure_ascii=False
+            )
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(temp, self.file)
+        self._saved_at = time.monotonic()
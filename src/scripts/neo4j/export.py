@@ -0,0 +1,154 @@
+import csv
+import json
+import os
+
+from collections.abc import Iterable
+from typing import Any, Self
+
+from meshtools.construct.memory import InMemoryStorage
+from .merger import LABELS, RELMAP
+
+# Separator of labels and array elements - unit separator, which does not
+# appear in text data (unlike neo4j-admin default ;)
+ARRAY_DELIMITER = "\x1f"
+
+
+class FileExportStorage(InMemoryStorage):
+    """
+    Storage for initial load of an empty database - objects are kept in memory
+    (upserts are deduplicated there, as in InMemoryStorage) and exported into
+    node and relationship CSV files of neo4j-admin database import.
+    Ids are assigned in order of creation, so the same input gives the same files.
+    """
+
+    def export(self: Self, directory: str) -> tuple[list[str], list[str]]:
+        """Write one file per object type and per relation type, return their paths"""
+        os.makedirs(directory, exist_ok=True)
+
+        nodes = dict[str, list[str]]()
+        for (id, (type, _)) in self.objects.items():
+            nodes.setdefault(type, []).append(id)
+
+        relationships = dict[str, list[tuple[str, str, dict[str, Any]]]]()
+        for (part, wholes) in self._wholes.items():
+            part_type = self.objects[part][0]
+            for whole in wholes:
+                (type, properties) = relation(part_type, self.objects[whole][0])
+                relationships.setdefault(type, []).append((part, whole, properties))
+
+        node_files = [
+            self._write_nodes(os.path.join(directory, f"nodes_{type}.csv"), type, ids)
+            for (type, ids) in sorted(nodes.items())
+        ]
+        relationship_files = [
+            write_relationships(os.path.join(directory, f"relationships_{type}.csv"), type, rows)
+            for (type, rows) in sorted(relationships.items())
+        ]
+        return (node_files, relationship_files)
+
+    def _write_nodes(self: Self, path: str, type: str, ids: list[str]) -> str:
+        ids = sorted(ids, key=int)
+        columns = property_columns(self.objects[id][1] for id in ids)
+        labels = ARRAY_DELIMITER.join(LABELS.get(type, [type]))
+
+        with open(path, "w", encoding="UTF8", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow([":ID", ":LABEL", *(f"{key}:{kind}" for (key, kind) in columns)])
+            for id in ids:
+                data = self.objects[id][1]
+                writer.writerow(
+                    [id, labels, *(csv_value(data.get(key), kind) for (key, kind) in columns)]
+                )
+
+        return path
+
+
+def relation(part_type: str, whole_type: str) -> tuple[str, dict[str, Any]]:
+    """Relation type and its properties, e.g. candidate_for {distance: 10}"""
+    (type, _, properties) = RELMAP[part_type][whole_type].partition(" ")
+    values = {}
+    for item in properties.strip().strip("{}").split(","):
+        if item.strip():
+            (key, _, value) = item.partition(":")
+            values[key.strip()] = json.loads(value.strip())
+    return (type, values)
+
+
+def write_relationships(path: str, type: str, rows: list[tuple[str, str, dict[str, Any]]]) -> str:
+    columns = property_columns([properties for (_, _, properties) in rows])
+
+    with open(path, "w", encoding="UTF8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(
+            [":START_ID", ":END_ID", ":TYPE", *(f"{key}:{kind}" for (key, kind) in columns)]
+        )
+        for (start, end, properties) in sorted(rows, key=lambda row: (int(row[0]), int(row[1]))):
+            values = [csv_value(properties.get(key), kind) for (key, kind) in columns]
+            writer.writerow([start, end, type, *values])
+
+    return path
+
+
+def value_kind(value: Any) -> str:
+    if isinstance(value, list):
+        kinds = {value_kind(element) for element in value}
+        return f"{kinds.pop() if len(kinds) == 1 else 'string'}[]"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "long"
+    if isinstance(value, float):
+        return "double"
+    return "string"
+
+
+def property_columns(rows: Iterable[dict[str, Any]]) -> list[tuple[str, str]]:
+    """
+    (key, type) of all properties of rows. Properties with values of mixed
+    types are strings, single values of array properties (e.g. combined
+    by merges) are written as one element arrays.
+    """
+    kinds = dict[str, set[str]]()
+    for data in rows:
+        for (key, value) in data.items():
+            if value is not None:
+                kinds.setdefault(key, set()).add(value_kind(value))
+
+    columns = []
+    for (key, found) in sorted(kinds.items()):
+        if len(found) == 2 and any(f"{kind}[]" in found for kind in found):
+            kind = next(kind for kind in found if kind.endswith("[]"))
+        else:
+            kind = found.pop() if len(found) == 1 else "string"
+        columns.append((key, kind))
+    return columns
+
+
+def csv_value(value: Any, kind: str) -> str:
+    if value is None:
+        return ""
+    if kind.endswith("[]"):
+        elements = [
+            csv_value(element, kind[:-2])
+            for element in (value if isinstance(value, list) else [value])
+        ]
+        if any(ARRAY_DELIMITER in element for element in elements):
+            raise ValueError(f"Array element contains array delimiter: {value!r}")
+        return ARRAY_DELIMITER.join(elements)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def admin_command(
+    node_files: list[str], relationship_files: list[str], database: str = "neo4j"
+) -> list[str]:
+    """neo4j-admin command importing exported files into (new) database"""
+    return [
+        "neo4j-admin", "database", "import", "full", database,
+        f"--array-delimiter=U+{ord(ARRAY_DELIMITER):04X}",
+        *(f"--nodes={path}" for path in node_files),
+        *(f"--relationships={path}" for path in relationship_files),
+    ]
@@ -1,70 +1,300 @@
-from collections.abc import Callable
-from neo4j import Session, Transaction
-from neo4j.exceptions import ResultNotSingleError
+import time
+
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from neo4j import Result, ResultSummary, Session, Transaction
+from neo4j.exceptions import Neo4jError, ResultNotSingleError
 from typing import Any, Self
 from meshtools.construct.engine \
-    import Contains, LinkedObject, Object, ObjectId, ObjectKeys, PersistedObject, Storage
+    import Contains, Duplicate, LinkedObject, Object, ObjectId, ObjectKeys, PersistedObject, Storage
+from meshtools.construct.metrics import Metrics
 
 
 class Merger(Storage):
 
     """This is where knowledge is, callbacks should be dumb"""
 
-    def __init__(self: Self, session: Session) -> None:
+    def __init__(
+        self: Self,
+        session: Session,
+        batch_size: int = 0,
+        flush_interval: float | None = None,
+        metrics: Metrics | None = None
+    ) -> None:
+        """
+        With batch_size > 0 merger works in batching mode - joins are buffered
+        and written in one transaction as UNWIND statements (per relation type)
+        when batch_size joins are pending, when flush_interval seconds passed
+        since last flush (checked when next operation is buffered) or when
+        flush() is called. Rows of create_many() and merge_many() go through
+        the same buffer, but as their ids are needed right away, they are
+        written at once - in one transaction with joins pending.
+        Batch size also limits number of rows sent in single UNWIND statement.
+        With metrics server timings of all statements are recorded.
+        """
         self.session = session
+        self.metrics = metrics
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._joins = dict[tuple[str, str], list[dict[str, str]]]()
+        self._pending = 0
+        self._flushed_at = time.monotonic()
 
     def match(self: Self, keys: ObjectId | ObjectKeys) -> ObjectId | None:
         try:
-            return ObjectId(keys.type, self.session.execute_read(match_by_id, keys)) if isinstance(keys, ObjectId) \
-                else ObjectId(keys.type, self.session.execute_read(match_by_keys, keys))
+            return ObjectId(keys.type, self._read(match_by_id, keys.id)) if isinstance(keys, ObjectId) \
+                else ObjectId(keys.type, self._read(match_by_keys, keys))
         except ResultNotSingleError:
             return None
 
     def create(self: Self, type: str, name: str, data: Any) -> ObjectId:
-        return ObjectId(type, self.session.execute_write(create_node, type, name, data))
+        return ObjectId(type, self._write(create_node, type, name, data))
 
     def merge(self: Self, type: str, name: str, data: Any) -> ObjectId:
-        return ObjectId(type, self.session.execute_write(merge_node, type, name, data))
+        return ObjectId(type, self._write(merge_node, type, name, data))
 
     def merge_objects(self: Self, nodelist: list[ObjectId]) -> ObjectId:
-        def run(tx: Transaction) -> str:
-            return tx.run(
-                """
-                MATCH (n) WHERE elementId(n) IN $ids
-                WITH collect(n) AS nodes
-                CALL apoc.refactor.mergeNodes(nodes, {
-                    properties: {
-                        `@sources`: "combine",
-                        domicile: "combine",
-                        profession: "combine",
-                        `.*`: "discard"
-                    },
-                    mergeRels: true,
-                    singleElementAsArray: false
-                })
-                YIELD node
-                RETURN elementId(node)
-                """, ids=[id.id for id in nodelist]
-            ).single().value()
-
-        return ObjectId(nodelist[0].type, self.session.execute_write(run))
+        # Merged nodes may take part in buffered relations
+        self.flush()
+
+        return ObjectId(nodelist[0].type, self._write(merge_nodes, [id.id for id in nodelist]))
+
+    def merge_objects_many(self: Self, groups: list[list[ObjectId]]) -> list[ObjectId | None]:
+        """
+        Merge batch_size groups per transaction. When a batch fails its groups
+        are merged one by one, so single bad group does not stop the others.
+        """
+        self.flush()
+
+        ids = list[ObjectId | None]()
+        for batch in self._batches(groups):
+            try:
+                merged = self._write(
+                    merge_node_groups, [[id.id for id in group] for group in batch]
+                )
+                ids.extend(
+                    ObjectId(group[0].type, id) if id else None
+                    for (group, id) in zip(batch, merged)
+                )
+            except Neo4jError:
+                for group in batch:
+                    try:
+                        ids.append(self.merge_objects(group))
+                    except Neo4jError:
+                        ids.append(None)
+
+        return ids
 
     def join(self: Self, whole: ObjectId | ObjectKeys, part: ObjectId | ObjectKeys) -> None:
-        return self.session.execute_write(join_nodes, whole, part)
+        """Objects given by keys are matched first, they have to be unique"""
+        (whole, part) = (self._resolve(whole), self._resolve(part))
+        if self.batch_size > 0:
+            self._buffer_join(whole, part)
+        else:
+            self._write(join_nodes, whole, part)
+
+    def create_many(self: Self, type: str, rows: list[tuple[str, Object]]) -> list[ObjectId]:
+        return self._write_many(create_node_batch, type, rows)
+
+    def merge_many(self: Self, type: str, rows: list[tuple[str, Object]]) -> list[ObjectId]:
+        return self._write_many(merge_node_batch, type, rows)
+
+    def join_many(self: Self, pairs: list[tuple[ObjectId, ObjectId]]) -> None:
+        pairs = [(self._resolve(whole), self._resolve(part)) for (whole, part) in pairs]
+        if self.batch_size > 0:
+            for (whole, part) in pairs:
+                self._buffer_join(whole, part)
+        else:
+            for (types, rows) in group_joins(pairs).items():
+                self._write(join_node_batch, *types, rows)
+
+    def flush(self: Self) -> None:
+        if self._joins:
+            self._write_buffered()
+        self._flushed_at = time.monotonic()
+
+    def _write_many(
+        self: Self, function: Callable[..., list[str]], type: str, rows: list[tuple[str, Object]]
+    ) -> list[ObjectId]:
+        if self.batch_size > 0:
+            return [ObjectId(type, id) for id in self._write_buffered(function, type, rows)]
+
+        return [ObjectId(type, id) for id in self._write(function, type, rows)]
+
+    def _write_buffered(
+        self: Self,
+        function: Callable[..., list[str]] | None = None,
+        type: str | None = None,
+        rows: list[tuple[str, Object]] = []
+    ) -> list[str]:
+        """Write buffered joins and given rows in one transaction, return ids of rows"""
+        joins = [
+            (part_type, whole_type, batch)
+            for ((part_type, whole_type), join_rows) in self._joins.items()
+            for batch in self._batches(join_rows)
+        ]
+        ids = self._write(write_buffered, joins, function, type, self._batches(rows))
+
+        # Cleared only when written, so that failed flush can be retried
+        self._joins.clear()
+        self._pending = 0
+        self._flushed_at = time.monotonic()
+        return ids
+
+    def _resolve(self: Self, keys: ObjectId | ObjectKeys) -> ObjectId:
+        if isinstance(keys, ObjectId):
+            return keys
+
+        id = self.match(keys)
+        if id is None:
+            raise ValueError(f"No unique {keys.type} of {keys.keys} to join")
+        return id
+
+    def _buffer_join(self: Self, whole: ObjectId, part: ObjectId) -> None:
+        self._joins.setdefault((part.type, whole.type), []).append(
+            {"whole": whole.id, "part": part.id}
+        )
+        self._pending += 1
+
+        if self._pending >= self.batch_size or (
+            self.flush_interval is not None
+            and time.monotonic() - self._flushed_at >= self.flush_interval
+        ):
+            self.flush()
+
+    def _read(self: Self, function: Callable[..., Any], *args: Any) -> Any:
+        return self.session.execute_read(self._instrumented(function), *args)
+
+    def _write(self: Self, function: Callable[..., Any], *args: Any) -> Any:
+        return self.session.execute_write(self._instrumented(function), *args)
+
+    def _instrumented(self: Self, function: Callable[..., Any]) -> Callable[..., Any]:
+        if not self.metrics:
+            return function
+
+        metrics = self.metrics
+
+        def instrumented(tx: Transaction, *args: Any) -> Any:
+            recording = RecordingTransaction(tx)
+            value = function(recording, *args)
+            # Results are consumed already, only their summaries are fetched
+            for result in recording.results:
+                record_server_timings(metrics, function.__name__, result.consume())
+            return value
+
+        return instrumented
+
+    def _batches(self: Self, rows: list[Any]) -> list[list[Any]]:
+        size = self.batch_size if self.batch_size > 0 else max(len(rows), 1)
+        return [rows[i:i+size] for i in range(0, len(rows), size)]
 
     def find_duplicates(
         self: Self,
         type: str,
-        callback: Callable[[str, int, list[LinkedObject]], None] | None = None
-    ) -> list[tuple[str, int, list[LinkedObject]]] | None:
-        duplicates = []
+        callback: Callable[[str, int, list[LinkedObject]], None] | None = None,
+        page_size: int = 1000
+    ) -> Iterator[Duplicate] | None:
+        self.flush()
+
+        duplicates = self._duplicates(type, page_size)
+        if not callback:
+            return duplicates
+
+        for duplicate in duplicates:
+            callback(*duplicate)
+        return None
+
+    def scan(self: Self, type: str) -> Iterator[LinkedObject]:
+        self.flush()
+
+        # Records are streamed by the driver, not collected in a transaction function
+        result = self.session.run(STATEMENTS.get("scan", type).single)
+        for record in result:
+            yield (
+                (ObjectId(type, record["id"]), record["element"]),
+                record["links"]
+            )
+
+        if self.metrics:
+            record_server_timings(self.metrics, "scan", result.consume())
+
+    def _duplicates(self: Self, type: str, page_size: int) -> Iterator[Duplicate]:
+        """Read duplicates in pages of page_size nodes, each page in its own transaction"""
+        after = ""
+        while after is not None:
+            (page, after) = self._read(find_duplicate_nodes, type, after, page_size)
+            # Keyset pagination - next page continues after last name seen
+            yield from page
+
+
+class RecordingTransaction:
+    """Transaction keeping results of statements it runs"""
+
+    def __init__(self: Self, tx: Transaction) -> None:
+        self.tx = tx
+        self.results = list[Result]()
+
+    def run(self: Self, *args: Any, **kwargs: Any) -> Result:
+        result = self.tx.run(*args, **kwargs)
+        self.results.append(result)
+        return result
 
-        def aggregator(name: str, count: int, objects: list[LinkedObject]):
-            duplicates.append([name, count, objects])
 
-        self.session.execute_read(find_duplicate_nodes, type, callback if callback else aggregator)
+def record_server_timings(metrics: Metrics, name: str, summary: ResultSummary) -> None:
+    metrics.record_server(name, summary.result_available_after, summary.result_consumed_after)
 
-        return None if callback else duplicates
+
+@dataclass(frozen=True)
+class Statement:
+    """Cypher statement on single row of parameters and its UNWIND variant on $rows"""
+
+    single: str
+    batch: str | None = None
+
+
+class StatementRegistry:
+    """
+    Statements of every operation on every object type (on every related pair
+    of types for joins), built once at import time so their text is neither
+    formatted on every call nor different between calls. Operations on unknown
+    types fail before anything is sent to the database. Statements can be
+    replaced with register(), e.g. by variants tuned for given database.
+    """
+
+    def __init__(self: Self, statements: dict[str, dict[tuple[str, ...], Statement]]) -> None:
+        self._statements = {
+            (operation, *types): statement
+            for (operation, by_types) in statements.items()
+            for (types, statement) in by_types.items()
+        }
+
+    def register(self: Self, operation: str, types: tuple[str, ...], statement: Statement) -> None:
+        self._statements[(operation, *types)] = statement
+
+    def get(self: Self, operation: str, *types: str) -> Statement:
+        statement = self._statements.get((operation, *types))
+        if statement is None:
+            raise ValueError(f"Unknown {operation} of {' and '.join(types)}")
+        return statement
+
+    def derived(
+        self: Self,
+        operation: str,
+        type: str,
+        properties: tuple[str, ...],
+        build: Callable[..., Statement]
+    ) -> Statement:
+        """
+        Statements on given properties (e.g. list property of contains) are
+        built on first use as build(type, *properties), for known types only.
+        """
+        statement = self._statements.get((operation, type, *properties))
+        if statement is None:
+            if ("create", type) not in self._statements:
+                raise ValueError(f"Unknown {operation} of {type}")
+            statement = build(type, *properties)
+            self._statements[(operation, type, *properties)] = statement
+        return statement
 
 
 RELATIONS = [
@@ -111,40 +341,199 @@ LABELS = {
 }
 
 
+# Properties of duplicates needed to decide whether they should be merged
+DUPLICATE_PROPERTIES = ["name", "birthYear", "domicile", "profession", "@sources"]
+# ... and to find fuzzy duplicates
+SCAN_PROPERTIES = DUPLICATE_PROPERTIES + ["firstname", "names", "surnames"]
+
+
 def labels(type: str) -> list[str]:
     return LABELS[type]
 
 
-def match_by_id(tx: Transaction, id: str) -> str:
-    # single(True) will raise exception if not exactly one result
-    return tx.run(
-        "MATCH (n) WHERE elementId(n) = $id RETURN elementId(n)",
-        id=id
-    ).single(True).value()
+# Merged Person nodes keep all sources, places and professions
+MERGE_NODES_CONFIG = """{
+            properties: {
+                `@sources`: "combine",
+                domicile: "combine",
+                profession: "combine",
+                `.*`: "discard"
+            },
+            mergeRels: true,
+            singleElementAsArray: false
+        }"""
+
+MATCH_BY_ID = "MATCH (n) WHERE elementId(n) = $id RETURN elementId(n)"
+
+MERGE_OBJECTS = Statement(
+    f"""
+        MATCH (n) WHERE elementId(n) IN $ids
+        WITH collect(n) AS nodes
+        CALL apoc.refactor.mergeNodes(nodes, {MERGE_NODES_CONFIG})
+        YIELD node
+        RETURN elementId(node)
+        """,
+    f"""
+        UNWIND $groups AS group
+        MATCH (n) WHERE elementId(n) IN group.ids
+        WITH group, collect(n) AS nodes
+        CALL apoc.refactor.mergeNodes(nodes, {MERGE_NODES_CONFIG})
+        YIELD node
+        RETURN group.index AS index, elementId(node) AS id
+        """
+)
 
 
-def match_by_keys(tx: Transaction, keys: ObjectKeys) -> str:
+def create_statement(type: str) -> Statement:
+    return Statement(
+        f"""
+        CREATE (n:{":".join(labels(type))} {{name: $name}})
+            SET n += $properties
+        RETURN elementId(n)
+        """,
+        # Rows are indexed as result order of UNWIND is not guaranteed
+        f"""
+        UNWIND $rows AS row
+        CREATE (n:{":".join(labels(type))} {{name: row.name}})
+            SET n += row.properties
+        RETURN row.index AS index, elementId(n) AS id
+        """
+    )
+
+
+def merge_statement(type: str) -> Statement:
+    return Statement(
+        f"""
+        MERGE (n:{":".join(labels(type))} {{name: $name}})
+            SET n += $properties
+        RETURN elementId(n)
+        """,
+        f"""
+        UNWIND $rows AS row
+        MERGE (n:{":".join(labels(type))} {{name: row.name}})
+            SET n += row.properties
+        RETURN row.index AS index, elementId(n) AS id
+        """
+    )
+
+
+def join_statement(part_type: str, relation: str, whole_type: str) -> Statement:
+    return Statement(
+        f"""
+        MATCH (whole:{whole_type}) WHERE elementId(whole) = $whole_id
+        MATCH (part:{part_type}) WHERE elementId(part) = $part_id
+        MERGE (part)-[r:{relation}]->(whole)
+        RETURN elementId(r)
+        """,
+        f"""
+        UNWIND $rows AS row
+        MATCH (whole:{whole_type}) WHERE elementId(whole) = row.whole
+        MATCH (part:{part_type}) WHERE elementId(part) = row.part
+        MERGE (part)-[r:{relation}]->(whole)
+        """
+    )
+
+
+def match_statement(type: str, *keys: str) -> Statement:
+    # Keys are compared one by one, so that indexes on them can be used
+    return Statement(f"""
+        MATCH (n:{type})
+        WHERE {" AND ".join(f"n.`{key}` = $keys.`{key}`" for key in keys)}
+        RETURN elementId(n)
+        """)
+
+
+def contains_statement(type: str, property: str) -> Statement:
+    return Statement(f"MATCH (n:{type}) WHERE $value IN n.`{property}` RETURN elementId(n)")
+
+
+def scan_statement(type: str) -> Statement:
+    return Statement(f"""
+        MATCH (n:{type})
+        OPTIONAL MATCH (n)-[:member_of]->(o)
+        RETURN
+            elementId(n) AS id,
+            n {{{", ".join(f".`{key}`" for key in SCAN_PROPERTIES)}}} AS element,
+            collect(o {{.name}}) AS links
+        """)
+
+
+def duplicate_names_statement(type: str) -> Statement:
+    # Window of limit nodes is read in order of indexed name, so every page
+    # scans only the nodes it needs, names are counted in full (the last one
+    # may continue past the window)
+    return Statement(f"""
+        MATCH (n:{type}) WHERE n.name > $after
+        WITH n.name AS name
+        ORDER BY name
+        LIMIT $limit
+
+        WITH name, count(*) AS seen
+        RETURN name, seen, COUNT {{ MATCH (m:{type} {{name: name}}) }} AS count
+        ORDER BY name
+        """)
+
+
+def duplicates_statement(type: str) -> Statement:
+    return Statement(f"""
+        UNWIND $names AS name
+        MATCH (n:{type} {{name: name}})
+        OPTIONAL MATCH (n)-[:member_of]->(o)
+
+        WITH name, n, collect(o {{.name}}) AS links
+        WITH name, count(n) AS count, collect({{
+            id: elementId(n),
+            element: n {{{", ".join(f".`{key}`" for key in DUPLICATE_PROPERTIES)}}},
+            links: links
+        }}) AS nodelist
+
+        RETURN name, count, nodelist
+        ORDER BY name
+        """)
+
+
+# Statements of operation on object type, (part type, whole type) for joins,
+# match and contains statements are derived on first use
+STATEMENTS = StatementRegistry({
+    "create": {(type,): create_statement(type) for type in LABELS},
+    "merge": {(type,): merge_statement(type) for type in LABELS},
+    "scan": {(type,): scan_statement(type) for type in LABELS},
+    "duplicate_names": {(type,): duplicate_names_statement(type) for type in LABELS},
+    "duplicates": {(type,): duplicates_statement(type) for type in LABELS},
+    "join": {
+        (part, whole): join_statement(part, relation, whole)
+        for (part, relation, whole) in RELATIONS
+    },
+})
+
+
+def match_by_keys_statement(keys: ObjectKeys) -> str:
     if isinstance(keys, Contains):
-        name, value = keys.get()
+        return STATEMENTS.derived(
+            "contains", keys.type, (keys.get()[0],), contains_statement
+        ).single
+
+    return STATEMENTS.derived("match", keys.type, tuple(sorted(keys.keys)), match_statement).single
+
 
-        return tx.run(
-            f"MATCH (n:{keys.type}) WHERE $value IN n.{name} RETURN elementId(n)",
-            value=value
-        ).single(True).value()
+def match_by_keys_params(keys: ObjectKeys) -> dict[str, Any]:
+    return {"value": keys.get()[1]} if isinstance(keys, Contains) else {"keys": keys.keys}
 
+
+def match_by_id(tx: Transaction, id: str) -> str:
+    # single(True) will raise exception if not exactly one result
+    return tx.run(MATCH_BY_ID, id=id).single(True).value()
+
+
+def match_by_keys(tx: Transaction, keys: ObjectKeys) -> str:
     return tx.run(
-        f"MATCH (n:{keys.type} {{$keys}}) RETURN elementId(n)",
-        keys=keys.keys
+        match_by_keys_statement(keys), **match_by_keys_params(keys)
     ).single(True).value()
 
 
 def create_node(tx: Transaction, type: str, name: str, data: Any) -> str:
     return tx.run(
-        f"""
-        CREATE (n:{":".join(labels(type))} {{name: $name}})
-            SET n += $properties
-        RETURN elementId(n)
-        """,
+        STATEMENTS.get("create", type).single,
         name=name,
         # Make sure name is taken from name arg
         properties=data | {"name": name}
@@ -153,67 +542,122 @@ def create_node(tx: Transaction, type: str, name: str, data: Any) -> str:
 
 def merge_node(tx: Transaction, type: str, name: str, data: Any) -> str:
     return tx.run(
-        f"""
-        MERGE (n:{":".join(labels(type))} {{name: $name}})
-            SET n += $properties
-        RETURN elementId(n)
-        """,
+        STATEMENTS.get("merge", type).single,
         name=name,
         # Make sure name is taken from name arg
         properties=data | {"name": name}
     ).single().value()
 
 
-def join_nodes(tx: Transaction, whole: ObjectId | ObjectKeys, part: ObjectId | ObjectKeys) -> None:
-    # TODO works only on ids!
+def merge_nodes(tx: Transaction, ids: list[str]) -> str:
+    return tx.run(MERGE_OBJECTS.single, ids=ids).single().value()
+
+
+def join_nodes(tx: Transaction, whole: ObjectId, part: ObjectId) -> None:
     tx.run(
-        f"""
-        MATCH (whole:{whole.type}) WHERE elementId(whole) = $whole_id
-        MATCH (part:{part.type}) WHERE elementId(part) = $part_id
-        MERGE (part)-[r:{RELMAP[part.type][whole.type]}]->(whole)
-        RETURN elementId(r)
-        """, whole_id=whole.id, part_id=part.id
+        STATEMENTS.get("join", part.type, whole.type).single,
+        whole_id=whole.id,
+        part_id=part.id
     ).consume()
 
 
-def find_duplicate_nodes(
-    tx: Transaction, type: str, callback: Callable[[str, int, list[LinkedObject]], None]
-) -> None:
+def group_joins(
+    pairs: list[tuple[ObjectId, ObjectId]]
+) -> dict[tuple[str, str], list[dict[str, str]]]:
+    """Group (whole, part) pairs by (part type, whole type) into join_node_batch rows"""
+    groups = {}
+    for (whole, part) in pairs:
+        groups.setdefault((part.type, whole.type), []).append(
+            {"whole": whole.id, "part": part.id}
+        )
+    return groups
 
-    result = tx.run(f"""
-        MATCH (n:{type})
-        WITH n.name AS name, count(n.name) AS count
-        WHERE count > 1
 
-        WITH name, count
-        MATCH (n:{type} {{name: name}})
-        OPTIONAL MATCH (n)-[:member_of]->(o)
+def create_node_batch(tx: Transaction, type: str, rows: list[tuple[str, Object]]) -> list[str]:
+    result = tx.run(STATEMENTS.get("create", type).batch, rows=batch_rows(rows))
+    return ordered_ids(result, len(rows))
 
-        WITH *, {{
-            id: elementId(n),
-            element: n,
-            links: collect(o)
-        }} AS node
 
-        RETURN name, count, collect(node) AS nodelist
-        ORDER BY name
-        """
+def merge_node_batch(tx: Transaction, type: str, rows: list[tuple[str, Object]]) -> list[str]:
+    result = tx.run(STATEMENTS.get("merge", type).batch, rows=batch_rows(rows))
+    return ordered_ids(result, len(rows))
+
+
+def merge_node_groups(tx: Transaction, groups: list[list[str]]) -> list[str | None]:
+    result = tx.run(
+        MERGE_OBJECTS.batch,
+        groups=[{"index": index, "ids": ids} for (index, ids) in enumerate(groups)]
     )
+    return ordered_ids(result, len(groups))
 
+
+def join_node_batch(
+    tx: Transaction, part_type: str, whole_type: str, rows: list[dict[str, str]]
+) -> None:
+    tx.run(STATEMENTS.get("join", part_type, whole_type).batch, rows=rows).consume()
+
+
+def write_buffered(
+    tx: Transaction,
+    joins: list[tuple[str, str, list[dict[str, str]]]],
+    function: Callable[..., list[str]] | None,
+    type: str | None,
+    batches: list[list[tuple[str, Object]]]
+) -> list[str]:
+    """Run join_node_batch on every batch of joins and function on every batch of rows"""
+    for (part_type, whole_type, rows) in joins:
+        join_node_batch(tx, part_type, whole_type, rows)
+
+    return [id for rows in batches for id in function(tx, type, rows)]
+
+
+def batch_rows(rows: list[tuple[str, Object]]) -> list[dict[str, Any]]:
+    return [
+        # Make sure name is taken from name arg
+        {"index": index, "name": name, "properties": data | {"name": name}}
+        for index, (name, data) in enumerate(rows)
+    ]
+
+
+def ordered_ids(result: Any, count: int) -> list[str]:
+    ids = [None] * count
     for record in result:
-        name = record.value("name")
-        count = record.value("count")
-        objects = [
-            (
+        ids[record["index"]] = record["id"]
+    return ids
+
+
+def find_duplicate_nodes(
+    tx: Transaction, type: str, after: str, limit: int
+) -> tuple[list[Duplicate], str | None]:
+    """Duplicates among next limit nodes after given name, name to continue after (if any)"""
+
+    names = list(tx.run(STATEMENTS.get("duplicate_names", type).single, after=after, limit=limit))
+    duplicated = [record["name"] for record in names if record["count"] > 1]
+
+    result = tx.run(STATEMENTS.get("duplicates", type).single, names=duplicated) \
+        if duplicated else []
+
+    duplicates = [
+        (
+            record.value("name"),
+            record.value("count"),
+            [
                 (
-                    ObjectId(type, node.get("id")),
-                    node.get("element")
-                ),
-                node.get("links")
-            )
-            for node in record.value("nodelist")
-        ]
-        callback(name, count, objects)
+                    (
+                        ObjectId(type, node.get("id")),
+                        node.get("element")
+                    ),
+                    node.get("links")
+                )
+                for node in record.value("nodelist")
+            ]
+        )
+        for record in result
+    ]
+
+    # Window which is not full is the last one
+    full = sum(record["seen"] for record in names) >= limit
+    return (duplicates, names[-1]["name"] if full else None)
 
 
 """ MATCH (n:Person)
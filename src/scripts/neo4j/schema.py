@@ -0,0 +1,135 @@
+from dataclasses import dataclass
+from neo4j import Session
+from neo4j.exceptions import Neo4jError
+from typing import Self
+
+from .merger import LABELS, RELATIONS
+
+# Types only ever upserted (MERGE on name), there is one node per name
+UNIQUE_NAMES = {
+    "Chamber",
+    "ChamberTerm",
+    "Elections",
+    "Assembly",
+    "Council",
+    "Office",
+    "Party",
+}
+
+
+@dataclass(frozen=True)
+class SchemaItem:
+    """Range index or uniqueness constraint on single node property"""
+
+    label: str
+    property: str
+    unique: bool = False
+
+    @property
+    def name(self: Self) -> str:
+        return f"mesh_{self.label.lower()}_{self.property}"
+
+    def statement(self: Self) -> str:
+        if self.unique:
+            return f"CREATE CONSTRAINT {self.name} IF NOT EXISTS " \
+                f"FOR (n:{self.label}) REQUIRE n.{self.property} IS UNIQUE"
+
+        return f"CREATE INDEX {self.name} IF NOT EXISTS " \
+            f"FOR (n:{self.label}) ON (n.{self.property})"
+
+
+def schema_items() -> list[SchemaItem]:
+    """
+    Indexes and constraints needed by Merger statements. Nodes are matched
+    and merged by name on the label of their type (the last of LABELS), so
+    every type present in LABELS or RELATIONS gets name index - uniqueness
+    constraint (it is backed by range index too) if its names are unique.
+    Contains keys (value IN n.names) cannot use range indexes, they are
+    limited to label scans of their type.
+    """
+    types = list(LABELS)
+    for (part, _, whole) in RELATIONS:
+        for type in (part, whole):
+            if type not in types:
+                types.append(type)
+
+    return [
+        SchemaItem(LABELS[type][-1] if type in LABELS else type, "name", type in UNIQUE_NAMES)
+        for type in types
+    ]
+
+
+def ensure_schema(session: Session, timeout: int = 300) -> list[tuple[SchemaItem, str]]:
+    """
+    Create missing indexes and constraints, wait until they are online.
+    Constraint which cannot be created (e.g. names are duplicated already)
+    is replaced with index, so import can go on.
+    Return items which are not online, with the reason.
+    """
+    errors = dict[SchemaItem, str]()
+    items = schema_items()
+
+    for item in items:
+        try:
+            session.run(item.statement()).consume()
+        except Neo4jError as e:
+            errors[item] = e.message or str(e)
+            if item.unique:
+                # E.g. there are duplicates already, names are indexed at least
+                create_index(session, SchemaItem(item.label, item.property))
+
+    try:
+        session.run("CALL db.awaitIndexes($timeout)", timeout=timeout).consume()
+    except Neo4jError:
+        # Timeout - what is not online yet is reported below
+        pass
+
+    # Equivalent index or constraint may exist under another name
+    indexes = {
+        (tuple(record["labelsOrTypes"]), tuple(record["properties"])): record["state"]
+        for record in session.run("""
+            SHOW INDEXES YIELD type, entityType, labelsOrTypes, properties, state
+            WHERE type = "RANGE" AND entityType = "NODE"
+            RETURN labelsOrTypes, properties, state
+            """)
+    }
+    constraints = {
+        (tuple(record["labelsOrTypes"]), tuple(record["properties"]))
+        for record in session.run("""
+            SHOW CONSTRAINTS YIELD type, entityType, labelsOrTypes, properties
+            WHERE type IN ["UNIQUENESS", "NODE_PROPERTY_UNIQUENESS"] AND entityType = "NODE"
+            RETURN labelsOrTypes, properties
+            """)
+    }
+
+    missing = []
+    for item in items:
+        key = ((item.label,), (item.property,))
+        reason = missing_reason(item, indexes.get(key), key in constraints, errors.get(item))
+        if reason:
+            missing.append((item, reason))
+
+    return missing
+
+
+def missing_reason(
+    item: SchemaItem, state: str | None, constrained: bool, error: str | None
+) -> str | None:
+    """Why item is not online (state of its index, error of its creation), None if it is"""
+    if item.unique and not constrained:
+        if state == "ONLINE":
+            return f"{item.label} names are not unique, only indexed - {error or 'index exists'}"
+        return error or "constraint does not exist"
+    if state is None:
+        return error or "index does not exist"
+    if state != "ONLINE":
+        return f"index is {state.lower()}"
+    return None
+
+
+def create_index(session: Session, item: SchemaItem) -> None:
+    try:
+        session.run(item.statement()).consume()
+    except Neo4jError:
+        # What is missing is reported by ensure_schema
+        pass
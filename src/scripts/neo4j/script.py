@@ -0,0 +1,120 @@
+import re
+import time
+
+from collections import Counter
+from neo4j import ResultSummary, Session, SummaryCounters
+from typing import Self
+
+from meshtools.construct.metrics import Metrics
+
+# Line starting independent section of script, e.g. // ---
+section_marker = re.compile(r"^\s*//\s*---.*$", re.M)
+in_transactions = re.compile(r"\}\s*IN\s+(\d+\s+CONCURRENT\s+)?TRANSACTIONS\b", re.I)
+
+
+class Section:
+    """Statements of a script (or script section) run one after another"""
+
+    def __init__(self: Self, name: str, statements: list[str]) -> None:
+        self.name = name
+        self.statements = statements
+        self.counters = Counter[str]()
+        self.timings = list[tuple[str, float, SummaryCounters | None]]()
+        # Sections may run in parallel, each has its own metrics
+        self.metrics = Metrics()
+        self.error: Exception | None = None
+
+    def run(self: Self, session: Session, batch_size: int = 0) -> Self:
+        """
+        Run statements in autocommit mode (batch_size 0) or batch_size statements
+        per explicit transaction. CALL { } IN TRANSACTIONS statements cannot run
+        in explicit transaction, they always run in autocommit mode.
+        Stop on first error, statements of failed transaction are rolled back.
+        """
+        try:
+            batch = list[str]()
+            for stmt in self.statements:
+                if batch_size and not in_transactions.search(stmt):
+                    batch.append(stmt)
+                    if len(batch) >= batch_size:
+                        self._run_batch(session, batch)
+                        batch = []
+                    continue
+
+                self._run_batch(session, batch)
+                batch = []
+
+                started = time.perf_counter()
+                self._record(stmt, started, session.run(stmt).consume())
+
+            self._run_batch(session, batch)
+        except Exception as e:
+            self.error = e
+
+        return self
+
+    def _run_batch(self: Self, session: Session, batch: list[str]) -> None:
+        if not batch:
+            return
+
+        with session.begin_transaction() as tx:
+            for stmt in batch:
+                started = time.perf_counter()
+                self._record(stmt, started, tx.run(stmt).consume())
+
+            started = time.perf_counter()
+            tx.commit()
+            self._record("COMMIT", started, None)
+
+    def _record(self: Self, stmt: str, started: float, summary: ResultSummary | None) -> None:
+        elapsed = time.perf_counter() - started
+        # Statements are measured by their kind (first keyword)
+        kind = first_line(stmt).split(maxsplit=1)[0].upper() if first_line(stmt) else stmt
+        self.metrics.record(kind, elapsed)
+
+        if summary is None:
+            self.timings.append((stmt, elapsed, None))
+            return
+
+        self.timings.append((stmt, elapsed, summary.counters))
+        self.counters.update(counter_values(summary.counters))
+        self.metrics.record_server(
+            kind, summary.result_available_after, summary.result_consumed_after
+        )
+
+
+def counter_values(counters: SummaryCounters) -> dict[str, int]:
+    return {key: value for (key, value) in vars(counters).items() if not key.startswith("_")}
+
+
+def first_line(stmt: str) -> str:
+    """First line of statement which is not a comment"""
+    return next(
+        (line for line in map(str.strip, stmt.splitlines()) if line and line[:2] != "//"), ""
+    )
+
+
+def is_valid(stmt: str) -> bool:
+    for line in [line.strip().lower() for line in stmt.splitlines()]:
+        if line and not line.startswith("//") \
+                and ("create" in line or "match" in line or "merge" in line):
+            return True
+    return False
+
+
+def split_statements(script: str) -> list[str]:
+    return [stmt.strip() for stmt in script.split(";") if is_valid(stmt)]
+
+
+def load_sections(path: str, split: bool = False) -> list[Section]:
+    """Load script as single section or split it at section marker lines"""
+    with open(path, encoding="UTF8") as file:
+        script = file.read()
+
+    if not split:
+        return [Section(path, split_statements(script))]
+
+    return [
+        Section(f"{path}#{index}", split_statements(part))
+        for (index, part) in enumerate(section_marker.split(script), 1)
+    ]
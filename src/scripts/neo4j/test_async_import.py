@@ -0,0 +1,96 @@
+import asyncio
+import json
+import sys
+
+import pytest
+
+from meshtools.construct.engine import AsyncDataEngine
+from meshtools.construct.memory import InMemoryStorage
+from . import import_data, import_elections_async
+
+CANDIDATES = [
+    {
+        "name": f"Jan Kowalski {i}",
+        "@parties": ["PSL", "ZSL"][:i % 2 + 1],
+        "@electoralCommittee": f"KW {i % 3}",
+        "@council": "Rada Miasta",
+    }
+    for i in range(20)
+]
+
+
+class AsyncStorage:
+    """InMemoryStorage behind awaits, keeping number of persons created concurrently"""
+
+    def __init__(self):
+        self.storage = InMemoryStorage()
+        self.creating = 0
+        self.max_creating = 0
+
+    async def match(self, keys):
+        await asyncio.sleep(0)
+        return self.storage.match(keys)
+
+    async def create(self, type, name, data):
+        if type == "Person":
+            self.creating += 1
+            self.max_creating = max(self.max_creating, self.creating)
+        try:
+            # Let other candidates in
+            for _ in range(3):
+                await asyncio.sleep(0)
+            return self.storage.create(type, name, data)
+        finally:
+            if type == "Person":
+                self.creating -= 1
+
+    async def merge(self, type, name, data):
+        await asyncio.sleep(0)
+        return self.storage.merge(type, name, data)
+
+    async def join(self, whole, part):
+        await asyncio.sleep(0)
+        self.storage.join(whole, part)
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "candidates.json"
+    path.write_text(json.dumps(CANDIDATES), encoding="UTF8")
+    return str(path)
+
+
+def names(storage, type):
+    return sorted(data["name"] for (t, data) in storage.objects.values() if t == type)
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_import_elections_async(path, concurrency):
+    storage = AsyncStorage()
+    asyncio.run(import_elections_async(
+        AsyncDataEngine(storage, cache_size=None), path,
+        elections_name="Wybory", concurrency=concurrency
+    ))
+
+    assert names(storage.storage, "Person") == sorted(c["name"] for c in CANDIDATES)
+    # Shared objects are created once, however many candidates wait for them
+    assert names(storage.storage, "ElectoralCommittee") == ["KW 0", "KW 1", "KW 2"]
+    assert names(storage.storage, "Party") == ["PSL", "ZSL"]
+    assert names(storage.storage, "Council") == ["Rada Miasta"]
+    assert names(storage.storage, "Elections") == ["Wybory"]
+    # Committee, council and parties of every person, elections of committees
+    relations = sum(2 + len(candidate["@parties"]) for candidate in CANDIDATES) + 3
+    assert storage.storage.relation_count == relations
+    # Candidates in flight are bounded by concurrency
+    assert storage.max_creating == concurrency
+
+
+@pytest.mark.parametrize("option", [["--checkpoint"], ["--resume"], ["--flush-interval", "1"]])
+def test_unsupported_options(path, option, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", [
+        "mesh-import", "local-elections", "-p", path, "-e", "Wybory", "--concurrency", "4", *option
+    ])
+    with pytest.raises(SystemExit) as exit:
+        import_data()
+    assert exit.value.code == 2
+    assert option[0] in capsys.readouterr().err
@@ -0,0 +1,122 @@
+import json
+import os
+import sys
+
+import pytest
+
+from meshtools.construct.engine import DataEngine, ObjectKeys
+from meshtools.construct.memory import InMemoryStorage
+from . import import_data, import_elections
+from .checkpoint import Checkpoint
+
+CANDIDATES = [
+    {"name": f"Jan Kowalski {i}", "@parties": ["PSL"], "@electoralCommittee": f"KW {i // 4}"}
+    for i in range(10)
+]
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "candidates.json"
+    path.write_text(json.dumps(CANDIDATES), encoding="UTF8")
+    return str(path)
+
+
+def test_save_and_load(path):
+    checkpoint = Checkpoint(path)
+    assert checkpoint.load() == (0, {})
+
+    checkpoint.save(42, {"committees": {"KW": "1"}})
+    assert Checkpoint(path).load() == (42, {"committees": {"KW": "1"}})
+    # Saved atomically, temporary file is gone
+    assert not os.path.exists(f"{checkpoint.file}.tmp")
+
+
+def test_changed_file(path):
+    Checkpoint(path).save(42)
+    with open(path, "a", encoding="UTF8") as file:
+        file.write(" ")
+
+    with pytest.raises(ValueError):
+        Checkpoint(path).load()
+
+
+def test_changed_file_cli(path, monkeypatch, capsys):
+    Checkpoint(path).save(42)
+    with open(path, "a", encoding="UTF8") as file:
+        file.write(" ")
+
+    monkeypatch.setattr(
+        sys, "argv", ["mesh-import", "local-elections", "-p", path, "-e", "Wybory", "--resume"]
+    )
+    with pytest.raises(SystemExit) as exit:
+        import_data()
+    assert exit.value.code == 2
+    assert "cannot resume" in capsys.readouterr().err
+
+
+class FailingStorage(InMemoryStorage):
+    """Crashes when given person is joined with its committee"""
+
+    def __init__(self, fail_on):
+        super().__init__()
+        self.fail_on = fail_on
+
+    def join(self, whole, part):
+        if whole.type == "ElectoralCommittee" and self.objects[part.id][1]["name"] == self.fail_on:
+            raise RuntimeError("crash")
+        super().join(whole, part)
+
+
+def objects(storage, type):
+    return [data for (object_type, data) in storage.objects.values() if object_type == type]
+
+
+def test_resume(path):
+    storage = FailingStorage(fail_on="Jan Kowalski 8")
+    with pytest.raises(RuntimeError):
+        import_elections(
+            DataEngine(storage), path,
+            elections_name="Wybory", batch_size=3, checkpoint=Checkpoint(path, interval=0)
+        )
+    # Third chunk and new committee of its last person are committed after
+    # checkpoint of two chunks was saved
+    assert len(objects(storage, "Person")) == 9
+    assert len(objects(storage, "ElectoralCommittee")) == 3
+    (offset, state) = Checkpoint(path).load()
+    assert 0 < offset < os.path.getsize(path)
+    assert set(state["committees"]) == {"KW 0", "KW 1"}
+
+    storage.fail_on = None
+    import_elections(
+        DataEngine(storage), path,
+        elections_name="Wybory", batch_size=3, checkpoint=Checkpoint(path), resume=True
+    )
+    # Nothing is inserted twice
+    persons = objects(storage, "Person")
+    assert sorted(person["name"] for person in persons) == \
+        sorted(candidate["name"] for candidate in CANDIDATES)
+    assert sorted(data["name"] for data in objects(storage, "ElectoralCommittee")) == \
+        ["KW 0", "KW 1", "KW 2"]
+    # All persons are linked with their committees
+    engine = DataEngine(storage)
+    for candidate in CANDIDATES:
+        person = engine.match(ObjectKeys("Person", {"name": candidate["name"]}))
+        committee = engine.match(
+            ObjectKeys("ElectoralCommittee", {"name": candidate["@electoralCommittee"]})
+        )
+        assert committee.id in storage._wholes[person.id]
+
+
+def test_without_checkpoint(path):
+    storage = InMemoryStorage()
+    import_elections(DataEngine(storage), path, elections_name="Wybory", batch_size=3)
+    # No keys of import are written
+    assert all("@offset" not in data for data in objects(storage, "Person"))
+    assert not os.path.exists(f"{path}.checkpoint")
+
+
+def test_checkpoint_due(path):
+    checkpoint = Checkpoint(path, interval=60)
+    assert not checkpoint.due()
+    assert Checkpoint(path, interval=0).due()
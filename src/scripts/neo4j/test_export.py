@@ -0,0 +1,66 @@
+import csv
+
+import pytest
+
+from .export import ARRAY_DELIMITER, FileExportStorage, admin_command, csv_value
+
+
+def read_csv(path):
+    with open(path, encoding="UTF8", newline="") as file:
+        return list(csv.reader(file))
+
+
+def test_export(tmp_path):
+    storage = FileExportStorage()
+    party = storage.merge("Party", "PSL", {"names": ["PSL", "ZSL"]})
+    assert storage.merge("Party", "PSL", {}) == party
+    person = storage.create("Person", "Jan Kowalski", {
+        "birthYear": 1970,
+        "share": 12.5,
+        "elected": True,
+        "domicile": "Kraków",
+        "address": {"city": "Kraków", "street": None},
+        "profession": None,
+    })
+    other = storage.create("Person", "Anna Nowak", {"domicile": ["Tarnów", "Kraków"]})
+    storage.join(party, person)
+    storage.join(party, other)
+
+    (nodes, relationships) = storage.export(str(tmp_path))
+    assert [path.rsplit("/", 1)[1] for path in nodes] == ["nodes_Party.csv", "nodes_Person.csv"]
+    assert [path.rsplit("/", 1)[1] for path in relationships] == ["relationships_member_of.csv"]
+
+    assert read_csv(nodes[0]) == [
+        [":ID", ":LABEL", "name:string", "names:string[]"],
+        [party.id, f"Org{ARRAY_DELIMITER}Party", "PSL", f"PSL{ARRAY_DELIMITER}ZSL"],
+    ]
+    assert read_csv(nodes[1]) == [
+        [
+            ":ID", ":LABEL", "address:string", "birthYear:long", "domicile:string[]",
+            "elected:boolean", "name:string", "share:double",
+        ],
+        [
+            person.id, "Person", '{"city": "Kraków", "street": null}', "1970", "Kraków",
+            "true", "Jan Kowalski", "12.5",
+        ],
+        [other.id, "Person", "", "", f"Tarnów{ARRAY_DELIMITER}Kraków", "", "Anna Nowak", ""],
+    ]
+    assert read_csv(relationships[0]) == [
+        [":START_ID", ":END_ID", ":TYPE", "distance:long"],
+        [person.id, party.id, "member_of", "1"],
+        [other.id, party.id, "member_of", "1"],
+    ]
+
+
+def test_csv_value():
+    assert csv_value({"a": [1]}, "string") == '{"a": [1]}'
+    assert csv_value("x", "string[]") == "x"
+    with pytest.raises(ValueError):
+        csv_value([f"a{ARRAY_DELIMITER}b"], "string[]")
+
+
+def test_admin_command():
+    assert admin_command(["n.csv"], ["r.csv"], "mesh") == [
+        "neo4j-admin", "database", "import", "full", "mesh",
+        "--array-delimiter=U+001F", "--nodes=n.csv", "--relationships=r.csv",
+    ]
@@ -0,0 +1,303 @@
+import sys
+
+import pytest
+from neo4j.exceptions import ClientError
+
+from meshtools.construct.engine import Contains, ObjectId, ObjectKeys
+from . import import_data, merger
+from .merger import Merger, Statement, StatementRegistry, match_by_keys_statement
+
+
+class FakeRecord(dict):
+    def value(self, key=0):
+        return list(self.values())[key] if isinstance(key, int) else self[key]
+
+
+class FakeResult(list):
+    def single(self, strict=False):
+        if strict and len(self) != 1:
+            raise merger.ResultNotSingleError(self)
+        return self[0] if self else None
+
+    def consume(self):
+        return None
+
+
+class FakeSession:
+    """
+    Session running transaction functions on itself, keeping statements run.
+    Records of statements are given by answer(query, params).
+    """
+
+    def __init__(self, answer=lambda query, params: []):
+        self.statements = []
+        self.transactions = 0
+        self.answer = answer
+
+    def execute_read(self, function, *args):
+        return function(self, *args)
+
+    def execute_write(self, function, *args):
+        self.transactions += 1
+        return function(self, *args)
+
+    def run(self, query, **params):
+        self.statements.append((query, params))
+        return FakeResult(FakeRecord(record) for record in self.answer(query, params))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(merger.time, "monotonic", lambda: now[0])
+    return now
+
+
+PARTY = ObjectId("Party", "p")
+
+
+def person(index):
+    return ObjectId("Person", str(index))
+
+
+def joined(session):
+    return [
+        row["part"] for (query, params) in session.statements if "MERGE (part)" in query
+        for row in params["rows"]
+    ]
+
+
+def test_join_without_batching():
+    session = FakeSession()
+    storage = Merger(session)
+    storage.join(PARTY, person(1))
+    storage.join(PARTY, person(2))
+
+    assert session.transactions == 2
+    assert [params["part_id"] for (_, params) in session.statements] == ["1", "2"]
+
+
+def test_joins_buffered_until_batch_size(clock):
+    session = FakeSession()
+    storage = Merger(session, batch_size=3)
+    storage.join(PARTY, person(1))
+    storage.join(PARTY, person(2))
+    assert session.statements == []
+
+    storage.join(PARTY, person(3))
+    assert session.transactions == 1
+    assert joined(session) == ["1", "2", "3"]
+    assert "UNWIND $rows" in session.statements[0][0]
+
+
+def test_joins_flushed_after_interval(clock):
+    session = FakeSession()
+    storage = Merger(session, batch_size=100, flush_interval=5.0)
+    storage.join(PARTY, person(1))
+    clock[0] = 4.0
+    storage.join(PARTY, person(2))
+    assert session.statements == []
+
+    clock[0] = 5.0
+    storage.join(PARTY, person(3))
+    assert joined(session) == ["1", "2", "3"]
+
+    # Interval is measured from the last flush
+    clock[0] = 9.0
+    storage.join(PARTY, person(4))
+    assert joined(session) == ["1", "2", "3"]
+
+
+def test_final_flush(clock):
+    session = FakeSession()
+    storage = Merger(session, batch_size=100)
+    storage.join(PARTY, person(1))
+    storage.join(ObjectId("ElectoralCommittee", "c"), person(2))
+    assert session.statements == []
+
+    storage.flush()
+    # One statement per relation type, all in one transaction
+    assert session.transactions == 1
+    assert len(session.statements) == 2
+    assert sorted(joined(session)) == ["1", "2"]
+
+    storage.flush()
+    assert session.transactions == 1
+
+
+def created(query, params):
+    if "CREATE" in query:
+        return [{"index": row["index"], "id": f"new {row['name']}"} for row in params["rows"]]
+    return []
+
+
+def test_create_many_with_pending_joins(clock):
+    session = FakeSession(created)
+    storage = Merger(session, batch_size=2)
+    storage.join(PARTY, person(1))
+
+    ids = storage.create_many("Person", [("Jan", {}), ("Anna", {}), ("Ewa", {})])
+    assert ids == [ObjectId("Person", f"new {name}") for name in ("Jan", "Anna", "Ewa")]
+    # Pending join and two batches of rows written in one transaction
+    assert session.transactions == 1
+    assert joined(session) == ["1"]
+    assert [len(params["rows"]) for (query, params) in session.statements] == [1, 2, 1]
+
+    # Nothing is left to flush
+    storage.flush()
+    assert session.transactions == 1
+
+
+def test_join_keys(clock):
+    def answer(query, params):
+        if "keys" in params:
+            return [{"id": "k"}] if params["keys"] == {"name": "PSL"} else []
+        return []
+
+    session = FakeSession(answer)
+    storage = Merger(session, batch_size=10)
+    storage.join(ObjectKeys("Party", {"name": "PSL"}), person(1))
+    storage.flush()
+    assert session.statements[-1][1]["rows"] == [{"whole": "k", "part": "1"}]
+
+    with pytest.raises(ValueError):
+        storage.join(ObjectKeys("Party", {"name": "ZSL"}), person(2))
+
+
+def test_registry_unknown_types():
+    with pytest.raises(ValueError):
+        merger.STATEMENTS.get("create", "Planet")
+    with pytest.raises(ValueError):
+        merger.STATEMENTS.get("join", "Person", "Planet")
+    with pytest.raises(ValueError):
+        match_by_keys_statement(Contains("Planet", "names", "Mars"))
+
+    session = FakeSession()
+    with pytest.raises(ValueError):
+        Merger(session).create("Planet", "Mars", {})
+    # No statement is sent to the database
+    assert session.statements == []
+
+
+def test_registry_register():
+    registry = StatementRegistry({"create": {("Party",): Statement("CREATE 1")}})
+    assert registry.get("create", "Party").single == "CREATE 1"
+
+    registry.register("create", ("Party",), Statement("CREATE 2", "UNWIND 2"))
+    assert registry.get("create", "Party") == Statement("CREATE 2", "UNWIND 2")
+
+
+def test_registry_derived():
+    registry = StatementRegistry({"create": {("Party",): Statement("CREATE")}})
+    built = []
+
+    def build(type, property):
+        built.append((type, property))
+        return Statement(f"{type}.{property}")
+
+    assert registry.derived("contains", "Party", ("names",), build).single == "Party.names"
+    assert registry.derived("contains", "Party", ("names",), build).single == "Party.names"
+    # Built once
+    assert built == [("Party", "names")]
+
+    with pytest.raises(ValueError):
+        registry.derived("contains", "Planet", ("names",), build)
+
+
+def test_match_by_keys_statement():
+    statement = match_by_keys_statement(ObjectKeys("Person", {"name": "Jan", "@offset": 1}))
+    # Keys are compared one by one, not with invalid {$keys}
+    assert "{$keys}" not in statement
+    assert "n.`@offset` = $keys.`@offset` AND n.`name` = $keys.`name`" in statement
+    assert statement is match_by_keys_statement(ObjectKeys("Person", {"@offset": 2, "name": "A"}))
+
+    assert "$value IN n.`names`" in match_by_keys_statement(Contains("Party", "names", "PSL"))
+
+
+def test_batching_with_concurrency(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", [
+        "mesh-import", "local-elections", "-p", "candidates.json", "--concurrency", "4", "-b", "100"
+    ])
+    with pytest.raises(SystemExit) as exit:
+        import_data()
+    assert exit.value.code == 2
+    assert "--batch-size and --flush-interval" in capsys.readouterr().err
+
+
+NAMES = ["Anna", "Anna", "Ewa", "Jan", "Jan", "Jan", "Olga", "Piotr", "Piotr"]
+
+
+def database(query, params):
+    """Answers of duplicate statements on Person nodes of NAMES"""
+    if "LIMIT $limit" in query:
+        window = [name for name in NAMES if name > params["after"]][:params["limit"]]
+        return [
+            {"name": name, "seen": window.count(name), "count": NAMES.count(name)}
+            for name in sorted(set(window))
+        ]
+    return [
+        {
+            "name": name,
+            "count": NAMES.count(name),
+            "nodelist": [
+                {"id": f"{name} {i}", "element": {"name": name}, "links": []}
+                for i in range(NAMES.count(name))
+            ]
+        }
+        for name in params["names"]
+    ]
+
+
+def pages(session):
+    return [
+        (params["after"], params["limit"])
+        for (query, params) in session.statements if "LIMIT $limit" in query
+    ]
+
+
+def test_duplicates_pages():
+    session = FakeSession(database)
+    duplicates = Merger(session).find_duplicates("Person", page_size=4)
+    # Read lazily
+    assert session.statements == []
+
+    assert [(name, count) for (name, count, _) in duplicates] == [
+        ("Anna", 2), ("Jan", 3), ("Piotr", 2)
+    ]
+    # Jan is cut by the first window, but it is counted in full and skipped
+    # by the next one. Window which is not full is the last one
+    assert pages(session) == [("", 4), ("Jan", 4)]
+
+
+def test_duplicates_last_page_full():
+    session = FakeSession(database)
+    duplicates = list(Merger(session).find_duplicates("Person", page_size=3))
+
+    assert [name for (name, _, _) in duplicates] == ["Anna", "Jan", "Piotr"]
+    assert [id.id for ((id, _), _) in duplicates[1][2]] == ["Jan 0", "Jan 1", "Jan 2"]
+    # Full window may be followed by empty one
+    assert pages(session) == [("", 3), ("Ewa", 3), ("Jan", 3), ("Piotr", 3)]
+    # Nodes are read only for windows with duplicates
+    assert len(session.statements) == 4 + 3
+
+
+def merging(query, params):
+    """apoc.refactor.mergeNodes failing on groups with "bad" node"""
+    groups = params["groups"] if "groups" in params else [{"index": 0, "ids": params["ids"]}]
+    if any("bad" in group["ids"] for group in groups):
+        raise ClientError("cannot merge")
+    return [{"index": group["index"], "id": group["ids"][0]} for group in groups] \
+        if "groups" in params else [{"id": groups[0]["ids"][0]}]
+
+
+def test_merge_objects_many_fallback():
+    session = FakeSession(merging)
+    groups = [[person(i), person(i + 1)] for i in range(0, 10, 2)]
+    groups[3] = [person(6), ObjectId("Person", "bad")]
+
+    merged = Merger(session, batch_size=2).merge_objects_many(groups)
+    assert merged == [person(0), person(2), person(4), None, person(8)]
+    # Batches of 2 groups, the failed one is retried group by group
+    assert [len(params.get("groups", [None])) for (_, params) in session.statements] == \
+        [2, 2, 1, 1, 1]
+    assert session.statements[-1][1]["groups"] == [{"index": 0, "ids": ["8", "9"]}]
@@ -0,0 +1,99 @@
+import io
+import sys
+
+import pytest
+
+from . import ProgressBar, format_duration, format_size
+
+
+class Terminal(io.StringIO):
+    def isatty(self):
+        return True
+
+    @property
+    def lines(self):
+        return [line for line in self.getvalue().replace("\n", "\r").split("\r") if line]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    module = sys.modules[ProgressBar.__module__]
+    now = [0.0]
+    monkeypatch.setattr(module.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(module.shutil, "get_terminal_size", lambda fallback: (81, 20))
+    return now
+
+
+def test_not_a_terminal(clock):
+    output = io.StringIO()
+    progress = ProgressBar(100, file=output)
+    progress.move(100)
+    assert output.getvalue() == ""
+
+
+def test_redrawn_when_percent_changes(clock):
+    output = Terminal()
+    progress = ProgressBar(1000, file=output)
+    assert len(output.lines) == 1
+
+    for _ in range(9):
+        progress.move()
+    assert len(output.lines) == 1
+
+    progress.move()
+    assert len(output.lines) == 2
+    assert "   1% Complete" in output.lines[-1]
+    # Every line is as wide as terminal
+    assert {len(line) for line in output.lines} == {80}
+
+
+def test_redrawn_after_interval(clock):
+    output = Terminal()
+    progress = ProgressBar(1000, file=output, interval=0.5)
+
+    clock[0] = 0.4
+    progress.move()
+    assert len(output.lines) == 1
+
+    # Same percent, but rate and ETA are updated
+    clock[0] = 0.5
+    progress.move()
+    assert len(output.lines) == 2
+
+
+def test_rate_and_eta(clock):
+    output = Terminal()
+    progress = ProgressBar(1000, prefix="Import", file=output)
+
+    clock[0] = 10.0
+    progress.move(500)
+    assert output.lines[-1].startswith("Import [")
+    assert output.lines[-1].rstrip().endswith("50% Complete   50.0 B/s ETA    00:10")
+
+    clock[0] = 20.0
+    progress.move(500)
+    assert output.lines[-1].rstrip().endswith("100% Complete   50.0 B/s in 00:20")
+    assert output.getvalue().endswith("\n")
+
+    # Not drawn once complete
+    drawn = output.getvalue()
+    progress.move(0)
+    assert output.getvalue() == drawn
+
+
+def test_resumed(clock):
+    output = Terminal()
+    progress = ProgressBar(3000, file=output, initial=2000)
+    assert "66% Complete" in output.lines[-1]
+
+    clock[0] = 10.0
+    progress.move(500)
+    # Steps before initial one do not count in rate
+    assert "50.0 B/s ETA    00:10" in output.lines[-1]
+
+
+def test_format():
+    assert format_size(999) == " 999.0 "
+    assert format_size(1500000) == "   1.5 M"
+    assert format_duration(59) == "00:59"
+    assert format_duration(3725) == "1:02:05"
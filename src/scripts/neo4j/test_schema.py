@@ -0,0 +1,85 @@
+from neo4j.exceptions import ConstraintError
+
+from .schema import SchemaItem, ensure_schema, schema_items
+
+
+def test_schema_items():
+    items = {item.label: item for item in schema_items()}
+
+    # Label of the type, the last of its labels
+    assert items["Party"] == SchemaItem("Party", "name", unique=True)
+    assert items["Elections"] == SchemaItem("Elections", "name", unique=True)
+    assert items["Person"] == SchemaItem("Person", "name")
+    # Committees of different elections have the same names
+    assert items["ElectoralCommittee"] == SchemaItem("ElectoralCommittee", "name")
+    # One item per type
+    assert len(items) == len(schema_items())
+    assert {"Alliance", "ParlimentaryGroup", "Chamber", "ChamberTerm"} < set(items)
+
+
+def test_statement():
+    assert SchemaItem("Party", "name", True).statement() == \
+        "CREATE CONSTRAINT mesh_party_name IF NOT EXISTS " \
+        "FOR (n:Party) REQUIRE n.name IS UNIQUE"
+    assert SchemaItem("Person", "name").statement() == \
+        "CREATE INDEX mesh_person_name IF NOT EXISTS FOR (n:Person) ON (n.name)"
+
+
+class FakeResult(list):
+    def consume(self):
+        return None
+
+
+class FakeSession:
+    """Database where Party names are duplicated and Person index is being populated"""
+
+    def __init__(self):
+        self.statements = []
+        self.indexes = {}
+        self.constraints = set()
+
+    def run(self, query, **params):
+        self.statements.append(query)
+        label = query.split("(n:")[1].split(")")[0] if "(n:" in query else None
+
+        if query.startswith("CREATE CONSTRAINT"):
+            if label == "Party":
+                raise ConstraintError("Party has duplicated names")
+            self.constraints.add(label)
+            self.indexes[label] = "ONLINE"
+        elif query.startswith("CREATE INDEX"):
+            self.indexes.setdefault(label, "POPULATING" if label == "Person" else "ONLINE")
+        elif "SHOW INDEXES" in query:
+            return FakeResult(
+                {"labelsOrTypes": [label], "properties": ["name"], "state": state}
+                for (label, state) in self.indexes.items()
+            )
+        elif "SHOW CONSTRAINTS" in query:
+            return FakeResult(
+                {"labelsOrTypes": [label], "properties": ["name"]} for label in self.constraints
+            )
+        return FakeResult()
+
+
+def test_ensure_schema():
+    session = FakeSession()
+    missing = ensure_schema(session)
+
+    # Index is created instead of the constraint
+    assert "CREATE INDEX mesh_party_name IF NOT EXISTS FOR (n:Party) ON (n.name)" \
+        in session.statements
+    assert session.indexes["Party"] == "ONLINE"
+
+    assert [(item.label, reason.split(" - ")[0]) for (item, reason) in missing] == [
+        ("Person", "index is populating"),
+        ("Party", "Party names are not unique, only indexed"),
+    ]
+
+
+def test_ensure_schema_online():
+    session = FakeSession()
+    ensure_schema(session)
+    session.constraints.add("Party")
+    session.indexes["Person"] = "ONLINE"
+
+    assert ensure_schema(session) == []
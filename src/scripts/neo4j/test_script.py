@@ -0,0 +1,140 @@
+from neo4j import SummaryCounters
+
+from .script import Section, first_line, load_sections, split_statements
+
+SCRIPT = """
+// Parties
+CREATE (:Party {name: "PSL"});
+CREATE (:Party {name: "ZSL"});
+// --- persons
+MATCH (p:Party) RETURN p;
+
+// not a statement
+;
+MERGE (:Person {name: "Jan"})
+"""
+
+
+class FakeSummary:
+    def __init__(self, stmt):
+        self.counters = SummaryCounters({"nodes-created": 1} if "CREATE" in stmt else {})
+        self.result_available_after = 1
+        self.result_consumed_after = 2
+
+
+class FakeResult:
+    def __init__(self, stmt):
+        self.stmt = stmt
+
+    def consume(self):
+        return FakeSummary(self.stmt)
+
+
+class FakeTransaction:
+    def __init__(self, session):
+        self.session = session
+        self.statements = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def run(self, stmt):
+        self.session.check(stmt)
+        self.statements.append(stmt)
+        return FakeResult(stmt)
+
+    def commit(self):
+        self.session.transactions.append(self.statements)
+
+
+class FakeSession:
+    """Keeps statements run in autocommit mode and those of committed transactions"""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.autocommit = []
+        self.transactions = []
+
+    def check(self, stmt):
+        if stmt == self.fail_on:
+            raise RuntimeError(f"failed {stmt}")
+
+    def run(self, stmt):
+        self.check(stmt)
+        self.autocommit.append(stmt)
+        return FakeResult(stmt)
+
+    def begin_transaction(self):
+        return FakeTransaction(self)
+
+
+def test_split_statements():
+    assert split_statements(SCRIPT) == [
+        '// Parties\nCREATE (:Party {name: "PSL"})',
+        'CREATE (:Party {name: "ZSL"})',
+        "// --- persons\nMATCH (p:Party) RETURN p",
+        'MERGE (:Person {name: "Jan"})',
+    ]
+    assert first_line(split_statements(SCRIPT)[0]) == 'CREATE (:Party {name: "PSL"})'
+
+
+def test_load_sections(tmp_path):
+    path = tmp_path / "script.cypher"
+    path.write_text(SCRIPT, encoding="UTF8")
+
+    (section,) = load_sections(str(path))
+    assert section.name == str(path)
+    assert len(section.statements) == 4
+
+    sections = load_sections(str(path), split=True)
+    assert [section.name for section in sections] == [f"{path}#1", f"{path}#2"]
+    assert [len(section.statements) for section in sections] == [2, 2]
+    assert sections[1].statements[0] == "MATCH (p:Party) RETURN p"
+
+
+STATEMENTS = [f"CREATE (:Party {{name: '{i}'}})" for i in range(5)]
+
+
+def test_run_autocommit():
+    session = FakeSession()
+    section = Section("script", STATEMENTS).run(session)
+
+    assert section.error is None
+    assert session.autocommit == STATEMENTS
+    assert session.transactions == []
+    assert section.counters["nodes_created"] == 5
+    assert [stmt for (stmt, _, _) in section.timings] == STATEMENTS
+
+
+def test_run_batches():
+    session = FakeSession()
+    section = Section("script", STATEMENTS).run(session, batch_size=2)
+
+    assert session.autocommit == []
+    assert session.transactions == [STATEMENTS[0:2], STATEMENTS[2:4], STATEMENTS[4:]]
+    # Commits are timed too
+    assert [stmt for (stmt, _, _) in section.timings].count("COMMIT") == 3
+    assert section.counters["nodes_created"] == 5
+    assert section.metrics.operations["CREATE"].count == 5
+
+
+def test_run_in_transactions():
+    call = "MATCH (n) CALL { WITH n DETACH DELETE n } IN 10 CONCURRENT TRANSACTIONS"
+    session = FakeSession()
+    Section("script", [*STATEMENTS[:3], call, *STATEMENTS[3:]]).run(session, batch_size=2)
+
+    # Batch before is committed first, the call runs in autocommit mode
+    assert session.transactions == [STATEMENTS[0:2], STATEMENTS[2:3], STATEMENTS[3:]]
+    assert session.autocommit == [call]
+
+
+def test_run_error():
+    session = FakeSession(fail_on=STATEMENTS[3])
+    section = Section("script", STATEMENTS).run(session, batch_size=2)
+
+    assert str(section.error) == f"failed {STATEMENTS[3]}"
+    # Failed transaction is not committed, nothing after it runs
+    assert session.transactions == [STATEMENTS[0:2]]
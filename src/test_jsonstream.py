@@ -0,0 +1,59 @@
+import io
+import json
+import pytest
+
+from .jsonstream import JsonStream
+
+
+@pytest.fixture
+def records():
+    return [
+        {"name": f"Zażółć Gęślą {i}", "number": i * 1001, "flags": [True, None]}
+        for i in range(50)
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 65536])
+def test_array(records, chunk_size):
+    data = json.dumps(records, indent=2, ensure_ascii=False).encode()
+    stream = JsonStream(io.BytesIO(data), chunk_size=chunk_size)
+
+    assert list(stream) == records
+    assert stream.is_array
+    assert stream.position == len(data)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 65536])
+def test_lines(records, chunk_size):
+    data = "\n".join(json.dumps(r, ensure_ascii=False) for r in records).encode()
+    stream = JsonStream(io.BytesIO(data), chunk_size=chunk_size)
+
+    assert list(stream) == records
+    assert not stream.is_array
+
+
+def test_numbers_split_between_chunks():
+    assert list(JsonStream(io.BytesIO(b"[12345, 678]"), chunk_size=2)) == [12345, 678]
+    assert list(JsonStream(io.BytesIO(b"12345\n678"), chunk_size=2)) == [12345, 678]
+    for chunk_size in (1, 2, 3, 4):
+        assert list(JsonStream(io.BytesIO(b"[1.5, 2]"), chunk_size=chunk_size)) == [1.5, 2]
+        assert list(JsonStream(io.BytesIO(b"1.5\n2.25"), chunk_size=chunk_size)) == [1.5, 2.25]
+        assert list(JsonStream(io.BytesIO(b"[-1e10, 2.5E-3]"), chunk_size=chunk_size)) \
+            == [-1e10, 2.5e-3]
+        assert list(JsonStream(io.BytesIO(b"1e+2 -0.5"), chunk_size=chunk_size)) == [100.0, -0.5]
+
+
+def test_resume_from_position(records):
+    data = json.dumps(records, ensure_ascii=False).encode()
+    stream = JsonStream(io.BytesIO(data), chunk_size=16)
+    values = iter(stream)
+    for _ in range(20):
+        next(values)
+
+    assert list(JsonStream(io.BytesIO(data), offset=stream.position)) == records[20:]
+
+
+def test_invalid_array():
+    for data in [b"[1, 2", b"[1 2]", b"[1,]"]:
+        with pytest.raises(json.JSONDecodeError):
+            list(JsonStream(io.BytesIO(data)))
@@ -0,0 +1,77 @@
+import pytest
+
+from datetime import date
+
+from .types import ImportedPerson, PersistedPerson, PersonResolver, ResolvedExistingPerson
+
+
+def persisted(ident, fullname, **kwargs):
+    (firstname, surname) = (fullname.split()[0], fullname.split()[-1])
+    return PersistedPerson(ident, firstname=firstname, surname=surname, fullname=fullname, **kwargs)
+
+
+def imported(fullname, **kwargs):
+    (firstname, surname) = (fullname.split()[0], fullname.split()[-1])
+    return ImportedPerson(firstname=firstname, surname=surname, fullname=fullname, **kwargs)
+
+
+def test_resolve_existing():
+    resolver = PersonResolver([
+        persisted("1", "Jan Maria Kowalski", birthdate=date(1970, 1, 1)),
+        persisted("2", "Anna Nowak"),
+    ])
+
+    resolved = resolver.resolve(imported("jan  maria KOWALSKI"))
+    assert isinstance(resolved, ResolvedExistingPerson)
+    assert resolved.target == "1"
+    # By (surname, firstname) when fullname differs
+    assert resolver.resolve(imported("Jan Kowalski")).target == "1"
+    assert resolver.resolve(imported("Anna Nowak", birthdate=date(1980, 1, 1))).target == "2"
+    # Birthdate does not match
+    assert resolver.resolve(imported("Jan Kowalski", birthdate=date(1971, 1, 1))).target \
+        not in ("1", "2")
+
+
+def test_ambiguous_name_resolved_by_birthdate():
+    resolver = PersonResolver([
+        persisted("1", "Jan Kowalski", birthdate=date(1970, 1, 1)),
+        persisted("2", "Jan Kowalski", birthdate=date(1980, 1, 1)),
+    ])
+
+    assert resolver.find_person(imported("Jan Kowalski")) is None
+    assert resolver.resolve(imported("Jan Kowalski", birthdate=date(1980, 1, 1))).target == "2"
+
+
+def test_fallback_to_name_when_birthdate_does_not_match():
+    resolver = PersonResolver([
+        persisted("1", "Jan Kowalski", birthdate=date(1970, 1, 1)),
+        persisted("2", "Jan Maria Kowalski", birthdate=date(1980, 1, 1)),
+    ])
+
+    # Fullname candidate is born another day, (surname, firstname) finds the other
+    assert resolver.find_person(imported("Jan Kowalski", birthdate=date(1980, 1, 1))).ident == "2"
+    assert resolver.find_person(imported("Jan Kowalski", birthdate=date(1990, 1, 1))) is None
+
+
+def test_persist_refreshes_indexes():
+    resolver = PersonResolver()
+    (first, second) = resolver.resolve_all([imported("Jan Kowalski"), imported("Jan Kowalski")])
+    assert first.target == second.target
+
+    existing = resolver.persist(first)
+    assert existing.target_person.ident == first.target
+    assert len(resolver) == 1
+    assert resolver.find_person(imported("Jan Kowalski")) is existing.target_person
+
+
+def test_frozen_person():
+    person = imported("Jan Kowalski").freeze()
+    assert person.frozen
+    assert not hasattr(person, "__dict__")
+
+    with pytest.raises(AttributeError):
+        person.surname = "Nowak"
+
+    # Metadata and resolution are not frozen
+    person.metadata["source"] = "test"
+    assert PersonResolver().resolve(person) is person.resolved
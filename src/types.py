@@ -1,3 +1,6 @@
+import uuid
+
+from collections.abc import Iterable
 from datetime import date
 from typing import Any, Self, cast
 
@@ -5,26 +8,43 @@ type Metadata = dict[str, str]
 
 
 class Person:
+    """
+    Person data. Attributes are kept in slots (no instance dictionary) as
+    there may be millions of persons in memory, metadata is created when
+    first used. Frozen person cannot be changed.
+    """
+
+    __slots__ = ("__firstname", "__surname", "__fullname", "__birthdate", "__metadata", "__frozen")
 
     def __init__(self, **kwargs: str|date) -> None:
         assert "firstname" in kwargs, "firstname is a mandatory argument"
         assert "surname" in kwargs, "surname is a mandatory argument"
 
+        self.__frozen = False
+        self.__metadata = None
         self.firstname = cast(str, kwargs["firstname"])
         self.surname = cast(str, kwargs["surname"])
         self.fullname = cast(str, kwargs.get("fullname", f"{self.firstname} {self.surname}"))
         self.birthdate = cast(date, kwargs.get("birthdate"))
-        self.__metadata = {}
 
     def __repr__(self: Self) -> str:
         return f"{self.__class__.__name__}({self.fullname}) at {hex(id(self))}"
 
+    def freeze(self: Self) -> Self:
+        self.__frozen = True
+        return self
+
+    @property
+    def frozen(self: Self) -> bool:
+        return self.__frozen
+
     @property
     def firstname(self: Self) -> str:
         return self.__firstname
 
     @firstname.setter
     def firstname(self: Self, firstname: str) -> None:
+        self._check_frozen()
         self.__firstname = firstname
 
     @property
@@ -33,6 +53,7 @@ class Person:
 
     @surname.setter
     def surname(self: Self, surname: str) -> None:
+        self._check_frozen()
         self.__surname = surname
 
     @property
@@ -41,6 +62,7 @@ class Person:
 
     @fullname.setter
     def fullname(self: Self, fullname: str) -> None:
+        self._check_frozen()
         self.__fullname = fullname
 
     @property
@@ -49,16 +71,25 @@ class Person:
 
     @birthdate.setter
     def birthdate(self: Self, birthdate: date) -> None:
+        self._check_frozen()
         self.__birthdate = birthdate
 
     @property
     def metadata(self: Self) -> Metadata:
+        if self.__metadata is None:
+            self.__metadata = {}
         return self.__metadata
 
+    def _check_frozen(self: Self) -> None:
+        if self.__frozen:
+            raise AttributeError(f"{self!r} is frozen")
+
 
 class PersistedPerson(Person):
     """Person already existing in the system"""
 
+    __slots__ = ("__ident",)
+
     def __init__(self, ident: str, **kwargs: str) -> None:
         super().__init__(**kwargs)
         self.__ident = ident
@@ -74,6 +105,9 @@ class PersistedPerson(Person):
 class ImportedPerson(Person):
     """Imported person"""
 
+    # Resolution is not person's data, it can be set on frozen person
+    __slots__ = ("__resolved",)
+
     @property
     def resolved(self) -> Any:
         return self.__resolved
@@ -86,6 +120,8 @@ class ImportedPerson(Person):
 
 class ResolvedPerson:
 
+    __slots__ = ("__source", "__target")
+
     def __init__(self, source: ImportedPerson, target: str):
         self.__source = source
         self.__target = target
@@ -104,8 +140,11 @@ class ResolvedPerson:
 
 
 class ResolvedExistingPerson(ResolvedPerson):
+
+    __slots__ = ("__target_person",)
+
     def __init__(self, source: ImportedPerson, target: PersistedPerson):
-        super().__init__(source, target.id)
+        super().__init__(source, target.ident)
         self.__target_person = target
 
     @property
@@ -118,28 +157,86 @@ class PersonId:
 
 
 class PersonResolver:
+    """
+    Resolve imported persons against persisted ones loaded into memory
+    indexes - by normalised fullname and by (surname, firstname), so
+    resolution does not query the database per person.
+    """
+
+    def __init__(self: Self, persons: Iterable[PersistedPerson] = ()) -> None:
+        self._by_fullname = dict[str, list[PersistedPerson]]()
+        self._by_name = dict[tuple[str, str], list[PersistedPerson]]()
+        # New persons resolved but not persisted yet, by (fullname, birthdate)
+        self._pending = dict[tuple[str, date | None], str]()
+        self.load(persons)
+
+    def __len__(self: Self) -> int:
+        return sum(len(persons) for persons in self._by_fullname.values())
+
+    def load(self: Self, persons: Iterable[PersistedPerson]) -> None:
+        for person in persons:
+            self.add(person)
+
+    def add(self: Self, person: PersistedPerson) -> None:
+        self._by_fullname.setdefault(normalize(person.fullname), []).append(person)
+        self._by_name.setdefault(name_key(person), []).append(person)
+
     def find_person(self: Self, person: ImportedPerson) -> PersistedPerson | None:
-        pass
+        """
+        Only unique candidate is returned. Persons of the same fullname are
+        looked for first, then of the same (surname, firstname) if there are
+        none (or none born on the same day or of unknown birthdate).
+        """
+        for candidates in (
+            self._by_fullname.get(normalize(person.fullname), []),
+            self._by_name.get(name_key(person), [])
+        ):
+            if person.birthdate:
+                candidates = [c for c in candidates if c.birthdate == person.birthdate] \
+                    or [c for c in candidates if not c.birthdate]
+
+            if candidates:
+                return candidates[0] if len(candidates) == 1 else None
+
+        return None
 
     def resolve(self: Self, person: ImportedPerson) -> ResolvedPerson:
-        # create person id from person properties
-        # find that person using the id
-        # or find person using properties and return its id
         record = self.find_person(person)
         if record:
             return ResolvedExistingPerson(person, record)
 
-        # we may find similar persons, maybe we do not have
+        # Same new person imported again gets the same id
+        key = (normalize(person.fullname), person.birthdate)
+        target = self._pending.get(key)
+        if not target:
+            target = self._pending[key] = uuid.uuid4().hex
 
-        return ResolvedPerson(person, "person_id")
+        return ResolvedPerson(person, target)
+
+    def resolve_all(self: Self, persons: Iterable[ImportedPerson]) -> list[ResolvedPerson]:
+        return [self.resolve(person) for person in persons]
 
     def persist(self: Self, person: ResolvedPerson) -> ResolvedExistingPerson:
-        return ResolvedExistingPerson(
-            person.source,
-            PersistedPerson(
-                "genid",
-                firstname=person.source.firstname,
-                surname=person.source.surname,
-                fullname=person.source.fullname
-            )
+        if isinstance(person, ResolvedExistingPerson):
+            return person
+
+        persisted = PersistedPerson(
+            person.target,
+            firstname=person.source.firstname,
+            surname=person.source.surname,
+            fullname=person.source.fullname,
+            birthdate=person.source.birthdate
         )
+        # Following resolutions find it in indexes
+        self.add(persisted)
+        self._pending.pop((normalize(persisted.fullname), persisted.birthdate), None)
+
+        return ResolvedExistingPerson(person.source, persisted)
+
+
+def normalize(name: str) -> str:
+    return " ".join(name.split()).casefold()
+
+
+def name_key(person: Person) -> tuple[str, str]:
+    return (normalize(person.surname), normalize(person.firstname))